@@ -1,10 +1,49 @@
+import functools
+import os
+import sys
+
 import streamlit as st
+import streamlit.logger
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+# Without a Streamlit runtime (python app.py --export), every cache_data
+# builder in the modules below logs a "No runtime found" warning as it is
+# defined, so the logger is quieted before they are imported
+if not st.runtime.exists():
+    streamlit.logger.set_log_level('error')
+
+import charts
+import components
+import data_sources
+import export
+import forecast
+import history
+import kpis
+import podcast
+import profiling
+import registrants
+import snapshot
+import stories
+
+# python app.py --export out/ renders every tab into static files instead of
+# serving the dashboard; see export.py
+EXPORT_DIR = None if st.runtime.exists() else export.export_dir_from_args(sys.argv)
+if EXPORT_DIR:
+    st = export.StaticPage()
+
+# Debug mode (?debug=1 or DASHBOARD_DEBUG=1) profiles this run, memory
+# included, and shows the results in a collapsible overlay
+DEBUG = not EXPORT_DIR and st.experimental_get_query_params().get(
+    'debug', [os.environ.get('DASHBOARD_DEBUG', '0')]
+)[0] == '1'
+
+# Per-section wall time, memory and payload when profiling is on; see
+# profiling.py and bench.py
+profiler = profiling.Profiler(enabled=profiling.ENABLED or DEBUG, trace_memory=DEBUG)
+profiler.section("Page Setup")
+
 # Set page configuration
 st.set_page_config(
     page_title="Self-Care School Dashboard",
@@ -89,6 +128,16 @@ st.markdown("""
         display: inline-block;
         margin-left: 8px;
     }
+    .status-no-data {
+        background-color: #f3f4f6;
+        color: #4b5563;
+        padding: 4px 12px;
+        border-radius: 9999px;
+        font-size: 0.75rem;
+        font-weight: 600;
+        display: inline-block;
+        margin-left: 8px;
+    }
     
     /* Container styles */
     .insight-container {
@@ -129,6 +178,86 @@ st.markdown("""
         font-weight: 600;
     }
     
+    /* Lazy tab selector - radio styled to match the tab list */
+    .stRadio [role="radiogroup"] {
+        gap: 24px;
+        background-color: #f9fafb;
+        padding: 8px 16px;
+        border-radius: 8px 8px 0 0;
+        border-bottom: 1px solid #e5e7eb;
+    }
+    .stRadio [role="radiogroup"] label {
+        padding: 10px 16px;
+        border-radius: 8px 8px 0 0;
+        font-weight: 500;
+    }
+    .stRadio [role="radiogroup"] label:has(input:checked) {
+        background-color: #e0e7ff;
+        color: #4338ca;
+        font-weight: 600;
+    }
+    
+    /* Card grid - one element holding a whole row of metric cards */
+    .card-grid {
+        display: grid;
+        gap: 1rem;
+        margin-bottom: 8px;
+    }
+    .kpi-row {
+        display: grid;
+        grid-template-columns: 1fr 2fr 1fr;
+        gap: 1rem;
+    }
+    
+    /* Trend sparklines from the metric history */
+    .sparkline {
+        display: block;
+        margin: 6px auto 0;
+    }
+    .kpi-row .sparkline {
+        display: inline-block;
+        margin: 0 0 0 8px;
+        vertical-align: middle;
+    }
+    
+    /* Debug overlay (?debug=1) */
+    .debug-overlay {
+        position: fixed;
+        right: 16px;
+        bottom: 16px;
+        z-index: 1000;
+        max-width: 520px;
+        max-height: 70vh;
+        overflow: auto;
+        background-color: white;
+        border: 1px solid #e5e7eb;
+        border-radius: 12px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        padding: 8px 16px;
+        font-size: 0.8rem;
+    }
+    .debug-overlay summary {
+        cursor: pointer;
+        font-weight: 600;
+        color: #4338ca;
+    }
+    .debug-overlay table {
+        width: 100%;
+        margin: 8px 0;
+    }
+    .debug-overlay td, .debug-overlay th {
+        padding: 2px 6px;
+        text-align: right;
+    }
+    .debug-overlay td:first-child, .debug-overlay th:first-child {
+        text-align: left;
+    }
+    .debug-overlay pre {
+        font-size: 0.7rem;
+        max-height: 200px;
+        overflow: auto;
+    }
+    
     /* Progress bar styles */
     .stProgress > div > div {
         background-color: #e0e7ff;
@@ -160,154 +289,177 @@ st.markdown("""
         .insight-container {
             padding: 12px;
         }
+        .card-grid {
+            grid-template-columns: 1fr !important;
+        }
     }
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize data
-# Program Metrics Data
-program_metrics = {
-    'Registrants': {'value': 11985, 'target': 10000, 'color': '#8884d8'},
-    'Contacts': {'value': 4808, 'target': None, 'color': '#82ca9d'},
-    'NEW Contacts': {'value': 4808, 'target': None, 'color': '#ffc658'},
-    'Completed Week 0': {'value': 3089, 'target': None, 'color': '#ff8042'}
-}
+profiler.section("Data Load")
 
-# Age Demographics - UPDATED
-age_data = {
-    '18-25': {'value': 101, 'color': '#0088FE'},
-    'Other Ages': {'value': 11884, 'color': '#00C49F'}
-}
+# Load data from DASHBOARD_DATA_SOURCE (a CSV or Parquet directory, an Excel
+# workbook or a SQLite database); without it the built-in data is used.
+# See data_sources.py for the table layout.
+DATA_SOURCE = os.environ.get('DASHBOARD_DATA_SOURCE')
 
-# SMS Campaign Data
-sms_data = {
-    'Week 1 Reminder': {'delivered': 82337, 'clicked': 7285, 'rate': 9},
-    'Technical Issue': {'delivered': 82144, 'clicked': 8152, 'rate': 9.9}
-}
+# A source with a cohorts/ directory holds one partition per cohort; only the
+# selected one is loaded. Defaults to the latest cohort, or ?cohort=<id>.
+cohorts = data_sources.list_cohorts(DATA_SOURCE)
+cohort = None
+if cohorts:
+    requested = st.experimental_get_query_params().get('cohort', [cohorts[-1]])[0]
+    cohort = st.selectbox(
+        "Cohort", cohorts,
+        index=cohorts.index(requested) if requested in cohorts else len(cohorts) - 1,
+        key='cohort'
+    )
 
-# Website Traffic Data - UPDATED
-traffic_data = {
-    'Visitors': 29500,
-    'Sessions': 55100,
-    'Pageviews': 101200,
-    'Bounce Rate': 30.3
-}
+# Metric history - with DASHBOARD_HISTORY_DB set, every refresh snapshots each
+# metric and the cards and KPI bars show a trend sparkline (see history.py)
+HISTORY_DB = os.environ.get('DASHBOARD_HISTORY_DB')
+# Each cohort keeps its own series
+HISTORY_PREFIX = f'{cohort}/' if cohort else ''
 
-# Download Data - UPDATED
-stream_data = {
-    'Downloads': 22186,
-    'Target': 100000
-}
 
-# Social Media & Marketing Data - UPDATED as of April 25, 2025
-social_data = {
-    'Clicks to Site': 39000,
-    'Unique Users Reached': 101900,  # Keeping this the same as no new data was provided
-    'Impressions Delivered': 338000,
-    'Direct Engagements': 3557,  # Sum of reactions, saves, shares, comments
-    'Video Views': 70700,
-    'Page Likes': 67,
-    'Comments': 74,
-    'Shares': 217,
-    'Saves': 66,
-    'Reactions': 3200
-}
+def build_snapshot():
+    """Load the data and derive the KPIs and metric trends from it."""
+    data = data_sources.load_data(DATA_SOURCE, cohort)
+    # Derived KPIs, ratios and funnel conversions - see kpis.py for the registry
+    kpi_results = kpis.evaluate(data)
+    trends = history.track(
+        HISTORY_DB, history.metrics_from(data, kpi_results, prefix=HISTORY_PREFIX),
+        grain=os.environ.get('DASHBOARD_TREND_GRAIN', 'daily')
+    ) if HISTORY_DB else {}
+    # Week x day episode cube and retention curves - see podcast.py
+    podcast_cube = podcast.PodcastCube(data['podcast_data'], data.get('podcast_listens'))
+    # Monte Carlo forecast bands of the weekly series - see forecast.py
+    forecasts = forecast.forecasts(data)
+    return snapshot.Snapshot(data, kpi_results, trends, podcast_cube, forecasts)
 
-# Badges Data - NEW
-badges_data = {
-    'Week 0': 3089,
-    'Week 1': 2061,
-    'Week 2': 2197,
-    'Total Claimed': 7347,
-    'Unique Users': 4788,
-    'Target': 5000
-}
 
-# Stories Data - NEW
-stories_data = {
-    'Submitted': 234,
-    'Target': 100
-}
+# One read-only snapshot per data version, shared by every session and built
+# only by the first session to ask for it (see snapshot.py)
+data, kpi_results, trends, podcast_cube, forecasts = snapshot.get(
+    (DATA_SOURCE, cohort), data_sources.data_version(DATA_SOURCE, cohort), build_snapshot
+)
+program_metrics = data['program_metrics']
+age_data = data['age_data']
+sms_data = data['sms_data']
+traffic_data = data['traffic_data']
+stream_data = data['stream_data']
+social_data = data['social_data']
+badges_data = data['badges_data']
+stories_data = data['stories_data']
+podcast_data = data['podcast_data']
+# Session details from the pageview log (see web.py); without one, the
+# figures from the last analytics report
+web_sessions = data.get('web_sessions', {'new_share': 94.5, 'avg_session_seconds': 79})
+hours, seconds = divmod(int(web_sessions['avg_session_seconds']), 3600)
+session_length = f"{hours:02d}:{seconds // 60:02d}:{seconds % 60:02d}"
 
-# Podcast Data - NEW
-podcast_data = {
-    'Total Plays': 21078,
-    'Total Episodes': 17,
-    'Average Plays': 1240,
-    'Weekly Plays': {
-        'Week 0': 6957,
-        'Week 1': 6809,
-        'Week 2': 6122,
-        'Week 3': 1190
-    },
-    'Episodes': [
-        {'week': 0, 'day': 1, 'title': 'Orientation Week: Before We Begin', 'plays': 1566, 'color': '#8b5cf6'},
-        {'week': 0, 'day': 2, 'title': 'Life Expectancy Calculator', 'plays': 1548, 'color': '#818cf8'},
-        {'week': 0, 'day': 3, 'title': 'Meet the Homegirl Hotline Hosts', 'plays': 1317, 'color': '#93c5fd'},
-        {'week': 0, 'day': 4, 'title': 'Set Your Intentions', 'plays': 1161, 'color': '#bfdbfe'},
-        {'week': 0, 'day': 5, 'title': 'The Pep Rally', 'plays': 1365, 'color': '#dbeafe'},
-        
-        {'week': 1, 'day': 1, 'title': 'Healing the Heart', 'plays': 1495, 'color': '#a78bfa'},
-        {'week': 1, 'day': 2, 'title': 'Know Your Numbers', 'plays': 1399, 'color': '#c4b5fd'},
-        {'week': 1, 'day': 3, 'title': 'Sleep to Save Your Life', 'plays': 1309, 'color': '#ddd6fe'},
-        {'week': 1, 'day': 4, 'title': 'Hydration and Hygiene', 'plays': 1250, 'color': '#ede9fe'},
-        {'week': 1, 'day': 5, 'title': 'Healing with Vitamin D and Physical Touch', 'plays': 1356, 'color': '#f5f3ff'},
-        
-        {'week': 2, 'day': 1, 'title': 'Disconnect to Reconnect', 'plays': 1329, 'color': '#10b981'},
-        {'week': 2, 'day': 2, 'title': 'Mental Health Diagnoses', 'plays': 1297, 'color': '#34d399'},
-        {'week': 2, 'day': 3, 'title': 'Rooted in Nature', 'plays': 1156, 'color': '#6ee7b7'},
-        {'week': 2, 'day': 4, 'title': 'Compassionate Listening', 'plays': 1147, 'color': '#a7f3d0'},
-        {'week': 2, 'day': 5, 'title': 'Connection Prayer and Purpose', 'plays': 1193, 'color': '#d1fae5'},
-        
-        {'week': 3, 'day': 1, 'title': 'ACES Teach-In', 'plays': 818, 'color': '#f59e0b'},
-        {'week': 3, 'day': 2, 'title': 'Love with Boundaries and Recognizing Abuse', 'plays': 372, 'color': '#fbbf24'}
-    ]
+
+def trend(metric, color):
+    """Sparkline of a metric's history, or an empty string without history."""
+    return components.sparkline_svg(trends.get(HISTORY_PREFIX + metric), color)
+
+
+# Set colors for weekly bars, one per program week in the data
+WEEK_PALETTE = ['#8b5cf6', '#a78bfa', '#10b981', '#f59e0b', '#3b82f6', '#ef4444', '#14b8a6', '#ec4899']
+week_colors = {
+    week: WEEK_PALETTE[i % len(WEEK_PALETTE)]
+    for i, week in enumerate(data_sources.week_names(podcast_data['Weekly Plays']))
 }
 
-# Create tabs
-tab1, tab2 = st.tabs(["📊 Dashboard", "📈 Analysis & Recommendations"])
+# Tab render mode: "lazy" only builds the tab the user has selected, "eager"
+# builds every tab body up front with st.tabs. Override with ?render=eager
+# or the DASHBOARD_RENDER_MODE environment variable.
+RENDER_MODE = st.experimental_get_query_params().get(
+    'render', [os.environ.get('DASHBOARD_RENDER_MODE', 'lazy')]
+)[0]
+if EXPORT_DIR:
+    # A static snapshot has no way to switch tabs, so include all of them
+    RENDER_MODE = 'eager'
 
-with tab1:
-    # Dashboard Header - Improved with container and date badge
-    st.markdown('<div style="background-color: #f9fafb; padding: 20px; border-radius: 12px; margin-bottom: 20px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">', unsafe_allow_html=True)
-    st.markdown('<p class="main-header">Self-Care School Dashboard</p>', unsafe_allow_html=True)
-    st.markdown('<div style="display: flex; align-items: center; margin-bottom: 10px;"><div style="background-color: #e0e7ff; padding: 6px 12px; border-radius: 16px; font-size: 0.9rem; color: #4338ca; font-weight: 500;">Latest data as of April 25, 2025</div></div>', unsafe_allow_html=True)
-    
-    # Divider
-    st.markdown('<hr style="margin: 0; border: none; border-top: 1px solid #e5e7eb;">', unsafe_allow_html=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+
+def render_tabs(tabs, key):
+    """Render a mapping of tab label -> render function.
+
+    In lazy mode the labels become a horizontal radio styled like tabs and only
+    the selected tab's render function runs, so hidden tabs cost nothing.
+    """
+    if not tabs:
+        return
+    if RENDER_MODE == 'eager':
+        for tab, render in zip(st.tabs(list(tabs)), tabs.values()):
+            with tab:
+                render()
+        return
+
+    selected = st.radio(key, list(tabs), horizontal=True, key=key, label_visibility="collapsed")
+    tabs[selected]()
+
+
+def render_podcast_week(week_idx):
+    """Episode chart and weekly insight cards for a single podcast week."""
+    # Episodes (in day order) and totals are precomputed in the podcast cube;
+    # the frame shares the catalog's column buffers
+    week = podcast_cube.weeks[week_idx]
+    week_name = week.name
+    week_episodes = week.episodes.frame()
+    
+    # Create week-specific bar chart
+    st.plotly_chart(charts.episode_chart(week_name, week_episodes), use_container_width=True)
+    
+    # Add weekly insights
+    total_week_plays = week.total
+    avg_week_plays = week.average
+    most_played = week.most_played or {'day': '-', 'title': 'No episodes yet', 'plays': 0}
     
-    # Top metrics - Enhanced card design
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
-        <div class="metric-card" style="background: linear-gradient(135deg, #e0e7ff 0%, #c7d2fe 100%);">
-            <div class="metric-label">Registrants</div>
-            <div class="metric-value">{:,}</div>
-            <div style="color: #4338ca; font-weight: 500;">Target: {:,}</div>
+    st.markdown(f"""
+    <div style="display: flex; gap: 16px; margin-top: 10px;">
+        <div style="flex: 1; background: {week_colors[week_name]}20; padding: 12px; border-radius: 8px; text-align: center; border-left: 3px solid {week_colors[week_name]};">
+            <div style="font-weight: 600; color: {week_colors[week_name]};">Total Plays</div>
+            <div style="font-size: 1.5rem; font-weight: 700; color: {week_colors[week_name]};">{total_week_plays:,}</div>
         </div>
-        """.format(program_metrics['Registrants']['value'], program_metrics['Registrants']['target']), unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class="metric-card" style="background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%);">
-            <div class="metric-label">Visitors</div>
-            <div class="metric-value">{:,}</div>
-            <div style="color: #92400e; font-weight: 500;">94.5% are new visitors</div>
+        <div style="flex: 1; background: {week_colors[week_name]}20; padding: 12px; border-radius: 8px; text-align: center; border-left: 3px solid {week_colors[week_name]};">
+            <div style="font-weight: 600; color: {week_colors[week_name]};">Average Per Episode</div>
+            <div style="font-size: 1.5rem; font-weight: 700; color: {week_colors[week_name]};">{avg_week_plays:,}</div>
         </div>
-        """.format(traffic_data['Visitors']), unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div class="metric-card" style="background: linear-gradient(135deg, #ffedd5 0%, #fed7aa 100%);">
-            <div class="metric-label">Total Badges Claimed</div>
-            <div class="metric-value">{:,}</div>
-            <div style="color: #9a3412; font-weight: 500;">{:.1f}% of weekly target</div>
+        <div style="flex: 2; background: {week_colors[week_name]}20; padding: 12px; border-radius: 8px; text-align: center; border-left: 3px solid {week_colors[week_name]};">
+            <div style="font-weight: 600; color: {week_colors[week_name]};">Most Popular Episode</div>
+            <div style="font-size: 1.2rem; font-weight: 700; color: {week_colors[week_name]};">Day {most_played['day']}: {most_played['title']}</div>
+            <div style="font-size: 0.9rem; color: {week_colors[week_name]};">{most_played['plays']:,} plays</div>
         </div>
-        """.format(badges_data['Total Claimed'], 
-                  badges_data['Total Claimed'] / (3 * badges_data['Target']) * 100), 
-                  unsafe_allow_html=True)
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Listen-through retention, when the play log has listen durations
+    if week.retention:
+        st.plotly_chart(charts.retention_chart(week_name, week_episodes, week.retention), use_container_width=True)
+
+
+def render_dashboard():
+    """Main KPI dashboard tab."""
+    profiler.section("Summary")
+    
+    # Dashboard Header - Improved with container and date badge
+    st.markdown("""
+    <div style="background-color: #f9fafb; padding: 20px; border-radius: 12px; margin-bottom: 20px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
+        <p class="main-header">Self-Care School Dashboard</p>
+        <div style="display: flex; align-items: center; margin-bottom: 10px;"><div style="background-color: #e0e7ff; padding: 6px 12px; border-radius: 16px; font-size: 0.9rem; color: #4338ca; font-weight: 500;">Latest data as of April 25, 2025</div></div>
+        <hr style="margin: 0; border: none; border-top: 1px solid #e5e7eb;">
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Top metrics - Enhanced card design
+    st.markdown(components.card_grid_html('summary', [
+        {"label": "Registrants", "value": f"{program_metrics['Registrants']['value']:,}", "subtext": f"Target: {program_metrics['Registrants']['target']:,}", "bg": "linear-gradient(135deg, #e0e7ff 0%, #c7d2fe 100%)", "text": "#4338ca", "trend": trend('program_metrics.Registrants', '#4338ca')},
+        {"label": "Visitors", "value": f"{traffic_data['Visitors']:,}", "subtext": f"{web_sessions['new_share']}% are new visitors", "bg": "linear-gradient(135deg, #fef3c7 0%, #fde68a 100%)", "text": "#92400e", "trend": trend('traffic_data.Visitors', '#92400e')},
+        {"label": "Total Badges Claimed", "value": f"{badges_data['Total Claimed']:,}", "subtext": f"{kpis.percent_text(kpi_results['card']['Badge Claims'], '.1f')} of weekly target", "bg": "linear-gradient(135deg, #ffedd5 0%, #fed7aa 100%)", "text": "#9a3412", "trend": trend('badges_data.Total Claimed', '#9a3412')}
+    ]), unsafe_allow_html=True)
+    
+    profiler.section("KPI Progress")
     
     # KPI Progress & Analysis - Enhanced with better progress bars and layout
     st.markdown('<p class="sub-header">KPI Progress & Analysis</p>', unsafe_allow_html=True)
@@ -315,55 +467,28 @@ with tab1:
     # Add container
     st.markdown('<div class="chart-container" style="padding: 20px;">', unsafe_allow_html=True)
     
-    # Calculate average weekly badges
-    avg_weekly_badges = (badges_data['Week 0'] + badges_data['Week 1'] + badges_data['Week 2']) / 3
-    
-    # Updated KPI Progress Data with new Average Weekly Badges metric
-    kpi_progress = {
-        'Enrollment': {'current': 11985, 'target': 10000, 'percentage': 120, 'status': 'Achieved', 'color': '#10b981'},
-        '18-25 Enrollment': {'current': 101, 'target': 5000, 'percentage': 2, 'status': 'At Risk', 'color': '#ef4444'},
-        'Average Weekly Badges': {'current': avg_weekly_badges, 'target': 5000, 'percentage': int(avg_weekly_badges/5000*100), 'status': 'Behind', 'color': '#f59e0b'},
-        'Site Traffic': {'current': 29500, 'target': 250000, 'percentage': 12, 'status': 'Behind', 'color': '#f59e0b'},
-        'Downloads': {'current': 22186, 'target': 100000, 'percentage': 22, 'status': 'Behind', 'color': '#f59e0b'},
-        'Stories Submitted': {'current': 234, 'target': 100, 'percentage': 234, 'status': 'Achieved', 'color': '#10b981'}
-    }
+    # KPI progress is computed from the source data by the KPI registry
+    kpi_progress = kpi_results['progress']
     
     # Create progress bars with enhanced styling
-    for key, item in kpi_progress.items():
-        col1, col2, col3 = st.columns([1, 2, 1])
-        with col1:
-            st.markdown(f'<div style="font-weight: 600; padding: 8px 0;">{key}</div>', unsafe_allow_html=True)
-        with col2:
-            progress = min(item['percentage'], 100)
-            
-            # Custom progress bar styling based on status
-            progress_color = item['color']
-            st.markdown(f"""
-            <div style="background-color: #f3f4f6; border-radius: 8px; height: 12px; margin-top: 12px;">
-                <div style="background-color: {progress_color}; width: {progress}%; height: 12px; border-radius: 8px;"></div>
-            </div>
-            """, unsafe_allow_html=True)
-        with col3:
-            status_class = f"status-{item['status'].lower().replace(' ', '-')}"
-            progress_text = f"{int(item['current']):,} / {item['target']:,}"
-            st.markdown(f'<div style="padding: 8px 0; text-align: right;">{progress_text} <span class="{status_class}">{item["status"]}</span></div>', unsafe_allow_html=True)
+    st.markdown(components.kpi_progress_html(kpi_progress, {
+        name: trend(f'kpi.{name}', item['color']) for name, item in kpi_progress.items()
+    }), unsafe_allow_html=True)
     
     # Close container
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Key Insights - Enhanced styling
-    st.markdown("""
-    <div class="insight-container">
-        <h3 style="margin-top: 0; color: #4338ca; font-size: 1.2rem; margin-bottom: 12px;">Key Insights:</h3>
-        <ul style="list-style-type: none; padding-left: 0;">
-            <li style="margin-bottom: 10px; display: flex; align-items: center;"><span style="background-color: #d1fae5; width: 12px; height: 12px; display: inline-block; margin-right: 8px; border-radius: 50%;"></span> <strong style="color: #059669;">Enrollment target exceeded (120% of goal)</strong> - <span class="status-achieved">Achieved</span></li>
-            <li style="margin-bottom: 10px; display: flex; align-items: center;"><span style="background-color: #fee2e2; width: 12px; height: 12px; display: inline-block; margin-right: 8px; border-radius: 50%;"></span> <strong style="color: #dc2626;">18-25 demographic severely underrepresented (2% of target)</strong> - <span class="status-at-risk">At Risk</span></li>
-            <li style="margin-bottom: 10px; display: flex; align-items: center;"><span style="background-color: #fef3c7; width: 12px; height: 12px; display: inline-block; margin-right: 8px; border-radius: 50%;"></span> <strong style="color: #d97706;">Average weekly badge claims at 49% of target</strong> - <span class="status-behind">Behind</span></li>
-            <li style="margin-bottom: 10px; display: flex; align-items: center;"><span style="background-color: #fef3c7; width: 12px; height: 12px; display: inline-block; margin-right: 8px; border-radius: 50%;"></span> <strong style="color: #2563eb;">Site traffic increased but still at 12% of target (29.5K vs 250K)</strong> - <span class="status-behind">Behind</span></li>
-            <li style="margin-bottom: 10px; display: flex; align-items: center;"><span style="background-color: #d1fae5; width: 12px; height: 12px; display: inline-block; margin-right: 8px; border-radius: 50%;"></span> <strong style="color: #059669;">Stories submission exceeding target by 134%</strong> - <span class="status-achieved">Achieved</span></li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(components.insights_html("Key Insights:", [
+        (f"Enrollment target exceeded ({kpis.percent_text(kpi_progress['Enrollment'])} of goal)", kpi_progress['Enrollment']['status']),
+        (f"18-25 demographic severely underrepresented ({kpis.percent_text(kpi_progress['18-25 Enrollment'])} of target)", kpi_progress['18-25 Enrollment']['status']),
+        (f"Average weekly badge claims at {kpis.percent_text(kpi_progress['Average Weekly Badges'])} of target", kpi_progress['Average Weekly Badges']['status']),
+        (f"Site traffic increased but still at {kpis.percent_text(kpi_progress['Site Traffic'])} of target ({kpi_progress['Site Traffic']['current'] / 1000:.1f}K vs {kpi_progress['Site Traffic']['target'] / 1000:.0f}K)", kpi_progress['Site Traffic']['status']),
+        (f"Stories submission exceeding target by {kpi_progress['Stories Submitted']['percentage'] - 100}%" if kpi_progress['Stories Submitted']['percent'] is not None
+         else "Stories submission target not set", kpi_progress['Stories Submitted']['status'])
+    ]), unsafe_allow_html=True)
+    
+    profiler.section("Age Demographics")
     
     # Demographics and Funnel section - Now stacked instead of side by side
     st.markdown('<p class="sub-header">Demographics & Program Funnel</p>', unsafe_allow_html=True)
@@ -374,28 +499,7 @@ with tab1:
     # Add chart container
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     
-    age_df = pd.DataFrame({
-        'Age Group': list(age_data.keys()),
-        'Value': [item['value'] for item in age_data.values()],
-        'Color': [item['color'] for item in age_data.values()]
-    })
-    
-    fig = px.pie(
-        age_df, 
-        values='Value', 
-        names='Age Group',
-        color='Age Group',
-        color_discrete_map={'18-25': '#0088FE', 'Other Ages': '#00C49F'},
-        title="Age Demographics (Registrants)"
-    )
-    fig.update_traces(textinfo='percent+label')
-    fig.update_layout(
-        height=400,
-        title_font_size=16,
-        title_x=0.5,
-        margin=dict(t=60, b=20, l=20, r=20)
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(charts.age_pie_chart(age_data), use_container_width=True)
     
     st.markdown(f"""
     <div style="text-align: center; margin-bottom: 10px;">
@@ -409,157 +513,103 @@ with tab1:
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Program Funnel - Enhanced with container
+    profiler.section("Program Funnel")
     st.markdown('<p class="sub-header">Program Funnel</p>', unsafe_allow_html=True)
     
     # Add chart container
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     
     funnel_data = [
-        {'stage': 'Impressions (Ads)', 'value': social_data['Impressions Delivered'], 'percent': 100},
-        {'stage': 'Visitors', 'value': traffic_data['Visitors'], 'percent': traffic_data['Visitors']/social_data['Impressions Delivered']*100},
-        {'stage': 'Registrants', 'value': program_metrics['Registrants']['value'], 'percent': program_metrics['Registrants']['value']/traffic_data['Visitors']*100},
-        {'stage': 'Downloads', 'value': stream_data['Downloads'], 'percent': stream_data['Downloads']/program_metrics['Registrants']['value']*100},
-        {'stage': 'Week 0 Complete', 'value': program_metrics['Completed Week 0']['value'], 'percent': program_metrics['Completed Week 0']['value']/program_metrics['Registrants']['value']*100}
+        {'stage': stage, 'value': result['current'], 'percent': result['percent'] or 100}
+        for stage, result in kpi_results['funnel'].items()
     ]
     
-    funnel_df = pd.DataFrame(funnel_data)
-    
     colors = ['#9333ea', '#3b82f6', '#4f46e5', '#10b981', '#f59e0b']
     
-    fig = go.Figure(go.Funnel(
-        y=funnel_df['stage'],
-        x=funnel_df['value'],
-        textposition="inside",
-        textinfo="value+percent initial",
-        marker={"color": colors}
-    ))
-    
-    fig.update_layout(
-        title="Program Conversion Flow",
-        title_font_size=16,
-        title_x=0.5,
-        margin=dict(l=20, r=20, t=60, b=20),
-        height=450
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(charts.funnel_chart(funnel_data, colors), use_container_width=True)
     
     # Funnel metrics - Enhanced with better cards
-    cols = st.columns(5)
-    funnel_metrics = [
-        {"label": "Impressions", "value": social_data['Impressions Delivered'], "color": "#9333ea", "bg": "#f3e8ff"},
-        {"label": "Visitors", "value": traffic_data['Visitors'], "color": "#3b82f6", "bg": "#dbeafe"},
-        {"label": "Registrants", "value": program_metrics['Registrants']['value'], "color": "#4f46e5", "bg": "#e0e7ff"},
-        {"label": "Downloads", "value": stream_data['Downloads'], "color": "#10b981", "bg": "#dcfce7"},
-        {"label": "Week 0 Complete", "value": program_metrics['Completed Week 0']['value'], "color": "#f59e0b", "bg": "#fef3c7"}
-    ]
-    
-    for i, col in enumerate(cols):
-        with col:
-            metric = funnel_metrics[i]
-            st.markdown(f"""
-            <div class="metric-card" style="background-color: {metric['bg']}; border-left: 4px solid {metric['color']};">
-                <div class="metric-value" style="color: {metric['color']};">{metric['value']:,}</div>
-                <div class="metric-label" style="color: {metric['color']};">{metric['label']}</div>
-            </div>
-            """, unsafe_allow_html=True)
+    st.markdown(components.card_grid_html('funnel', [
+        {"label": "Impressions", "value": f"{social_data['Impressions Delivered']:,}", "color": "#9333ea", "bg": "#f3e8ff", "trend": trend('social_data.Impressions Delivered', '#9333ea')},
+        {"label": "Visitors", "value": f"{traffic_data['Visitors']:,}", "color": "#3b82f6", "bg": "#dbeafe", "trend": trend('traffic_data.Visitors', '#3b82f6')},
+        {"label": "Registrants", "value": f"{program_metrics['Registrants']['value']:,}", "color": "#4f46e5", "bg": "#e0e7ff", "trend": trend('program_metrics.Registrants', '#4f46e5')},
+        {"label": "Downloads", "value": f"{stream_data['Downloads']:,}", "color": "#10b981", "bg": "#dcfce7", "trend": trend('stream_data.Downloads', '#10b981')},
+        {"label": "Week 0 Complete", "value": f"{program_metrics['Completed Week 0']['value']:,}", "color": "#f59e0b", "bg": "#fef3c7", "trend": trend('program_metrics.Completed Week 0', '#f59e0b')}
+    ]), unsafe_allow_html=True)
+    
+    # Registrant funnel drill-down - with a registrant export in the data
+    # source, every filter and breakdown is a sum over the precomputed
+    # channel x age band x cohort week cube (see registrants.py)
+    funnel_cube = data.get('registrant_funnel')
+    # Only dimensions the export actually varies, keyed by their display name
+    dimensions = {
+        registrants.FUNNEL_DIMENSIONS[dim]: dim
+        for dim, labels in (funnel_cube.labels.items() if funnel_cube is not None else ())
+        if len(labels) > 1
+    }
+    if dimensions:
+        st.markdown('<h3 style="font-size: 1.2rem; color: #4338ca; margin: 20px 0 16px 0; font-weight: 600;">Registrant Funnel Drill-Down</h3>', unsafe_allow_html=True)
+        filter_cols = st.columns(len(dimensions) + 1)
+        filters = {}
+        for col, (name, dim) in zip(filter_cols, dimensions.items()):
+            with col:
+                choice = st.selectbox(name, ['All', *funnel_cube.labels[dim]], key=f'funnel_{dim}')
+                filters[dim] = None if choice == 'All' else choice
+        with filter_cols[-1]:
+            by = st.selectbox("Break down by", list(dimensions), key='funnel_by')
+        
+        breakdown = funnel_cube.rollup(by=dimensions[by], **filters)
+        selected = ', '.join(label for label in filters.values() if label) or 'All Registrants'
+        st.plotly_chart(charts.funnel_chart(
+            [{'stage': stage, 'value': int(breakdown[stage].sum())} for stage in registrants.FUNNEL_STAGES],
+            colors[2:], title=f"Registrant Funnel: {selected}"
+        ), use_container_width=True)
+        st.plotly_chart(charts.funnel_breakdown_chart(breakdown, by), use_container_width=True)
     
     # Close chart container
     st.markdown('</div>', unsafe_allow_html=True)
     
     # New Section for Badges - Enhanced with container and better styling
+    profiler.section("Badge Progress")
     st.markdown('<p class="sub-header">Badge Progress</p>', unsafe_allow_html=True)
     
     # Add container
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     
     # Badge progress bar
-    badge_weeks = ['Week 0', 'Week 1', 'Week 2']
-    badge_values = [badges_data['Week 0'], badges_data['Week 1'], badges_data['Week 2']]
-    badge_colors = ['#4f46e5', '#3b82f6', '#60a5fa']
-    
-    badge_fig = go.Figure()
-    
-    # Add bars
-    for i, (week, value) in enumerate(zip(badge_weeks, badge_values)):
-        badge_fig.add_trace(go.Bar(
-            x=[week], 
-            y=[value],
-            name=week,
-            marker_color=badge_colors[i],
-            text=[f"{value:,}"],
-            textposition='auto',
-        ))
-    
-    # Add target line
-    badge_fig.add_shape(
-        type="line",
-        x0=-0.5,
-        y0=5000,
-        x1=2.5,
-        y1=5000,
-        line=dict(
-            color="#ef4444",
-            width=2,
-            dash="dash",
-        )
-    )
-    
-    badge_fig.add_annotation(
-        x=1,
-        y=5300,
-        text="Weekly Target: 5,000",
-        showarrow=False,
-        font=dict(
-            color="#ef4444",
-            size=12
-        )
-    )
-    
-    badge_fig.update_layout(
-        title="Badge Claims by Week",
-        title_font_size=16,
-        title_x=0.5,
-        showlegend=False,
-        height=400,
-        margin=dict(l=20, r=20, t=60, b=20),
-        xaxis=dict(
-            title="",
-            tickfont=dict(size=14),
-        ),
-        yaxis=dict(
-            title="Number of Badges",
-            titlefont=dict(size=14),
-        ),
-    )
-    
-    st.plotly_chart(badge_fig, use_container_width=True)
+    st.plotly_chart(charts.badge_chart(badges_data), use_container_width=True)
     
     # Badge metrics with enhanced cards
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%); border-left: 4px solid #3b82f6;">
-            <div class="metric-label">Total Badges Claimed</div>
-            <div class="metric-value" style="color: #1e40af;">{badges_data['Total Claimed']:,}</div>
-            <div style="font-weight: 500; color: #1e40af;">{badges_data['Total Claimed']/(3*badges_data['Target'])*100:.1f}% of three-week target</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #dcfce7 0%, #bbf7d0 100%); border-left: 4px solid #10b981;">
-            <div class="metric-label">Unique Users with Badges</div>
-            <div class="metric-value" style="color: #047857;">{badges_data['Unique Users']:,}</div>
-            <div style="font-weight: 500; color: #047857;">{badges_data['Unique Users']/program_metrics['Registrants']['value']*100:.1f}% of registrants</div>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(components.card_grid_html('badge', [
+        {"label": "Total Badges Claimed", "value": f"{badges_data['Total Claimed']:,}", "subtext": f"{kpis.percent_text(kpi_results['card']['Badge Claims'], '.1f')} of {len(data_sources.week_names(badges_data))}-week target", "bg": "linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%)", "border": "#3b82f6", "text": "#1e40af", "trend": trend('badges_data.Total Claimed', '#1e40af')},
+        {"label": "Unique Users with Badges", "value": f"{badges_data['Unique Users']:,}", "subtext": f"{kpis.percent_text(kpi_results['card']['Badge Reach'], '.1f')} of registrants", "bg": "linear-gradient(135deg, #dcfce7 0%, #bbf7d0 100%)", "border": "#10b981", "text": "#047857", "trend": trend('badges_data.Unique Users', '#047857')}
+    ]), unsafe_allow_html=True)
+    
+    # Retention - with a claim log in the data source, from the per-week
+    # user sets (see badges.py)
+    badge_retention = data.get('badge_retention')
+    if badge_retention:
+        st.plotly_chart(charts.badge_retention_chart(badge_retention), use_container_width=True)
+        continuation_cards = [
+            {
+                "label": f"{week} → Week {int(week.split()[-1]) + 1}",
+                "value": f"{fields['continued'] / fields['users'] * 100:.1f}%",
+                "subtext": f"{fields['continued']:,} of {fields['users']:,} claimers came back",
+                "bg": "#f9fafb",
+                "border": "#6366f1",
+                "text": "#4338ca"
+            }
+            for week, fields in badge_retention['continuation'].items() if fields['users']
+        ]
+        # At most four week-to-week cards per row
+        for start in range(0, len(continuation_cards), 4):
+            st.markdown(components.card_grid_html('badge', continuation_cards[start:start + 4]), unsafe_allow_html=True)
     
     # Close container
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Story Submissions - Enhanced with container and better styling
+    profiler.section("Story Submissions")
     st.markdown('<p class="sub-header">Story Submissions</p>', unsafe_allow_html=True)
     
     # Add container
@@ -576,16 +626,42 @@ with tab1:
             <div style="font-weight: 500; color: #92400e; margin-top: 8px;">
                 <span style="display: inline-block; background-color: #fde68a; border: 2px solid #f59e0b; border-radius: 9999px; padding: 6px 16px;">
                     Target: {stories_data['Target']} 
-                    <span style="color: #059669; font-weight: 600; margin-left: 8px;">({stories_data['Submitted']/stories_data['Target']*100:.0f}% achieved)</span>
+                    <span style="color: #059669; font-weight: 600; margin-left: 8px;">({kpis.percent_text(kpi_progress['Stories Submitted'])} achieved)</span>
                 </span>
             </div>
         </div>
         """, unsafe_allow_html=True)
     
+    # Counts and search - with a story table in the data source, from the
+    # story store and its word index (see stories.py)
+    story_store = data.get('story_store')
+    if story_store is not None and len(story_store):
+        st.plotly_chart(charts.story_counts_chart(story_store.counts_by_week()), use_container_width=True)
+        
+        st.markdown('<h3 style="font-size: 1.2rem; color: #4338ca; margin: 20px 0 16px 0; font-weight: 600;">Search Stories</h3>', unsafe_allow_html=True)
+        query_col, week_col, band_col = st.columns([3, 1, 1])
+        with query_col:
+            query = st.text_input("Words in the title or text", key='story_query')
+        with week_col:
+            week = st.selectbox("Week", ['All', *(f'Week {week}' for week in story_store.weeks())], key='story_week')
+        with band_col:
+            bands = [band for band, count in zip(registrants.AGE_BANDS, story_store.counts.sum(axis=0)) if count]
+            age_band = st.selectbox("Age band", ['All', *bands], key='story_age_band')
+        
+        matches, results = story_store.search(
+            query,
+            week=None if week == 'All' else int(week.split()[-1]),
+            age_band=None if age_band == 'All' else age_band
+        )
+        shown = f" (newest {len(results)} shown)" if matches > len(results) else ''
+        st.markdown(f'<div style="color: #6b7280; margin-bottom: 12px;">{matches:,} matching stories{shown}</div>', unsafe_allow_html=True)
+        st.markdown(components.story_list_html(stories.result_rows(results)), unsafe_allow_html=True)
+    
     # Close container
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Social Media section - Enhanced with better styling and containers
+    profiler.section("Marketing Performance")
     st.markdown('<p class="sub-header">Marketing Performance</p>', unsafe_allow_html=True)
     
     # Add container
@@ -593,26 +669,13 @@ with tab1:
     
     # Social Media Metrics - UPDATED with better styling
     st.markdown('<h3 style="font-size: 1.2rem; color: #4338ca; margin-bottom: 16px; font-weight: 600;">Social Media Marketing</h3>', unsafe_allow_html=True)
-    cols = st.columns(4)
-    
-    social_metrics = [
-        {"label": "Clicks to Site", "value": social_data['Clicks to Site'], "bg": "linear-gradient(135deg, #dbeafe 0%, #93c5fd 100%)", "text": "#1e40af", "icon": "🔗"},
-        {"label": "Impressions", "value": social_data['Impressions Delivered'], "bg": "linear-gradient(135deg, #dcfce7 0%, #86efac 100%)", "text": "#166534", "icon": "👁️"},
-        {"label": "Video Views", "value": social_data['Video Views'], "bg": "linear-gradient(135deg, #f3e8ff 0%, #d8b4fe 100%)", "text": "#6b21a8", "icon": "📺"},
-        {"label": "Engagements", "value": social_data['Direct Engagements'], "bg": "linear-gradient(135deg, #fef9c3 0%, #fde047 100%)", "text": "#854d0e", "icon": "👍"}
-    ]
-    
-    for i, col in enumerate(cols):
-        with col:
-            metric = social_metrics[i]
-            st.markdown(f"""
-            <div class="metric-card" style="background: {metric['bg']};">
-                <div style="font-size: 1.5rem; margin-bottom: 4px;">{metric['icon']}</div>
-                <div class="metric-label" style="color: {metric['text']};">{metric['label']}</div>
-                <div class="metric-value" style="color: {metric['text']};">{metric['value']:,}</div>
-                {f"<div style='color: {metric['text']}; font-weight: 500;'>{social_data['Direct Engagements']/social_data['Impressions Delivered']*100:.1f}% engagement rate</div>" if metric['label'] == 'Engagements' else ""}
-            </div>
-            """, unsafe_allow_html=True)
+    engagement_rate = kpis.percent_text(kpi_results['card']['Engagement Rate'], '.1f')
+    st.markdown(components.card_grid_html('icon', [
+        {"label": "Clicks to Site", "value": f"{social_data['Clicks to Site']:,}", "bg": "linear-gradient(135deg, #dbeafe 0%, #93c5fd 100%)", "text": "#1e40af", "icon": "🔗", "icon_size": "1.5rem", "subtext": "", "trend": trend('social_data.Clicks to Site', '#1e40af')},
+        {"label": "Impressions", "value": f"{social_data['Impressions Delivered']:,}", "bg": "linear-gradient(135deg, #dcfce7 0%, #86efac 100%)", "text": "#166534", "icon": "👁️", "icon_size": "1.5rem", "subtext": "", "trend": trend('social_data.Impressions Delivered', '#166534')},
+        {"label": "Video Views", "value": f"{social_data['Video Views']:,}", "bg": "linear-gradient(135deg, #f3e8ff 0%, #d8b4fe 100%)", "text": "#6b21a8", "icon": "📺", "icon_size": "1.5rem", "subtext": "", "trend": trend('social_data.Video Views', '#6b21a8')},
+        {"label": "Engagements", "value": f"{social_data['Direct Engagements']:,}", "bg": "linear-gradient(135deg, #fef9c3 0%, #fde047 100%)", "text": "#854d0e", "icon": "👍", "icon_size": "1.5rem", "subtext": f"<div style='color: #854d0e; font-weight: 500;'>{engagement_rate} engagement rate</div>", "trend": trend('social_data.Direct Engagements', '#854d0e')}
+    ]), unsafe_allow_html=True)
     
     # Close container
     st.markdown('</div>', unsafe_allow_html=True)
@@ -623,136 +686,89 @@ with tab1:
     # Detailed Social Engagement - Enhanced styling
     st.markdown('<h3 style="font-size: 1.2rem; color: #4338ca; margin-bottom: 16px; font-weight: 600;">Social Engagement Breakdown</h3>', unsafe_allow_html=True)
     
-    social_engagement = pd.DataFrame([
-        {"Metric": "Reactions", "Value": social_data['Reactions'], "Color": "#3b82f6"},
-        {"Metric": "Comments", "Value": social_data['Comments'], "Color": "#8b5cf6"},
-        {"Metric": "Shares", "Value": social_data['Shares'], "Color": "#10b981"},
-        {"Metric": "Saves", "Value": social_data['Saves'], "Color": "#f59e0b"},
-        {"Metric": "New Page Likes", "Value": social_data['Page Likes'], "Color": "#ef4444"}
-    ])
+    st.plotly_chart(charts.social_engagement_chart(social_data), use_container_width=True)
     
-    fig = go.Figure()
-    
-    # Add bars with custom colors
-    for i, row in social_engagement.iterrows():
-        fig.add_trace(go.Bar(
-            x=[row['Metric']],
-            y=[row['Value']],
-            name=row['Metric'],
-            marker_color=row['Color'],
-            text=[f"{row['Value']:,}"],
-            textposition='auto',
-        ))
-    
-    fig.update_layout(
-        title="Social Media Engagement by Type",
-        title_font_size=16,
-        title_x=0.5,
-        showlegend=False,
-        height=400,
-        margin=dict(l=20, r=20, t=60, b=20),
-        xaxis=dict(
-            title="",
-            tickfont=dict(size=14),
-        ),
-        yaxis=dict(
-            title="Count",
-            titlefont=dict(size=14),
-        ),
-        bargap=0.4,
-    )
+    # Add engagement metrics in small cards
+    st.markdown(components.card_grid_html('tile', [
+        {"icon": "❤️", "label": "Reactions", "value": f"{social_data['Reactions']:,}", "color": "#3b82f6"},
+        {"icon": "💬", "label": "Comments", "value": f"{social_data['Comments']:,}", "color": "#8b5cf6"},
+        {"icon": "🔄", "label": "Shares", "value": f"{social_data['Shares']:,}", "color": "#10b981"},
+        {"icon": "🔖", "label": "Saves", "value": f"{social_data['Saves']:,}", "color": "#f59e0b"},
+        {"icon": "👍", "label": "Page Likes", "value": f"{social_data['Page Likes']:,}", "color": "#ef4444"},
+    ]), unsafe_allow_html=True)
+    
+    # Per-campaign breakdown - with a per-post export in the data source,
+    # rolled up once per export version (see social.py)
+    social_campaigns = data.get('social_campaigns')
+    if social_campaigns is not None and len(social_campaigns) > 1:
+        st.plotly_chart(charts.social_campaign_chart(social_campaigns), use_container_width=True)
     
-    st.plotly_chart(fig, use_container_width=True)
+    # Close container
+    st.markdown('</div>', unsafe_allow_html=True)
     
-    # Add engagement metrics in small cards
-    cols = st.columns(5)
-    
-    engagement_metrics = [
-        {"icon": "❤️", "label": "Reactions", "value": social_data['Reactions'], "color": "#3b82f6"},
-        {"icon": "💬", "label": "Comments", "value": social_data['Comments'], "color": "#8b5cf6"},
-        {"icon": "🔄", "label": "Shares", "value": social_data['Shares'], "color": "#10b981"},
-        {"icon": "🔖", "label": "Saves", "value": social_data['Saves'], "color": "#f59e0b"},
-        {"icon": "👍", "label": "Page Likes", "value": social_data['Page Likes'], "color": "#ef4444"},
-    ]
+    # SMS campaigns - with the vendor's delivery log in the data source, the
+    # counts, time to click and hour of day come from the logs (see sms.py)
+    profiler.section("SMS Campaigns")
+    st.markdown('<p class="sub-header">SMS Campaigns</p>', unsafe_allow_html=True)
     
-    for i, col in enumerate(cols):
-        with col:
-            metric = engagement_metrics[i]
-            st.markdown(f"""
-            <div style="text-align: center; padding: 8px; background-color: #f9fafb; border-radius: 8px; border-bottom: 3px solid {metric['color']};">
-                <div style="font-size: 1.2rem; margin-bottom: 4px;">{metric['icon']}</div>
-                <div style="font-weight: 600; color: {metric['color']};">{metric['value']:,}</div>
-                <div style="font-size: 0.8rem; color: #6b7280;">{metric['label']}</div>
-            </div>
-            """, unsafe_allow_html=True)
+    # Add container
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    
+    sms_analytics = data.get('sms_analytics', {})
+    sms_cards = []
+    for i, (campaign, fields) in enumerate(sms_data.items()):
+        color = charts.SMS_CAMPAIGN_COLORS[i % len(charts.SMS_CAMPAIGN_COLORS)]
+        median = sms_analytics.get(campaign, {}).get('median_minutes')
+        sms_cards.append({
+            "label": campaign,
+            "value": f"{fields['rate']}% CTR",
+            "subtext": f"{fields['clicked']:,} clicks / {fields['delivered']:,} delivered"
+                       + (f"<br>Median time to click: {median} min" if median is not None else ""),
+            "bg": "#f9fafb",
+            "border": color,
+            "text": color
+        })
+    # At most four campaign cards per row
+    for start in range(0, len(sms_cards), 4):
+        st.markdown(components.card_grid_html('badge', sms_cards[start:start + 4]), unsafe_allow_html=True)
+    
+    st.plotly_chart(charts.sms_ctr_chart(sms_data), use_container_width=True)
+    
+    if sms_analytics:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(charts.sms_time_to_click_chart(sms_analytics), use_container_width=True)
+        with col2:
+            st.plotly_chart(charts.sms_hour_chart(sms_analytics), use_container_width=True)
     
     # Close container
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Website Analytics - Enhanced with better styling and containers
+    profiler.section("Website Analytics")
     st.markdown('<p class="sub-header">Website Analytics</p>', unsafe_allow_html=True)
     
     # Add container
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     
     # Website analytics with enhanced styling
-    cols = st.columns(4)
-    
-    web_metrics = [
-        {"label": "Pageviews", "value": traffic_data['Pageviews'], "subtext": f"{traffic_data['Pageviews']/traffic_data['Sessions']:.1f} pageviews per session", "bg": "linear-gradient(135deg, #e0e7ff 0%, #a5b4fc 100%)", "text": "#3730a3", "icon": "📄"},
-        {"label": "Sessions", "value": traffic_data['Sessions'], "subtext": "00:01:19 per session", "bg": "linear-gradient(135deg, #dbeafe 0%, #93c5fd 100%)", "text": "#1e40af", "icon": "⏱️"},
-        {"label": "Visitors", "value": traffic_data['Visitors'], "subtext": "94.5% are new visitors", "bg": "linear-gradient(135deg, #ccfbf1 0%, #5eead4 100%)", "text": "#0f766e", "icon": "👥"},
-        {"label": "Bounce Rate", "value": f"{traffic_data['Bounce Rate']}%", "subtext": f"{int(traffic_data['Visitors'] * traffic_data['Bounce Rate']/100):,} visitors bounced", "bg": "linear-gradient(135deg, #fee2e2 0%, #fca5a5 100%)", "text": "#b91c1c", "icon": "↩️"}
-    ]
-    
-    for i, col in enumerate(cols):
-        with col:
-            metric = web_metrics[i]
-            st.markdown(f"""
-            <div class="metric-card" style="background: {metric['bg']}; position: relative; overflow: hidden;">
-                <div style="position: absolute; top: 10px; right: 10px; font-size: 1.5rem; opacity: 0.3;">{metric['icon']}</div>
-                <div class="metric-label" style="color: {metric['text']}; font-weight: 500;">{metric['label']}</div>
-                <div class="metric-value" style="color: {metric['text']};">{metric['value']}</div>
-                <div style="color: {metric['text']}; font-weight: 500; font-size: 0.9rem;">{metric['subtext']}</div>
-            </div>
-            """, unsafe_allow_html=True)
+    st.markdown(components.card_grid_html('web', [
+        {"label": "Pageviews", "value": f"{traffic_data['Pageviews']:,}", "subtext": f"{traffic_data['Pageviews']/traffic_data['Sessions']:.1f} pageviews per session", "bg": "linear-gradient(135deg, #e0e7ff 0%, #a5b4fc 100%)", "text": "#3730a3", "icon": "📄", "trend": trend('traffic_data.Pageviews', '#3730a3')},
+        {"label": "Sessions", "value": f"{traffic_data['Sessions']:,}", "subtext": f"{session_length} per session", "bg": "linear-gradient(135deg, #dbeafe 0%, #93c5fd 100%)", "text": "#1e40af", "icon": "⏱️", "trend": trend('traffic_data.Sessions', '#1e40af')},
+        {"label": "Visitors", "value": f"{traffic_data['Visitors']:,}", "subtext": f"{web_sessions['new_share']}% are new visitors", "bg": "linear-gradient(135deg, #ccfbf1 0%, #5eead4 100%)", "text": "#0f766e", "icon": "👥", "trend": trend('traffic_data.Visitors', '#0f766e')},
+        {"label": "Bounce Rate", "value": f"{traffic_data['Bounce Rate']}%", "subtext": f"{int(traffic_data['Visitors'] * traffic_data['Bounce Rate']/100):,} visitors bounced", "bg": "linear-gradient(135deg, #fee2e2 0%, #fca5a5 100%)", "text": "#b91c1c", "icon": "↩️", "trend": trend('traffic_data.Bounce Rate', '#b91c1c')}
+    ]), unsafe_allow_html=True)
     
     # Add a simple chart for website metrics
-    traffic_df = pd.DataFrame({
-        'Metric': ['Pageviews', 'Sessions', 'Visitors'],
-        'Value': [traffic_data['Pageviews'], traffic_data['Sessions'], traffic_data['Visitors']],
-        'Color': ['#4338ca', '#2563eb', '#0d9488']
-    })
-    
-    fig = go.Figure()
-    
-    # Add bars with custom colors
-    for i, row in traffic_df.iterrows():
-        fig.add_trace(go.Bar(
-            x=[row['Metric']],
-            y=[row['Value']],
-            name=row['Metric'],
-            marker_color=row['Color'],
-            text=[f"{row['Value']:,}"],
-            textposition='auto',
-        ))
-    
-    fig.update_layout(
-        title="Website Traffic Metrics",
-        title_font_size=16,
-        title_x=0.5,
-        showlegend=False,
-        height=350,
-        margin=dict(l=20, r=20, t=60, b=20),
-        bargap=0.4,
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(charts.traffic_chart(traffic_data), use_container_width=True)
+    if 'daily' in web_sessions:
+        st.plotly_chart(charts.daily_traffic_chart(web_sessions['daily']), use_container_width=True)
     
     # Close container
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Self-Care School Podcast Analytics - NEW SECTION
+    profiler.section("Podcast Analytics")
     st.markdown('<p class="sub-header">Self-Care School Podcast Analytics</p>', unsafe_allow_html=True)
     
     # Add container
@@ -762,140 +778,26 @@ with tab1:
     st.markdown('<h3 style="font-size: 1.2rem; color: #4338ca; margin-bottom: 16px; font-weight: 600; text-align: center;">Podcast Performance Overview</h3>', unsafe_allow_html=True)
     
     # Top metrics row
-    cols = st.columns(3)
-    
-    podcast_summary = [
-        {"icon": "🎧", "label": "Total Plays", "value": podcast_data['Total Plays'], "bg": "linear-gradient(135deg, #e0e7ff 0%, #a5b4fc 100%)", "text": "#4338ca"},
-        {"icon": "🎙️", "label": "Total Episodes", "value": podcast_data['Total Episodes'], "bg": "linear-gradient(135deg, #dbeafe 0%, #93c5fd 100%)", "text": "#1e40af"},
-        {"icon": "📈", "label": "Average Plays Per Episode", "value": podcast_data['Average Plays'], "bg": "linear-gradient(135deg, #f3e8ff 0%, #d8b4fe 100%)", "text": "#7e22ce"}
-    ]
-    
-    for i, col in enumerate(cols):
-        with col:
-            metric = podcast_summary[i]
-            st.markdown(f"""
-            <div class="metric-card" style="background: {metric['bg']};">
-                <div style="font-size: 2rem; margin-bottom: 4px;">{metric['icon']}</div>
-                <div class="metric-label" style="color: {metric['text']};">{metric['label']}</div>
-                <div class="metric-value" style="color: {metric['text']};">{metric['value']:,}</div>
-            </div>
-            """, unsafe_allow_html=True)
+    st.markdown(components.card_grid_html('icon', [
+        {"icon": "🎧", "label": "Total Plays", "value": f"{podcast_data['Total Plays']:,}", "bg": "linear-gradient(135deg, #e0e7ff 0%, #a5b4fc 100%)", "text": "#4338ca", "icon_size": "2rem", "subtext": "", "trend": trend('podcast_data.Total Plays', '#4338ca')},
+        {"icon": "🎙️", "label": "Total Episodes", "value": f"{podcast_data['Total Episodes']:,}", "bg": "linear-gradient(135deg, #dbeafe 0%, #93c5fd 100%)", "text": "#1e40af", "icon_size": "2rem", "subtext": "", "trend": trend('podcast_data.Total Episodes', '#1e40af')},
+        {"icon": "📈", "label": "Average Plays Per Episode", "value": f"{podcast_data['Average Plays']:,}", "bg": "linear-gradient(135deg, #f3e8ff 0%, #d8b4fe 100%)", "text": "#7e22ce", "icon_size": "2rem", "subtext": "", "trend": trend('podcast_data.Average Plays', '#7e22ce')}
+    ]), unsafe_allow_html=True)
     
     # Weekly Plays Chart
     st.markdown('<h3 style="font-size: 1.2rem; color: #4338ca; margin: 20px 0 16px 0; font-weight: 600;">Episode Plays by Week</h3>', unsafe_allow_html=True)
     
-    weekly_data = pd.DataFrame({
-        'Week': list(podcast_data['Weekly Plays'].keys()),
-        'Plays': list(podcast_data['Weekly Plays'].values())
-    })
-    
-    # Set colors for weekly bars
-    week_colors = {
-        'Week 0': '#8b5cf6',
-        'Week 1': '#a78bfa',
-        'Week 2': '#10b981',
-        'Week 3': '#f59e0b'
-    }
-    
     # Create weekly plays bar chart
-    weekly_fig = go.Figure()
-    
-    for i, row in weekly_data.iterrows():
-        weekly_fig.add_trace(go.Bar(
-            x=[row['Week']],
-            y=[row['Plays']],
-            name=row['Week'],
-            marker_color=week_colors[row['Week']],
-            text=[f"{row['Plays']:,}"],
-            textposition='auto',
-            hovertemplate=f"<b>{row['Week']}</b><br>Total Plays: %{{y:,}}"
-        ))
-    
-    weekly_fig.update_layout(
-        title="Total Plays by Week",
-        title_font_size=16,
-        title_x=0.5,
-        showlegend=False,
-        height=350,
-        margin=dict(l=20, r=20, t=60, b=20),
-        bargap=0.4,
-        yaxis_title="Number of Plays"
-    )
-    
-    st.plotly_chart(weekly_fig, use_container_width=True)
+    st.plotly_chart(charts.weekly_plays_chart(podcast_data['Weekly Plays'], week_colors), use_container_width=True)
     
     # Top episodes within each week
     st.markdown('<h3 style="font-size: 1.2rem; color: #4338ca; margin: 20px 0 16px 0; font-weight: 600;">Individual Episode Performance</h3>', unsafe_allow_html=True)
     
     # Create tabs for each week
-    week_tabs = st.tabs(["Week 0", "Week 1", "Week 2", "Week 3"])
-    
-    for week_idx, week_tab in enumerate(week_tabs):
-        week_name = f"Week {week_idx}"
-        
-        with week_tab:
-            # Filter episodes for this week
-            week_episodes = [ep for ep in podcast_data['Episodes'] if ep['week'] == week_idx]
-            week_episodes.sort(key=lambda x: x['day'])
-            
-            # Create week-specific bar chart
-            ep_fig = go.Figure()
-            
-            for ep in week_episodes:
-                ep_fig.add_trace(go.Bar(
-                    y=[f"Day {ep['day']}: {ep['title']}"],
-                    x=[ep['plays']],
-                    orientation='h',
-                    marker_color=ep['color'],
-                    text=[f"{ep['plays']:,}"],
-                    textposition='auto',
-                    hovertemplate=f"<b>Day {ep['day']}: {ep['title']}</b><br>Plays: %{{x:,}}"
-                ))
-            
-            ep_fig.update_layout(
-                title=f"{week_name} Episode Performance",
-                title_font_size=16,
-                title_x=0.5,
-                showlegend=False,
-                height=350,
-                margin=dict(l=20, r=20, t=60, b=20),
-                bargap=0.2,
-                xaxis_title="Number of Plays",
-                xaxis=dict(
-                    title="Plays",
-                    titlefont=dict(size=14),
-                ),
-                yaxis=dict(
-                    title="",
-                    titlefont=dict(size=14),
-                    autorange="reversed"  # This puts the highest value at the top
-                )
-            )
-            
-            st.plotly_chart(ep_fig, use_container_width=True)
-            
-            # Add weekly insights
-            total_week_plays = sum(ep['plays'] for ep in week_episodes)
-            avg_week_plays = int(total_week_plays / len(week_episodes))
-            most_played = max(week_episodes, key=lambda x: x['plays'])
-            
-            st.markdown(f"""
-            <div style="display: flex; gap: 16px; margin-top: 10px;">
-                <div style="flex: 1; background: {week_colors[week_name]}20; padding: 12px; border-radius: 8px; text-align: center; border-left: 3px solid {week_colors[week_name]};">
-                    <div style="font-weight: 600; color: {week_colors[week_name]};">Total Plays</div>
-                    <div style="font-size: 1.5rem; font-weight: 700; color: {week_colors[week_name]};">{total_week_plays:,}</div>
-                </div>
-                <div style="flex: 1; background: {week_colors[week_name]}20; padding: 12px; border-radius: 8px; text-align: center; border-left: 3px solid {week_colors[week_name]};">
-                    <div style="font-weight: 600; color: {week_colors[week_name]};">Average Per Episode</div>
-                    <div style="font-size: 1.5rem; font-weight: 700; color: {week_colors[week_name]};">{avg_week_plays:,}</div>
-                </div>
-                <div style="flex: 2; background: {week_colors[week_name]}20; padding: 12px; border-radius: 8px; text-align: center; border-left: 3px solid {week_colors[week_name]};">
-                    <div style="font-weight: 600; color: {week_colors[week_name]};">Most Popular Episode</div>
-                    <div style="font-size: 1.2rem; font-weight: 700; color: {week_colors[week_name]};">Day {most_played['day']}: {most_played['title']}</div>
-                    <div style="font-size: 0.9rem; color: {week_colors[week_name]};">{most_played['plays']:,} plays</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+    render_tabs({
+        week.name: functools.partial(render_podcast_week, week_idx)
+        for week_idx, week in podcast_cube.weeks.items()
+    }, key='podcast_week')
     
     # Key insights for podcast data
     st.markdown("""
@@ -913,7 +815,11 @@ with tab1:
     # Close container
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab2:
+
+def render_analysis():
+    """Analysis & Recommendations tab."""
+    profiler.section("Analysis")
+    
     # Analysis & Recommendations - UPDATED with new data insights
     st.markdown('<p class="main-header">Data Analysis & Key Insights</p>', unsafe_allow_html=True)
     
@@ -935,12 +841,21 @@ with tab2:
     # Conversion Funnel Analysis - UPDATED
     st.markdown('<p class="sub-header">Conversion Funnel Analysis</p>', unsafe_allow_html=True)
     
+    funnel_notes = {
+        "Impressions (Ads)": "Strong top-of-funnel reach with ads",
+        "Visitors": "Below average click-through rate from ads to site",
+        "Registrants": "Excellent visitor-to-registrant conversion",
+        "Downloads": "Many users downloading multiple resources",
+        "Week 0 Complete": "Improving completion rate, still needs attention"
+    }
     funnel_analysis = pd.DataFrame([
-        {"Funnel Stage": "Impressions (Ads)", "Count": 338000, "Conversion Rate": "-", "Analysis": "Strong top-of-funnel reach with ads"},
-        {"Funnel Stage": "Visitors", "Count": 29500, "Conversion Rate": "8.7% of impressions", "Analysis": "Below average click-through rate from ads to site"},
-        {"Funnel Stage": "Registrants", "Count": 11985, "Conversion Rate": "40.6% of visitors", "Analysis": "Excellent visitor-to-registrant conversion"},
-        {"Funnel Stage": "Downloads", "Count": 22186, "Conversion Rate": "185.1% of registrants", "Analysis": "Many users downloading multiple resources"},
-        {"Funnel Stage": "Week 0 Complete", "Count": 3089, "Conversion Rate": "25.8% of registrants", "Analysis": "Improving completion rate, still needs attention"}
+        {
+            "Funnel Stage": stage,
+            "Count": result['current'],
+            "Conversion Rate": f"{kpis.percent_text(result, '.1f')} of {result['label']}" if result['label'] else "-",
+            "Analysis": funnel_notes[stage]
+        }
+        for stage, result in kpi_results['funnel'].items()
     ])
     
     st.dataframe(funnel_analysis, use_container_width=True, hide_index=True)
@@ -1046,17 +961,74 @@ with tab2:
     
     st.dataframe(timeline_data, use_container_width=True, hide_index=True)
     
-    # KPI Forecast - UPDATED with podcast insights
+    # KPI Forecast - bands from Monte Carlo paths of the weekly series (see forecast.py)
     st.markdown('<p class="sub-header">KPI Forecast with Recommended Actions</p>', unsafe_allow_html=True)
-    st.markdown("""
+    
+    # Two forecast charts per row
+    results = list(forecasts.values())
+    for start in range(0, len(results), 2):
+        for col, result in zip(st.columns(2), results[start:start + 2]):
+            with col:
+                st.plotly_chart(charts.forecast_chart(result), use_container_width=True)
+    
+    def band(low, high):
+        return f"{low:,.0f}-{high:,.0f}"
+    
+    # 18-25 enrollment has no weekly series to forecast, only its progress so far
+    youth_progress = kpi_results['progress']['18-25 Enrollment']
+    forecast_items = [
+        f"<span style=\"font-weight: bold;\">18-25 Enrollment:</span> At {kpis.percent_text(youth_progress)} of the target ({youth_progress['current']:,} of {youth_progress['target']:,}), "
+        "emergency measures are needed to close any meaningful part of the gap."
+    ]
+    # A series with no weeks yet (e.g. a new cohort) has no forecast
+    badge_forecast = forecasts.get('Badge Claims')
+    if badge_forecast:
+        final_week = badge_forecast.future_weeks[-1]
+        forecast_items.append(
+            f"<span style=\"font-weight: bold;\">Badge Claims:</span> {final_week} claims are forecast at {band(badge_forecast.low[-1], badge_forecast.high[-1])} "
+            f"(median {badge_forecast.median[-1]:,.0f}) vs. the {badge_forecast.target:,} weekly target, a {badge_forecast.chance:.0%} chance of reaching it. "
+            "Badge system enhancement is needed to close the gap."
+        )
+        registrants_count = program_metrics['Registrants']['value']
+        if registrants_count:
+            forecast_items.append(
+                f"<span style=\"font-weight: bold;\">{final_week} Completion:</span> Expect {badge_forecast.low[-1] / registrants_count:.0%}-{badge_forecast.high[-1] / registrants_count:.0%} completion "
+                f"({band(badge_forecast.low[-1], badge_forecast.high[-1])} participants); enhanced re-engagement is the main lever to move it up."
+            )
+    podcast_forecast = forecasts.get('Podcast Plays')
+    if podcast_forecast:
+        forecast_items.append(
+            f"<span style=\"font-weight: bold;\">Podcast Engagement:</span> {band(*podcast_forecast.total[::2])} total plays by {podcast_forecast.future_weeks[-1]}, "
+            f"with {band(podcast_forecast.low[-1], podcast_forecast.high[-1])} plays that week. Content optimization could reduce the drop-off after Week 2."
+        )
+    story_forecast = forecasts.get('Story Submissions')
+    if story_forecast:
+        forecast_items.append(
+            f"<span style=\"font-weight: bold;\">Story Submissions:</span> Expect {band(*story_forecast.total[::2])} stories by {story_forecast.future_weeks[-1]} "
+            f"vs. a target of {story_forecast.target:,} ({story_forecast.chance:.0%} chance of reaching it)."
+        )
+    items_html = ''.join(f"<li>{item}</li>" for item in forecast_items)
+    st.markdown(f"""
     <div class="insight-container">
-        <ul>
-            <li><span style="font-weight: bold;">18-25 Enrollment:</span> Even with emergency measures, realistically expect to reach only 15-20% of the target by program end (vs. 50% target).</li>
-            <li><span style="font-weight: bold;">Week 0 Completion:</span> With enhanced re-engagement, target 45-50% completion (5,300-6,000 participants).</li>
-            <li><span style="font-weight: bold;">Badge Claims:</span> Badge system enhancement could bring weekly claims to 4,000-4,500 (vs. 5,000 target).</li>
-            <li><span style="font-weight: bold;">Social Engagement:</span> Comment response initiative should increase engagement metrics by 30-40%.</li>
-            <li><span style="font-weight: bold;">Podcast Engagement:</span> Content optimization could reduce Week 3 drop-off by 20-30%, bringing plays closer to Week 2 levels.</li>
-            <li><span style="font-weight: bold;">Story Submissions:</span> Continue to exceed targets; expect 300+ by program end.</li>
-        </ul>
+        <ul>{items_html}</ul>
+        <div style="color: #6b7280; font-size: 0.85rem;">Ranges are 80% bands from {forecast.PATHS:,} simulated paths per series, projecting each week-over-week trend to Week {forecast.PROGRAM_WEEKS - 1}.</div>
     </div>
     """, unsafe_allow_html=True)
+
+
+# Create tabs
+render_tabs({
+    "📊 Dashboard": render_dashboard,
+    "📈 Analysis & Recommendations": render_analysis
+}, key='main_tab')
+profiler.finish()
+
+if DEBUG:
+    st.session_state['debug_reruns'] = st.session_state.get('debug_reruns', 0) + 1
+    st.markdown(components.debug_overlay_html(
+        st.session_state['debug_reruns'], profiler.sections, profiling.cache_counts(), profiling.prometheus_text()
+    ), unsafe_allow_html=True)
+
+if EXPORT_DIR:
+    for path in st.write_to(EXPORT_DIR):
+        print(f"Wrote {path}")
@@ -0,0 +1,177 @@
+"""Badge claim analytics over the raw claim log.
+
+- ``badge_claims``: ``user_id``, ``week``, ``claimed_at``
+
+``BadgeStats`` keeps, for every program week, the number of claims and the
+exact set of users who claimed that week (a ``UserBitmap``). User ids can be
+hashes, so the bitmaps hold one bit per dense user code (``IdCodes``, shared
+by all weeks and saved with the state) rather than per raw id. Everything the dashboard shows is then set algebra on those bitmaps
+rather than joins over the log:
+
+- unique users: the union of every week
+- continuation: users of week N who claimed again in week N+1, the
+  intersection of the two weeks
+- the cohort retention matrix: of the users whose first claim was in week C
+  (week C minus the union of the weeks before it), how many claimed in each
+  later week W
+
+Like the feeds in incremental.py, only claims newer than the watermark are
+read, chunk by chunk (see ``DataSource.iter_events``), and the state is saved
+next to the data source. A week costs 125 KB per million distinct users in
+memory, however large the ids; the saved state is compressed, so weeks few
+users claimed in take little space on disk.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from incremental import IdCodes, UserBitmap
+
+LOG = 'badge_claims'
+COLUMNS = ['user_id', 'week', 'claimed_at']
+
+STATE_FILE = 'badges.npz'
+
+
+class BadgeStats:
+    """Claims and the set of claiming users for each week, plus a time watermark."""
+
+    def __init__(self):
+        self.claims = {}
+        self.codes = IdCodes()
+        # Claiming user codes per week
+        self.users = {}
+        self.watermark = None
+
+    def update(self, events):
+        """Apply the claims newer than the watermark; returns how many were applied."""
+        times = pd.to_datetime(events['claimed_at'])
+        if self.watermark is not None:
+            newer = (times > self.watermark).to_numpy()
+            events, times = events[newer], times[newer]
+        if not len(events):
+            return 0
+
+        # One pass over the chunk sorted by week, then a slice per week
+        weeks = events['week'].to_numpy(dtype=np.int64)
+        order = np.argsort(weeks, kind='stable')
+        weeks, users = weeks[order], self.codes.encode(events['user_id'].to_numpy(dtype=np.int64))[order]
+        present, starts = np.unique(weeks, return_index=True)
+        for week, start, stop in zip(present.tolist(), starts, [*starts[1:], len(weeks)]):
+            self.claims[week] = self.claims.get(week, 0) + int(stop - start)
+            self.users.setdefault(week, UserBitmap()).add(users[start:stop])
+        self.watermark = times.max()
+        return len(events)
+
+    def weeks(self):
+        return sorted(self.users)
+
+    def total(self):
+        return sum(self.claims.values())
+
+    def unique_users(self):
+        """Users with a claim in any week."""
+        union = UserBitmap()
+        for week in self.weeks():
+            union = union | self.users[week]
+        return union
+
+    def continuation(self):
+        """``{week: (users, continued)}``: claimers of each week and how many also claimed the next week."""
+        weeks = self.weeks()
+        return {
+            week: (len(self.users[week]), len(self.users[week] & self.users[week + 1]))
+            for week in weeks if week + 1 in self.users
+        }
+
+    def retention_matrix(self):
+        """Cohort x week claim counts.
+
+        Row C counts the users whose first claim was in the C-th week of
+        ``weeks()``: the cohort size on the diagonal, and how many of them
+        claimed in each later week to its right. Earlier weeks are zero.
+        """
+        weeks = self.weeks()
+        matrix = np.zeros((len(weeks), len(weeks)), dtype=np.int64)
+        seen = UserBitmap()
+        for row, week in enumerate(weeks):
+            cohort = self.users[week] - seen
+            for column, later in enumerate(weeks[row:], start=row):
+                matrix[row, column] = len(cohort & self.users[later])
+            seen = seen | self.users[week]
+        return matrix
+
+    def save(self, path):
+        """Write the state to ``path`` (.npz, compressed), replacing any previous state atomically."""
+        meta = {
+            'claims': [[week, count] for week, count in self.claims.items()],
+            'watermark': self.watermark.isoformat() if self.watermark is not None else None
+        }
+        tmp = path + '.tmp.npz'
+        np.savez_compressed(tmp, meta=np.array(json.dumps(meta)), user_ids=self.codes.ids, user_codes=self.codes.codes,
+                            **{f'week.{week}': users.bits for week, users in self.users.items()})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore the state saved at ``path``, or start empty if there is none."""
+        stats = cls()
+        if not os.path.exists(path):
+            return stats
+        with np.load(path, allow_pickle=False) as state:
+            if 'user_ids' not in state.files:
+                # Saved before user ids were coded: rebuild from the log
+                return stats
+            meta = json.loads(str(state['meta']))
+            stats.codes = IdCodes(state['user_ids'], state['user_codes'])
+            stats.users = {
+                int(name.split('.')[1]): UserBitmap(state[name]) for name in state.files if name.startswith('week.')
+            }
+        stats.claims = {week: count for week, count in meta['claims']}
+        if meta['watermark'] is not None:
+            stats.watermark = pd.Timestamp(meta['watermark'])
+        return stats
+
+
+def update_badges(source):
+    """Apply new claims of ``source`` to its saved badge state.
+
+    Returns the up-to-date ``BadgeStats``, or None if the source has no
+    claim log.
+    """
+    state_path = os.path.join(source.state_dir(), STATE_FILE)
+    stats = BadgeStats.load(state_path)
+    chunks = source.iter_events(LOG, COLUMNS, 'claimed_at', stats.watermark)
+    if chunks is None:
+        return None
+
+    if sum(stats.update(chunk) for chunk in chunks):
+        os.makedirs(source.state_dir(), exist_ok=True)
+        stats.save(state_path)
+    return stats
+
+
+def apply_badges(data, stats):
+    """Overwrite the badge counts in ``data`` and add the retention figures as ``badge_retention``.
+
+    The weekly counts are replaced by those of the log, from Week 0 to its
+    last week (0 for a week without claims), so they add up to the total.
+    """
+    badges = data['badges_data']
+    for name in [key for key in badges if key.startswith('Week ') and key[5:].isdigit()]:
+        del badges[name]
+    for week in range(max(stats.claims, default=-1) + 1):
+        badges[f'Week {week}'] = stats.claims.get(week, 0)
+    badges['Total Claimed'] = stats.total()
+    badges['Unique Users'] = len(stats.unique_users())
+    data['badge_retention'] = {
+        'weeks': [f'Week {week}' for week in stats.weeks()],
+        'matrix': stats.retention_matrix().tolist(),
+        'continuation': {
+            f'Week {week}': {'users': users, 'continued': continued}
+            for week, (users, continued) in stats.continuation().items()
+        }
+    }
+    return data
@@ -0,0 +1,159 @@
+"""Benchmark harness for the Self-Care School Dashboard.
+
+Runs app.py headless through Streamlit's ``AppTest`` against synthetic data
+at several scales. For every section marked in app.py (see profiling.py) it
+reports the wall time of a cold run (empty caches) and of a warm rerun, the
+peak Python memory of a cold run (as seen by ``tracemalloc``) and the
+payload sent to the browser, then exits non-zero if any section is over its
+budget::
+
+    python bench.py
+    python bench.py --scales 1 10 --budgets budgets.json --json report.json
+
+The data comes from synthetic.py; scale 1x matches the built-in data (about
+320k log rows) and larger scales multiply the number of rows. Every tab is
+rendered (eager mode).
+
+Budgets are per section, with ``*`` as the default for sections not listed.
+A ``--budgets`` JSON file is merged over ``BUDGETS``, e.g.::
+
+    {"Data Load": {"seconds": 10}, "*": {"payload_kb": 256}}
+"""
+import argparse
+import copy
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import data_sources
+import kpis
+import profiling
+import snapshot
+import synthetic
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+SCALES = [1, 10, 100]
+
+# Limits per section: cold wall time, cold peak memory and payload size.
+# Loading is the only section expected to grow with the data.
+BUDGETS = {
+    'Data Load': {'seconds': 30.0, 'memory_mb': 1024, 'payload_kb': 16},
+    'Podcast Analytics': {'seconds': 1.0, 'memory_mb': 32, 'payload_kb': 128},
+    '*': {'seconds': 0.5, 'memory_mb': 32, 'payload_kb': 64}
+}
+
+LIMITS = [('seconds', 'cold_seconds'), ('memory_mb', 'peak_mb'), ('payload_kb', 'payload_kb')]
+
+
+def reset_caches(path):
+    """Forget everything cached in this process and on disk for the source at ``path``."""
+    snapshot.STORE = snapshot.SnapshotStore()
+    kpis.ENGINE = kpis.KPIEngine(kpis.KPIS)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    shutil.rmtree(data_sources.open_source(path).state_dir(), ignore_errors=True)
+
+
+def run_app(trace_memory=False):
+    """Run the app once and return its profiled sections."""
+    app = AppTest.from_file(APP, default_timeout=600)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        app.run()
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return app, profiling.RUNS[-1]
+
+
+def measure(path):
+    """Cold, warm and memory-traced runs of the app against the source at ``path``."""
+    reset_caches(path)
+    app, cold = run_app()
+    app.run()
+    warm = profiling.RUNS[-1]
+    reset_caches(path)
+    _, traced = run_app(trace_memory=True)
+
+    warm_by_name = {section.name: section for section in warm}
+    traced_by_name = {section.name: section for section in traced}
+    return [{
+        'section': section.name,
+        'cold_seconds': section.seconds,
+        'warm_seconds': warm_by_name[section.name].seconds,
+        'peak_mb': traced_by_name[section.name].peak_bytes / 2**20,
+        'payload_kb': section.payload_bytes / 1024,
+        'messages': section.messages
+    } for section in cold]
+
+
+def over_budget(row, budgets):
+    budget = {**budgets['*'], **budgets.get(row['section'], {})}
+    return [
+        f"{row['section']}: {key} {row[field]:.2f} > {budget[key]}"
+        for key, field in LIMITS if key in budget and row[field] > budget[key]
+    ]
+
+
+def print_report(scale, users, rows, budgets):
+    print(f"\nScale {scale}x ({users:,} registrants)")
+    print(f"{'Section':<24}{'cold s':>9}{'warm s':>9}{'peak MB':>10}{'payload KB':>12}{'msgs':>6}")
+    for row in rows:
+        flag = ' !' if over_budget(row, budgets) else ''
+        print(f"{row['section']:<24}{row['cold_seconds']:>9.3f}{row['warm_seconds']:>9.3f}"
+              f"{row['peak_mb']:>10.1f}{row['payload_kb']:>12.1f}{row['messages']:>6}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES)
+    parser.add_argument('--budgets', help="JSON file of section budgets merged over the defaults")
+    parser.add_argument('--json', help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    budgets = copy.deepcopy(BUDGETS)
+    if args.budgets:
+        with open(args.budgets) as f:
+            for section, limits in json.load(f).items():
+                budgets.setdefault(section, {}).update(limits)
+
+    profiling.ENABLED = True
+    os.environ['DASHBOARD_RENDER_MODE'] = 'eager'
+    os.environ.pop('DASHBOARD_HISTORY_DB', None)
+
+    report, failures = {}, []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f'bench-{scale}x.parquet')
+            users = synthetic.generate(path, scale=scale)['registrants']
+            os.environ['DASHBOARD_DATA_SOURCE'] = path
+            rows = measure(path)
+            print_report(scale, users, rows, budgets)
+            report[f'{scale}x'] = rows
+            failures += [f"{scale}x {failure}" for row in rows for failure in over_budget(row, budgets)]
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'budgets': budgets, 'results': report}, f, indent=2)
+
+    if failures:
+        print("\nOver budget:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nAll sections within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
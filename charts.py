@@ -0,0 +1,628 @@
+"""Plotly figure builders for the Self-Care School Dashboard.
+
+Every builder takes the plain data dicts the dashboard already uses and is
+memoized with ``st.cache_resource`` (via ``profiling.cache_resource``, which
+also counts hits and misses), so a Streamlit rerun with unchanged data reuses
+the built figure instead of rebuilding it. A resource cache hands back the
+same Figure object rather than unpickling a copy, which would re-run plotly's
+validation on every hit; callers must treat the returned figures as read-only.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import profiling
+from data_sources import week_names
+from registrants import AGE_BANDS, funnel_conversions
+
+# Bound the figure cache so a long-running server does not keep every
+# historical data version around
+FIGURE_CACHE_ENTRIES = 64
+
+# Bar colors for successive program weeks, repeated for longer programs
+BADGE_WEEK_COLORS = ['#4f46e5', '#3b82f6', '#60a5fa']
+
+# Colors of the social interaction types
+SOCIAL_ENGAGEMENT_COLORS = {'Reactions': '#3b82f6', 'Comments': '#8b5cf6', 'Shares': '#10b981', 'Saves': '#f59e0b', 'Page Likes': '#ef4444'}
+
+# Campaigns shown in the per-campaign social engagement chart
+SOCIAL_CAMPAIGN_LIMIT = 15
+
+# Colors of the website traffic metrics
+TRAFFIC_COLORS = {'Pageviews': '#4338ca', 'Sessions': '#2563eb', 'Visitors': '#0d9488', 'New Visitors': '#f59e0b'}
+
+# Bar colors for successive funnel steps in the conversion breakdown
+FUNNEL_STEP_COLORS = ['#4f46e5', '#10b981', '#f59e0b']
+
+# Colors for successive SMS campaigns
+SMS_CAMPAIGN_COLORS = ['#0ea5e9', '#f97316', '#8b5cf6', '#10b981', '#ef4444', '#eab308']
+
+# Colors of a forecast chart: actual weeks, the median path and the band around it
+FORECAST_COLORS = {'actual': '#4338ca', 'median': '#f59e0b', 'band': 'rgba(245, 158, 11, 0.2)', 'target': '#10b981'}
+
+# Colors of the registrant age bands, in AGE_BANDS order (Unknown last, in gray)
+AGE_BAND_COLORS = ['#a78bfa', '#4f46e5', '#2563eb', '#0d9488', '#10b981', '#f59e0b', '#f97316', '#9ca3af']
+
+
+def bar_chart(df, category, value, color, orientation='v', hovertemplate=None):
+    """Bar chart with one bar per row of ``df``, drawn as a single trace.
+
+    ``category``, ``value`` and ``color`` name the columns holding the bar
+    labels, heights and colors. Bars are labelled with their formatted value.
+    Drawing a single ``go.Bar`` with per-bar color arrays keeps the figure JSON
+    and client render time flat as the number of bars grows.
+    """
+    values = df[value].to_numpy()
+    categories = df[category].to_numpy()
+    x, y = (categories, values) if orientation == 'v' else (values, categories)
+
+    return go.Figure(go.Bar(
+        x=x,
+        y=y,
+        orientation=orientation,
+        marker_color=df[color].to_numpy(),
+        text=[f"{v:,}" for v in values],
+        textposition='auto',
+        hovertemplate=hovertemplate,
+    ))
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def age_pie_chart(age_data):
+    """Pie chart of registrants by age group."""
+    age_df = pd.DataFrame({
+        'Age Group': list(age_data.keys()),
+        'Value': [item['value'] for item in age_data.values()],
+        'Color': [item['color'] for item in age_data.values()]
+    })
+
+    fig = px.pie(
+        age_df,
+        values='Value',
+        names='Age Group',
+        color='Age Group',
+        color_discrete_map={name: item['color'] for name, item in age_data.items()},
+        title="Age Demographics (Registrants)"
+    )
+    fig.update_traces(textinfo='percent+label')
+    fig.update_layout(
+        height=400,
+        title_font_size=16,
+        title_x=0.5,
+        margin=dict(t=60, b=20, l=20, r=20)
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def funnel_chart(funnel_data, colors, title="Program Conversion Flow"):
+    """Program conversion funnel from a list of ``{'stage', 'value'}`` dicts."""
+    funnel_df = pd.DataFrame(funnel_data)
+
+    fig = go.Figure(go.Funnel(
+        y=funnel_df['stage'],
+        x=funnel_df['value'],
+        textposition="inside",
+        textinfo="value+percent initial",
+        marker={"color": colors}
+    ))
+
+    fig.update_layout(
+        title=title,
+        title_font_size=16,
+        title_x=0.5,
+        margin=dict(l=20, r=20, t=60, b=20),
+        height=450
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def funnel_breakdown_chart(rollup, dimension):
+    """Stage-to-stage conversion rates for each row of a funnel cube roll-up.
+
+    ``rollup`` has one column per funnel stage and one row per label of
+    ``dimension`` (e.g. each channel).
+    """
+    stages = list(rollup.columns)
+    counts = rollup.to_numpy()
+    labels = [str(label) for label in rollup.index]
+    rates = funnel_conversions(counts.T)
+    fig = go.Figure()
+    for i, (base, stage) in enumerate(zip(stages[:-1], stages[1:])):
+        fig.add_trace(go.Bar(
+            x=labels,
+            y=rates[i],
+            name=f"{base} → {stage}",
+            marker_color=FUNNEL_STEP_COLORS[i % len(FUNNEL_STEP_COLORS)],
+            customdata=np.stack([counts[:, i + 1], counts[:, i]], axis=-1),
+            texttemplate="%{y:.0f}%",
+            textposition='auto',
+            hovertemplate="<b>%{x}</b><br>%{y:.1f}% (%{customdata[0]:,} of %{customdata[1]:,})<extra>" + stage + "</extra>"
+        ))
+
+    fig.update_layout(
+        title=f"Conversion by {dimension}",
+        title_font_size=16,
+        title_x=0.5,
+        height=400,
+        margin=dict(l=20, r=20, t=60, b=20),
+        barmode='group',
+        bargap=0.25,
+        yaxis=dict(title="Conversion (%)", range=[0, 100]),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def badge_chart(badges_data):
+    """Weekly badge claims with the weekly target line."""
+    badge_weeks = week_names(badges_data)
+    badge_df = pd.DataFrame({
+        'Week': badge_weeks,
+        'Badges': [badges_data[week] for week in badge_weeks],
+        'Color': [BADGE_WEEK_COLORS[i % len(BADGE_WEEK_COLORS)] for i in range(len(badge_weeks))]
+    })
+    target = badges_data['Target']
+
+    badge_fig = bar_chart(badge_df, 'Week', 'Badges', 'Color')
+
+    # Add target line
+    badge_fig.add_shape(
+        type="line",
+        x0=-0.5,
+        y0=target,
+        x1=len(badge_weeks) - 0.5,
+        y1=target,
+        line=dict(
+            color="#ef4444",
+            width=2,
+            dash="dash",
+        )
+    )
+
+    badge_fig.add_annotation(
+        x=(len(badge_weeks) - 1) / 2,
+        y=target * 1.06,
+        text=f"Weekly Target: {target:,}",
+        showarrow=False,
+        font=dict(
+            color="#ef4444",
+            size=12
+        )
+    )
+
+    badge_fig.update_layout(
+        title="Badge Claims by Week",
+        title_font_size=16,
+        title_x=0.5,
+        showlegend=False,
+        height=400,
+        margin=dict(l=20, r=20, t=60, b=20),
+        xaxis=dict(
+            title="",
+            tickfont=dict(size=14),
+        ),
+        yaxis=dict(
+            title="Number of Badges",
+            titlefont=dict(size=14),
+        ),
+    )
+    return badge_fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def badge_retention_chart(badge_retention):
+    """Heatmap of each first-claim cohort's share claiming again in every later week."""
+    weeks = badge_retention['weeks']
+    counts = np.array(badge_retention['matrix'], dtype=np.int64).reshape(len(weeks), len(weeks))
+    sizes = counts.diagonal()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = np.where(sizes[:, None] > 0, counts / sizes[:, None] * 100, np.nan)
+    # Weeks before a cohort's first claim are left blank
+    shares[np.tril_indices(len(weeks), -1)] = np.nan
+    cohorts = [f"{week} ({size:,})" for week, size in zip(weeks, sizes)]
+
+    fig = go.Figure(go.Heatmap(
+        z=shares,
+        x=weeks,
+        y=cohorts,
+        customdata=counts,
+        colorscale='Blues',
+        zmin=0,
+        zmax=100,
+        texttemplate="%{z:.0f}%",
+        hovertemplate="<b>First claim %{y}</b><br>Claimed in %{x}: %{customdata:,} (%{z:.1f}%)<extra></extra>",
+        colorbar=dict(title="%", ticksuffix="%")
+    ))
+
+    fig.update_layout(
+        title="Badge Retention by First-Claim Week",
+        title_font_size=16,
+        title_x=0.5,
+        height=max(300, 50 * len(weeks) + 150),
+        margin=dict(l=20, r=20, t=60, b=20),
+        xaxis=dict(title="Claim Week", side='bottom'),
+        yaxis=dict(title="Cohort (users)", autorange='reversed')
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def story_counts_chart(counts_by_week):
+    """Stacked bars of stories submitted per program week, split by age band."""
+    weeks = list(counts_by_week)
+    counts = np.array(list(counts_by_week.values()), dtype=np.int64).reshape(len(weeks), len(AGE_BANDS))
+    fig = go.Figure()
+    for band, color, values in zip(AGE_BANDS, AGE_BAND_COLORS, counts.T):
+        if values.any():
+            fig.add_trace(go.Bar(
+                x=weeks,
+                y=values,
+                name=band,
+                marker_color=color,
+                hovertemplate="<b>%{x}</b><br>" + band + ": %{y:,}<extra></extra>"
+            ))
+
+    fig.update_layout(
+        title="Stories Submitted by Week and Age Band",
+        title_font_size=16,
+        title_x=0.5,
+        barmode='stack',
+        height=350,
+        margin=dict(l=20, r=20, t=60, b=20),
+        yaxis_title="Stories",
+        legend=dict(orientation="h", yanchor="bottom", y=-0.35, xanchor="center", x=0.5)
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def social_engagement_chart(social_data):
+    """Social media engagement broken down by interaction type."""
+    social_engagement = pd.DataFrame([
+        {"Metric": "Reactions", "Value": social_data['Reactions'], "Color": SOCIAL_ENGAGEMENT_COLORS['Reactions']},
+        {"Metric": "Comments", "Value": social_data['Comments'], "Color": SOCIAL_ENGAGEMENT_COLORS['Comments']},
+        {"Metric": "Shares", "Value": social_data['Shares'], "Color": SOCIAL_ENGAGEMENT_COLORS['Shares']},
+        {"Metric": "Saves", "Value": social_data['Saves'], "Color": SOCIAL_ENGAGEMENT_COLORS['Saves']},
+        {"Metric": "New Page Likes", "Value": social_data['Page Likes'], "Color": SOCIAL_ENGAGEMENT_COLORS['Page Likes']}
+    ])
+
+    fig = bar_chart(social_engagement, 'Metric', 'Value', 'Color')
+
+    fig.update_layout(
+        title="Social Media Engagement by Type",
+        title_font_size=16,
+        title_x=0.5,
+        showlegend=False,
+        height=400,
+        margin=dict(l=20, r=20, t=60, b=20),
+        xaxis=dict(
+            title="",
+            tickfont=dict(size=14),
+        ),
+        yaxis=dict(
+            title="Count",
+            titlefont=dict(size=14),
+        ),
+        bargap=0.4,
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def social_campaign_chart(campaigns):
+    """Interactions per campaign, stacked by type, for the campaigns with the most engagements.
+
+    ``campaigns`` is the per-campaign rollup of a per-post export (see social.py).
+    """
+    types = [metric for metric in SOCIAL_ENGAGEMENT_COLORS if metric in campaigns]
+    top = campaigns.assign(_total=campaigns[types].sum(axis=1)).nlargest(SOCIAL_CAMPAIGN_LIMIT, '_total').iloc[::-1]
+    labels = [str(campaign) for campaign in top.index]
+    rates = top['Engagement Rate'].to_numpy() if 'Engagement Rate' in top else np.zeros(len(top))
+    details = np.stack([top['Posts'].to_numpy(), rates], axis=-1)
+    fig = go.Figure()
+    for metric in types:
+        fig.add_trace(go.Bar(
+            y=labels,
+            x=top[metric].to_numpy(),
+            name=metric,
+            orientation='h',
+            marker_color=SOCIAL_ENGAGEMENT_COLORS[metric],
+            customdata=details,
+            hovertemplate="<b>%{y}</b><br>" + metric + ": %{x:,}<br>Posts: %{customdata[0]:,}<br>Engagement rate: %{customdata[1]:.2f}%<extra></extra>"
+        ))
+
+    fig.update_layout(
+        title="Engagement by Campaign",
+        title_font_size=16,
+        title_x=0.5,
+        barmode='stack',
+        height=max(350, 40 * len(top) + 120),
+        margin=dict(l=20, r=20, t=60, b=20),
+        xaxis_title="Interactions",
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def sms_ctr_chart(sms_data):
+    """Click-through rate of each SMS campaign."""
+    sms_df = pd.DataFrame({
+        'Campaign': list(sms_data.keys()),
+        'Rate': [fields['rate'] for fields in sms_data.values()]
+    })
+    sms_df['Color'] = [SMS_CAMPAIGN_COLORS[i % len(SMS_CAMPAIGN_COLORS)] for i in range(len(sms_df))]
+
+    fig = bar_chart(
+        sms_df, 'Campaign', 'Rate', 'Color',
+        hovertemplate="<b>%{x}</b><br>Click-through rate: %{y}%<extra></extra>"
+    )
+
+    fig.update_layout(
+        title="Click-Through Rate by Campaign",
+        title_font_size=16,
+        title_x=0.5,
+        showlegend=False,
+        height=350,
+        margin=dict(l=20, r=20, t=60, b=20),
+        bargap=0.4,
+        yaxis_title="CTR (%)"
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def sms_time_to_click_chart(sms_analytics):
+    """Clicks per time-to-click bucket, one bar group per campaign."""
+    fig = go.Figure()
+    for i, (campaign, fields) in enumerate(sms_analytics.items()):
+        buckets = fields['time_to_click']
+        matched = max(sum(buckets.values()), 1)
+        fig.add_trace(go.Bar(
+            x=list(buckets),
+            y=[count / matched * 100 for count in buckets.values()],
+            name=campaign,
+            marker_color=SMS_CAMPAIGN_COLORS[i % len(SMS_CAMPAIGN_COLORS)],
+            customdata=list(buckets.values()),
+            hovertemplate="<b>%{x}</b><br>%{y:.1f}% of clicks (%{customdata:,})<extra>" + campaign + "</extra>"
+        ))
+
+    fig.update_layout(
+        title="Time from Delivery to Click",
+        title_font_size=16,
+        title_x=0.5,
+        height=350,
+        margin=dict(l=20, r=20, t=60, b=20),
+        bargap=0.25,
+        yaxis_title="Share of Clicks (%)",
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def sms_hour_chart(sms_analytics):
+    """Clicks by hour of day, one line per campaign."""
+    fig = go.Figure()
+    for i, (campaign, fields) in enumerate(sms_analytics.items()):
+        fig.add_trace(go.Scatter(
+            x=list(range(24)),
+            y=fields['clicked_by_hour'],
+            name=campaign,
+            mode='lines+markers',
+            line=dict(color=SMS_CAMPAIGN_COLORS[i % len(SMS_CAMPAIGN_COLORS)], shape='spline'),
+            hovertemplate="<b>%{x}:00</b><br>Clicks: %{y:,}<extra>" + campaign + "</extra>"
+        ))
+
+    fig.update_layout(
+        title="Clicks by Hour of Day",
+        title_font_size=16,
+        title_x=0.5,
+        height=350,
+        margin=dict(l=20, r=20, t=60, b=20),
+        xaxis=dict(title="Hour of Day", tickmode='linear', dtick=3),
+        yaxis_title="Clicks",
+        legend=dict(orientation="h", yanchor="bottom", y=-0.35, xanchor="center", x=0.5)
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def traffic_chart(traffic_data):
+    """Pageviews, sessions and visitors side by side."""
+    traffic_df = pd.DataFrame({
+        'Metric': ['Pageviews', 'Sessions', 'Visitors'],
+        'Value': [traffic_data['Pageviews'], traffic_data['Sessions'], traffic_data['Visitors']],
+        'Color': [TRAFFIC_COLORS[metric] for metric in ['Pageviews', 'Sessions', 'Visitors']]
+    })
+
+    fig = bar_chart(traffic_df, 'Metric', 'Value', 'Color')
+
+    fig.update_layout(
+        title="Website Traffic Metrics",
+        title_font_size=16,
+        title_x=0.5,
+        showlegend=False,
+        height=350,
+        margin=dict(l=20, r=20, t=60, b=20),
+        bargap=0.4,
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def daily_traffic_chart(daily):
+    """Pageviews, sessions, visitors and new visitors per day, from the sessionized pageview log."""
+    fig = go.Figure()
+    for metric, field in [('Pageviews', 'pageviews'), ('Sessions', 'sessions'), ('Visitors', 'visitors'), ('New Visitors', 'new_visitors')]:
+        fig.add_trace(go.Scatter(
+            x=daily['date'],
+            y=daily[field],
+            name=metric,
+            mode='lines',
+            line=dict(color=TRAFFIC_COLORS[metric], shape='spline'),
+            hovertemplate="<b>%{x}</b><br>" + metric + ": %{y:,}<extra></extra>"
+        ))
+
+    fig.update_layout(
+        title="Daily Website Traffic",
+        title_font_size=16,
+        title_x=0.5,
+        height=350,
+        margin=dict(l=20, r=20, t=60, b=20),
+        hovermode='x unified',
+        yaxis_title="Count",
+        legend=dict(orientation="h", yanchor="bottom", y=-0.35, xanchor="center", x=0.5)
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def forecast_chart(forecast):
+    """Fan chart of a weekly series: the actual weeks, then the forecast median and band to the end of the program."""
+    # The forecast lines start at the last actual week so they join up
+    weeks = [forecast.weeks[-1], *forecast.future_weeks]
+    last = forecast.history[-1]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=weeks + weeks[::-1],
+        y=[last, *forecast.high, *forecast.low[::-1], last],
+        fill='toself',
+        fillcolor=FORECAST_COLORS['band'],
+        line=dict(width=0),
+        name="80% band",
+        hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=forecast.weeks,
+        y=forecast.history,
+        name="Actual",
+        mode='lines+markers',
+        line=dict(color=FORECAST_COLORS['actual'], width=3),
+        hovertemplate="<b>%{x}</b><br>Actual: %{y:,}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=weeks,
+        y=[last, *forecast.median],
+        customdata=[[last, last], *zip(forecast.low, forecast.high)],
+        name="Forecast",
+        mode='lines+markers',
+        line=dict(color=FORECAST_COLORS['median'], width=2, dash='dash'),
+        hovertemplate="<b>%{x}</b><br>Forecast: %{y:,.0f} (%{customdata[0]:,.0f}-%{customdata[1]:,.0f})<extra></extra>"
+    ))
+    if forecast.target is not None and not forecast.cumulative:
+        fig.add_hline(y=forecast.target, line_dash='dot', line_color=FORECAST_COLORS['target'],
+                      annotation_text=f"Target: {forecast.target:,}", annotation_position='top left')
+
+    fig.update_layout(
+        title=f"{forecast.name} per Week: Forecast",
+        title_font_size=16,
+        title_x=0.5,
+        height=320,
+        margin=dict(l=20, r=20, t=60, b=20),
+        yaxis=dict(title=forecast.name, rangemode='tozero'),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.35, xanchor="center", x=0.5)
+    )
+    return fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def weekly_plays_chart(weekly_plays, week_colors):
+    """Total podcast plays per program week."""
+    weekly_data = pd.DataFrame({
+        'Week': list(weekly_plays.keys()),
+        'Plays': list(weekly_plays.values())
+    })
+    weekly_data['Color'] = weekly_data['Week'].map(week_colors)
+
+    weekly_fig = bar_chart(
+        weekly_data, 'Week', 'Plays', 'Color',
+        hovertemplate="<b>%{x}</b><br>Total Plays: %{y:,}<extra></extra>"
+    )
+
+    weekly_fig.update_layout(
+        title="Total Plays by Week",
+        title_font_size=16,
+        title_x=0.5,
+        showlegend=False,
+        height=350,
+        margin=dict(l=20, r=20, t=60, b=20),
+        bargap=0.4,
+        yaxis_title="Number of Plays"
+    )
+    return weekly_fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def episode_chart(week_name, week_episodes):
+    """Horizontal bar chart of the episodes released in one week.
+
+    ``week_episodes`` is a DataFrame with ``day``, ``title``, ``plays`` and
+    ``color`` columns, e.g. a ``RecordStore.frame()``.
+    """
+    episodes_df = week_episodes[['day', 'plays', 'color']].assign(
+        label="Day " + week_episodes['day'].astype(str) + ": " + week_episodes['title'].astype(str)
+    )
+
+    ep_fig = bar_chart(
+        episodes_df, 'label', 'plays', 'color', orientation='h',
+        hovertemplate="<b>%{y}</b><br>Plays: %{x:,}<extra></extra>"
+    )
+
+    ep_fig.update_layout(
+        title=f"{week_name} Episode Performance",
+        title_font_size=16,
+        title_x=0.5,
+        showlegend=False,
+        height=350,
+        margin=dict(l=20, r=20, t=60, b=20),
+        bargap=0.2,
+        xaxis_title="Number of Plays",
+        xaxis=dict(
+            title="Plays",
+            titlefont=dict(size=14),
+        ),
+        yaxis=dict(
+            title="",
+            titlefont=dict(size=14),
+            autorange="reversed"  # This puts the highest value at the top
+        )
+    )
+    return ep_fig
+
+
+@profiling.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def retention_chart(week_name, week_episodes, retention):
+    """Share of plays still listening by minute, one line per episode of the week.
+
+    ``week_episodes`` is a DataFrame like the one ``episode_chart`` takes.
+    """
+    fig = go.Figure()
+    for day, title, color in zip(week_episodes['day'], week_episodes['title'], week_episodes['color']):
+        curve = retention.get(day)
+        if not curve:
+            continue
+        fig.add_trace(go.Scatter(
+            x=list(range(len(curve))),
+            y=curve,
+            name=f"Day {day}: {title}",
+            mode='lines',
+            line=dict(color=color, width=2),
+            hovertemplate="Minute %{x}<br>%{y:.1f}% still listening<extra>Day " + str(day) + "</extra>"
+        ))
+
+    fig.update_layout(
+        title=f"{week_name} Listener Retention",
+        title_font_size=16,
+        title_x=0.5,
+        height=350,
+        margin=dict(l=20, r=20, t=60, b=20),
+        xaxis_title="Minutes into Episode",
+        yaxis=dict(title="Still Listening (%)", range=[0, 100]),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.45, xanchor="center", x=0.5)
+    )
+    return fig
@@ -0,0 +1,237 @@
+"""HTML fragments for the dashboard's metric cards, KPI progress bars and insights.
+
+Each card style is a template parsed once at import time. A whole row of cards
+(or the whole KPI progress table) is rendered into a single HTML string, so
+the app sends it with one ``st.markdown`` call instead of one ``st.columns``
+block plus one markdown element per card. Cards take an optional ``trend``
+(an inline SVG from ``sparkline_svg``). Rendered fragments are cached by
+their input values.
+"""
+import html
+from string import Formatter
+
+import profiling
+
+FRAGMENT_CACHE_ENTRIES = 256
+
+
+class Template:
+    """A ``str.format``-style template split into literal and field parts up front."""
+
+    def __init__(self, text):
+        self.parts = [
+            (literal, field, spec)
+            for literal, field, spec, _ in Formatter().parse(text)
+        ]
+
+    def render(self, values):
+        out = []
+        for literal, field, spec in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(values[field], spec))
+        return ''.join(out)
+
+
+TEMPLATES = {
+    # Top-of-page summary cards
+    'summary': Template("""
+<div class="metric-card" style="background: {bg};">
+    <div class="metric-label">{label}</div>
+    <div class="metric-value">{value}</div>
+    <div style="color: {text}; font-weight: 500;">{subtext}</div>
+    {trend}
+</div>"""),
+
+    # Program funnel stage counts
+    'funnel': Template("""
+<div class="metric-card" style="background-color: {bg}; border-left: 4px solid {color};">
+    <div class="metric-value" style="color: {color};">{value}</div>
+    <div class="metric-label" style="color: {color};">{label}</div>
+    {trend}
+</div>"""),
+
+    # Badge totals
+    'badge': Template("""
+<div class="metric-card" style="background: {bg}; border-left: 4px solid {border};">
+    <div class="metric-label">{label}</div>
+    <div class="metric-value" style="color: {text};">{value}</div>
+    <div style="font-weight: 500; color: {text};">{subtext}</div>
+    {trend}
+</div>"""),
+
+    # Social media and podcast summary cards with an icon on top
+    'icon': Template("""
+<div class="metric-card" style="background: {bg};">
+    <div style="font-size: {icon_size}; margin-bottom: 4px;">{icon}</div>
+    <div class="metric-label" style="color: {text};">{label}</div>
+    <div class="metric-value" style="color: {text};">{value}</div>
+    {subtext}
+    {trend}
+</div>"""),
+
+    # Small engagement tiles
+    'tile': Template("""
+<div style="text-align: center; padding: 8px; background-color: #f9fafb; border-radius: 8px; border-bottom: 3px solid {color};">
+    <div style="font-size: 1.2rem; margin-bottom: 4px;">{icon}</div>
+    <div style="font-weight: 600; color: {color};">{value}</div>
+    <div style="font-size: 0.8rem; color: #6b7280;">{label}</div>
+</div>"""),
+
+    # Website analytics cards with a faded corner icon
+    'web': Template("""
+<div class="metric-card" style="background: {bg}; position: relative; overflow: hidden;">
+    <div style="position: absolute; top: 10px; right: 10px; font-size: 1.5rem; opacity: 0.3;">{icon}</div>
+    <div class="metric-label" style="color: {text}; font-weight: 500;">{label}</div>
+    <div class="metric-value" style="color: {text};">{value}</div>
+    <div style="color: {text}; font-weight: 500; font-size: 0.9rem;">{subtext}</div>
+    {trend}
+</div>"""),
+}
+
+SPARKLINE = Template('<svg class="sparkline" width="{width}" height="{height}" viewBox="0 0 {width} {height}"><polyline points="{points}" fill="none" stroke="{color}" stroke-width="1.5" stroke-linejoin="round"/></svg>')
+
+GRID = Template('<div class="card-grid" style="grid-template-columns: repeat({columns}, minmax(0, 1fr));">{cards}</div>')
+
+KPI_ROW = Template("""
+<div class="kpi-row">
+    <div style="font-weight: 600; padding: 8px 0;">{name}{trend}</div>
+    <div style="background-color: #f3f4f6; border-radius: 8px; height: 12px; margin-top: 12px;">
+        <div style="background-color: {color}; width: {progress}%; height: 12px; border-radius: 8px;"></div>
+    </div>
+    <div style="padding: 8px 0; text-align: right;">{progress_text} <span class="{status_class}">{status}</span></div>
+</div>""")
+
+INSIGHT_ITEM = Template("""
+    <li style="margin-bottom: 10px; display: flex; align-items: center;"><span style="background-color: {dot}; width: 12px; height: 12px; display: inline-block; margin-right: 8px; border-radius: 50%;"></span> <strong style="color: {color};">{text}</strong> - <span class="{status_class}">{status}</span></li>""")
+
+STORY_ITEM = Template("""
+<div style="padding: 12px 16px; margin-bottom: 10px; background-color: #fffbeb; border-left: 4px solid #f59e0b; border-radius: 8px;">
+    <div style="font-weight: 600; color: #92400e;">{title}</div>
+    <div style="font-size: 0.8rem; color: #6b7280; margin-bottom: 6px;">{meta}</div>
+    <div style="color: #374151;">{excerpt}</div>
+</div>""")
+
+# Characters of a story's text shown in a search result
+STORY_EXCERPT_CHARS = 300
+
+# Bullet dot and text colors for each KPI status
+INSIGHT_STATUS_COLORS = {
+    'Achieved': ('#d1fae5', '#059669'),
+    'Behind': ('#fef3c7', '#d97706'),
+    'At Risk': ('#fee2e2', '#dc2626'),
+    'No Data': ('#f3f4f6', '#6b7280')
+}
+
+
+def sparkline_svg(values, color, width=96, height=24):
+    """Inline SVG trend line for ``values``; empty when there are fewer than two points."""
+    if not values or len(values) < 2:
+        return ''
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    step = (width - 2) / (len(values) - 1)
+    points = ' '.join(
+        f"{1 + i * step:.1f},{height - 1 - (value - low) / span * (height - 2):.1f}"
+        for i, value in enumerate(values)
+    )
+    return SPARKLINE.render({'width': width, 'height': height, 'points': points, 'color': color})
+
+
+@profiling.cache_data(max_entries=FRAGMENT_CACHE_ENTRIES, show_spinner=False)
+def card_grid_html(template, cards):
+    """HTML for a row of cards; ``cards`` is a list of template value dicts."""
+    cards_html = ''.join(TEMPLATES[template].render({'trend': '', **card}) for card in cards)
+    return GRID.render({'columns': len(cards), 'cards': cards_html})
+
+
+def _count_text(value):
+    return 'n/a' if value is None else f"{int(value):,}"
+
+
+@profiling.cache_data(max_entries=FRAGMENT_CACHE_ENTRIES, show_spinner=False)
+def kpi_progress_html(kpi_progress, trends=None):
+    """HTML for the KPI progress table (name | progress bar | current / target + status).
+
+    ``trends`` optionally maps a KPI name to a sparkline shown after the name.
+    """
+    trends = trends or {}
+    rows = []
+    for key, item in kpi_progress.items():
+        rows.append(KPI_ROW.render({
+            'name': key,
+            'trend': trends.get(key, ''),
+            'color': item['color'],
+            'progress': min(item['percentage'] or 0, 100),
+            'progress_text': f"{_count_text(item['current'])} / {_count_text(item['target'])}",
+            'status_class': f"status-{item['status'].lower().replace(' ', '-')}",
+            'status': item['status']
+        }))
+    return ''.join(rows)
+
+
+@profiling.cache_data(max_entries=FRAGMENT_CACHE_ENTRIES, show_spinner=False)
+def insights_html(title, items):
+    """HTML for an insight box listing ``(text, status)`` items with status badges."""
+    rows = []
+    for text, status in items:
+        dot, color = INSIGHT_STATUS_COLORS[status]
+        rows.append(INSIGHT_ITEM.render({
+            'dot': dot,
+            'color': color,
+            'text': text,
+            'status_class': f"status-{status.lower().replace(' ', '-')}",
+            'status': status
+        }))
+    return f"""<div class="insight-container">
+    <h3 style="margin-top: 0; color: #4338ca; font-size: 1.2rem; margin-bottom: 12px;">{title}</h3>
+    <ul style="list-style-type: none; padding-left: 0;">{''.join(rows)}
+    </ul>
+</div>"""
+
+
+def story_list_html(stories):
+    """HTML for story search results; ``stories`` is a list of dicts from ``stories.result_rows``.
+
+    Titles and texts are submitted by users, so they are escaped. Line breaks
+    are folded into spaces: a blank line would end the HTML block in markdown.
+    """
+    rows = []
+    for story in stories:
+        text = ' '.join(story['text'].split())
+        if len(text) > STORY_EXCERPT_CHARS:
+            text = text[:STORY_EXCERPT_CHARS].rsplit(' ', 1)[0] + '…'
+        week = f"Week {story['week']}" if story['week'] >= 0 else 'Week unknown'
+        submitted = f" · {story['submitted']}" if story['submitted'] else ''
+        rows.append(STORY_ITEM.render({
+            'title': html.escape(' '.join(story['title'].split()) or 'Untitled'),
+            'meta': html.escape(f"{week} · {story['age_band']}{submitted}"),
+            'excerpt': html.escape(text)
+        }))
+    return ''.join(rows)
+
+
+def debug_overlay_html(reruns, sections, cache_counts, prometheus):
+    """Collapsible debug overlay: section timings, cache hit/miss counts and Prometheus text.
+
+    Built fresh every run, so it is not cached. The markup must not contain
+    blank lines, which would end the HTML block in Markdown.
+    """
+    total_ms = sum(section.seconds for section in sections) * 1000
+    section_rows = ''.join(
+        f"<tr><td>{html.escape(section.name)}</td><td>{section.seconds * 1000:.1f}</td>"
+        f"<td>{section.payload_bytes / 1024:.1f}</td><td>{section.messages}</td>"
+        f"<td>{'-' if section.peak_bytes is None else f'{section.peak_bytes / 1024:.0f}'}</td></tr>"
+        for section in sections
+    )
+    cache_rows = ''.join(
+        f"<tr><td>{html.escape(name)}</td><td>{hits:,}</td><td>{misses:,}</td></tr>"
+        for name, (hits, misses) in cache_counts.items()
+    )
+    return (
+        f'<details class="debug-overlay"><summary>Debug: {total_ms:.0f} ms, rerun {reruns}</summary>'
+        '<table><tr><th>Section</th><th>ms</th><th>KB sent</th><th>msgs</th><th>peak KB</th></tr>'
+        f'{section_rows}</table>'
+        f'<table><tr><th>Cache</th><th>hits</th><th>misses</th></tr>{cache_rows}</table>'
+        f'<pre>{html.escape(prometheus, quote=False)}</pre></details>'
+    )
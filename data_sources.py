@@ -0,0 +1,625 @@
+"""Pluggable data sources for the Self-Care School Dashboard.
+
+The dashboard reads its metrics as plain dicts (``program_metrics``,
+``age_data``, ``podcast_data`` ...). This module loads those same structures
+from a CSV directory, an Excel workbook, a Parquet directory or a SQLite
+database, so numbers can be updated without a redeploy. Every backend stores
+the data as the tables described in ``TABLES``.
+
+``data_version`` stamps a source with its files' mtimes and the current TTL
+period. The app keeps one loaded snapshot per version (see snapshot.py), so
+a rerun does not re-read the files and an edited file is picked up right
+away.
+
+A source directory may hold several cohorts (program runs) instead, one
+source per entry under ``cohorts/`` (e.g. ``cohorts/2025-spring/`` or
+``cohorts/2025-autumn.db``). Only the selected cohort is read, and at most
+``DATA_CACHE_ENTRIES`` cohorts are kept loaded, so memory follows the cohorts
+being viewed rather than every cohort on disk.
+
+Seed a new source from the built-in data with::
+
+    python data_sources.py data/metrics.xlsx
+"""
+import copy
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+import badges
+import incremental
+import podcast
+import registrants
+import sms
+import social
+import stories
+import web
+
+# How long loaded data is trusted before the source is read again, even if
+# its mtime has not changed
+DATA_TTL_SECONDS = int(os.environ.get('DASHBOARD_DATA_TTL', 300))
+
+# Number of loaded sources (cohorts) kept in the cache at once
+DATA_CACHE_ENTRIES = int(os.environ.get('DASHBOARD_DATA_CACHE_ENTRIES', 8))
+
+# Subdirectory of a data source holding one source per cohort
+COHORTS_DIR = 'cohorts'
+
+# Built-in data, used when no data source is configured and as the fallback
+# for any table a source does not provide
+# Program Metrics Data
+program_metrics = {
+    'Registrants': {'value': 11985, 'target': 10000, 'color': '#8884d8'},
+    'Contacts': {'value': 4808, 'target': None, 'color': '#82ca9d'},
+    'NEW Contacts': {'value': 4808, 'target': None, 'color': '#ffc658'},
+    'Completed Week 0': {'value': 3089, 'target': None, 'color': '#ff8042'}
+}
+
+# Age Demographics - UPDATED
+age_data = {
+    '18-25': {'value': 101, 'color': '#0088FE'},
+    'Other Ages': {'value': 11884, 'color': '#00C49F'}
+}
+
+# SMS Campaign Data
+sms_data = {
+    'Week 1 Reminder': {'delivered': 82337, 'clicked': 7285, 'rate': 9},
+    'Technical Issue': {'delivered': 82144, 'clicked': 8152, 'rate': 9.9}
+}
+
+# Website Traffic Data - UPDATED
+traffic_data = {
+    'Visitors': 29500,
+    'Sessions': 55100,
+    'Pageviews': 101200,
+    'Bounce Rate': 30.3
+}
+
+# Download Data - UPDATED
+stream_data = {
+    'Downloads': 22186,
+    'Target': 100000
+}
+
+# Social Media & Marketing Data - UPDATED as of April 25, 2025
+social_data = {
+    'Clicks to Site': 39000,
+    'Unique Users Reached': 101900,  # Keeping this the same as no new data was provided
+    'Impressions Delivered': 338000,
+    'Video Views': 70700,
+    'Page Likes': 67,
+    'Comments': 74,
+    'Shares': 217,
+    'Saves': 66,
+    'Reactions': 3200
+}
+# Direct Engagements is derived: the sum of reactions, saves, shares, comments
+social.derive_engagements(social_data)
+
+# Badges Data - NEW
+badges_data = {
+    'Week 0': 3089,
+    'Week 1': 2061,
+    'Week 2': 2197,
+    'Total Claimed': 7347,
+    'Unique Users': 4788,
+    'Target': 5000
+}
+
+# Stories Data - NEW
+stories_data = {
+    'Submitted': 234,
+    'Target': 100
+}
+
+# Podcast Data - NEW
+podcast_data = {
+    'Total Plays': 21078,
+    'Total Episodes': 17,
+    'Average Plays': 1240,
+    'Weekly Plays': {
+        'Week 0': 6957,
+        'Week 1': 6809,
+        'Week 2': 6122,
+        'Week 3': 1190
+    },
+    'Episodes': [
+        {'week': 0, 'day': 1, 'title': 'Orientation Week: Before We Begin', 'plays': 1566, 'color': '#8b5cf6'},
+        {'week': 0, 'day': 2, 'title': 'Life Expectancy Calculator', 'plays': 1548, 'color': '#818cf8'},
+        {'week': 0, 'day': 3, 'title': 'Meet the Homegirl Hotline Hosts', 'plays': 1317, 'color': '#93c5fd'},
+        {'week': 0, 'day': 4, 'title': 'Set Your Intentions', 'plays': 1161, 'color': '#bfdbfe'},
+        {'week': 0, 'day': 5, 'title': 'The Pep Rally', 'plays': 1365, 'color': '#dbeafe'},
+        
+        {'week': 1, 'day': 1, 'title': 'Healing the Heart', 'plays': 1495, 'color': '#a78bfa'},
+        {'week': 1, 'day': 2, 'title': 'Know Your Numbers', 'plays': 1399, 'color': '#c4b5fd'},
+        {'week': 1, 'day': 3, 'title': 'Sleep to Save Your Life', 'plays': 1309, 'color': '#ddd6fe'},
+        {'week': 1, 'day': 4, 'title': 'Hydration and Hygiene', 'plays': 1250, 'color': '#ede9fe'},
+        {'week': 1, 'day': 5, 'title': 'Healing with Vitamin D and Physical Touch', 'plays': 1356, 'color': '#f5f3ff'},
+        
+        {'week': 2, 'day': 1, 'title': 'Disconnect to Reconnect', 'plays': 1329, 'color': '#10b981'},
+        {'week': 2, 'day': 2, 'title': 'Mental Health Diagnoses', 'plays': 1297, 'color': '#34d399'},
+        {'week': 2, 'day': 3, 'title': 'Rooted in Nature', 'plays': 1156, 'color': '#6ee7b7'},
+        {'week': 2, 'day': 4, 'title': 'Compassionate Listening', 'plays': 1147, 'color': '#a7f3d0'},
+        {'week': 2, 'day': 5, 'title': 'Connection Prayer and Purpose', 'plays': 1193, 'color': '#d1fae5'},
+        
+        {'week': 3, 'day': 1, 'title': 'ACES Teach-In', 'plays': 818, 'color': '#f59e0b'},
+        {'week': 3, 'day': 2, 'title': 'Love with Boundaries and Recognizing Abuse', 'plays': 372, 'color': '#fbbf24'}
+    ]
+}
+
+BUILTIN_DATA = {
+    'program_metrics': program_metrics,
+    'age_data': age_data,
+    'sms_data': sms_data,
+    'traffic_data': traffic_data,
+    'stream_data': stream_data,
+    'social_data': social_data,
+    'badges_data': badges_data,
+    'stories_data': stories_data,
+    'podcast_data': podcast_data
+}
+
+# Table layouts. "keyed" tables hold one row per dict key with the nested
+# fields as columns, "scalar" tables hold metric/value pairs.
+TABLES = {
+    'program_metrics': ('keyed', ['name', 'value', 'target', 'color']),
+    'age_data': ('keyed', ['name', 'value', 'color']),
+    'sms_data': ('keyed', ['name', 'delivered', 'clicked', 'rate']),
+    'traffic_data': ('scalar', ['metric', 'value']),
+    'stream_data': ('scalar', ['metric', 'value']),
+    'social_data': ('scalar', ['metric', 'value']),
+    'badges_data': ('scalar', ['metric', 'value']),
+    'stories_data': ('scalar', ['metric', 'value']),
+    'podcast_summary': ('scalar', ['metric', 'value']),
+    'podcast_weekly_plays': ('keyed', ['week', 'plays']),
+    'podcast_episodes': ('records', ['week', 'day', 'title', 'plays', 'color'])
+}
+
+# Optional row-level tables. When present they replace the aggregate numbers
+# derived from them; only the listed columns are read.
+RAW_TABLES = {
+    'registrants': registrants.REGISTRANT_COLUMNS,
+    social.TABLE: social.POST_COLUMNS
+}
+
+# Append-only event logs, aggregated incrementally (see incremental.py)
+EVENT_TABLES = incremental.FEEDS
+
+# Badge claim log, aggregated into per-week user sets (see badges.py)
+BADGE_LOGS = {badges.LOG: badges.COLUMNS}
+
+# SMS vendor logs, read in chunks for the campaign analytics (see sms.py)
+SMS_LOGS = sms.LOGS
+
+# Website pageview log, sessionized in chunks (see web.py)
+WEB_LOGS = {web.LOG: web.COLUMNS}
+
+# Story submissions, ingested into a searchable store (see stories.py)
+STORY_TABLES = {stories.TABLE: stories.STORY_COLUMNS}
+
+# Rows per chunk when scanning event logs
+EVENT_CHUNK_ROWS = 500_000
+
+
+def _scalar(value):
+    """Convert a pandas cell back to the plain Python value the app expects."""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def week_names(values):
+    """The ``'Week N'`` keys of ``values``, in week order."""
+    weeks = [key for key in values if key.startswith('Week ') and key[5:].isdigit()]
+    return sorted(weeks, key=lambda key: int(key[5:]))
+
+
+def to_tables(data):
+    """Flatten the dashboard data dicts into one DataFrame per table."""
+    podcast = data['podcast_data']
+    tables = {}
+    for name, (kind, columns) in TABLES.items():
+        if name == 'podcast_summary':
+            source = {k: v for k, v in podcast.items() if not isinstance(v, (dict, list))}
+        elif name == 'podcast_weekly_plays':
+            source = {week: {'plays': plays} for week, plays in podcast['Weekly Plays'].items()}
+        elif name == 'podcast_episodes':
+            source = podcast['Episodes']
+        else:
+            source = data[name]
+
+        if kind == 'keyed':
+            rows = [{columns[0]: key, **fields} for key, fields in source.items()]
+        elif kind == 'scalar':
+            rows = [{'metric': key, 'value': value} for key, value in source.items()]
+        else:
+            rows = source
+        tables[name] = pd.DataFrame(rows, columns=columns)
+    return tables
+
+
+def from_tables(tables):
+    """Rebuild the dashboard data dicts from tables.
+
+    Tables missing from ``tables`` are taken from ``BUILTIN_DATA``.
+    """
+    builtin = to_tables(BUILTIN_DATA)
+    parsed = {}
+    for name, (kind, columns) in TABLES.items():
+        df = tables.get(name)
+        if df is None:
+            df = builtin[name]
+        missing = set(columns) - set(df.columns)
+        if missing:
+            raise ValueError(f"Table '{name}' is missing columns: {', '.join(sorted(missing))}")
+
+        records = [{col: _scalar(row[col]) for col in columns} for row in df[columns].to_dict('records')]
+        if kind == 'keyed':
+            parsed[name] = {row.pop(columns[0]): row for row in records}
+        elif kind == 'scalar':
+            parsed[name] = {row['metric']: row['value'] for row in records}
+        else:
+            parsed[name] = records
+
+    data = {name: parsed[name] for name in BUILTIN_DATA if name in parsed}
+    data['podcast_data'] = {
+        **parsed['podcast_summary'],
+        'Weekly Plays': {week: fields['plays'] for week, fields in parsed['podcast_weekly_plays'].items()},
+        'Episodes': parsed['podcast_episodes']
+    }
+    return data
+
+
+class DataSource:
+    """Base class for a backend holding the tables in ``TABLES``."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def files(self):
+        """Files whose modification invalidates the cached data."""
+        return [self.path]
+
+    def state_dir(self):
+        """Where incremental aggregation state for this source is kept."""
+        return self.path + '.state'
+
+    def signature(self):
+        """Cheap fingerprint of the source files used as the cache key."""
+        signature = []
+        for path in self.files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def read_tables(self):
+        raise NotImplementedError
+
+    def read_raw(self, name, columns):
+        """Read the listed columns of an optional raw table, or None if absent."""
+        raise NotImplementedError
+
+    def read_events(self, name, columns, time_column, since):
+        """Read an event log, skipping events at or before ``since`` where the backend can.
+
+        Returns None if the log does not exist. Backends may return some older
+        events as well; the aggregator drops them.
+        """
+        events = self.read_raw(name, columns)
+        if events is None or since is None:
+            return events
+        return events[pd.to_datetime(events[time_column], errors='coerce') > since]
+
+    def iter_events(self, name, columns, time_column, since):
+        """Like ``read_events``, but as an iterator of DataFrame chunks.
+
+        Backends that can read a log piece by piece override this so a log
+        never has to fit in memory at once. As with ``read_raw``, listed
+        columns the log does not have are left out.
+        """
+        events = self.read_events(name, columns, time_column, since)
+        return None if events is None else iter([events])
+
+    def write_tables(self, tables):
+        raise NotImplementedError
+
+    def load(self):
+        data = from_tables(self.read_tables())
+        raw = self.read_raw('registrants', RAW_TABLES['registrants'])
+        if raw is not None:
+            registrants.apply_registrants(data, registrants.compact_registrants(raw))
+        posts = self.read_raw(social.TABLE, RAW_TABLES[social.TABLE])
+        if posts is not None:
+            social.apply_posts(data, social.rollup_posts(posts))
+        social.derive_engagements(data['social_data'])
+        claims = badges.update_badges(self)
+        if claims is not None:
+            badges.apply_badges(data, claims)
+        plays, listens = podcast.update_plays(self)
+        if plays is not None:
+            incremental.APPLY[podcast.LOG](data, plays)
+        if listens is not None:
+            podcast.apply_listens(data, listens)
+        analytics = sms.update_analytics(self)
+        if analytics is not None:
+            sms.apply_sms_analytics(data, analytics)
+        sessions = web.update_sessions(self)
+        if sessions is not None:
+            web.apply_sessions(data, sessions)
+        story_store = stories.update_stories(self)
+        if story_store is not None:
+            stories.apply_stories(data, story_store)
+        return data
+
+
+class _DirectorySource(DataSource):
+    """One file per table inside a directory."""
+    extension = None
+
+    def _table_path(self, name):
+        return os.path.join(self.path, name + self.extension)
+
+    def files(self):
+        return [self._table_path(name) for name in [*TABLES, *RAW_TABLES, *EVENT_TABLES, *BADGE_LOGS, *SMS_LOGS, *WEB_LOGS,
+                                                        *STORY_TABLES]]
+
+    def state_dir(self):
+        return os.path.join(self.path, '.state')
+
+    def read_tables(self):
+        return {
+            name: self._read(self._table_path(name))
+            for name in TABLES if os.path.exists(self._table_path(name))
+        }
+
+    def read_raw(self, name, columns):
+        path = self._table_path(name)
+        if not os.path.exists(path):
+            return None
+        return self._read(path, columns)
+
+    def write_tables(self, tables):
+        os.makedirs(self.path, exist_ok=True)
+        for name, df in tables.items():
+            self._write(df, self._table_path(name))
+
+
+class CSVSource(_DirectorySource):
+    extension = '.csv'
+
+    def _read(self, path, columns=None):
+        usecols = (lambda col: col in columns) if columns else None
+        return pd.read_csv(path, usecols=usecols)
+
+    def read_events(self, name, columns, time_column, since):
+        # Scan in chunks so only the new events are ever held in memory
+        chunks = self.iter_events(name, columns, time_column, since)
+        if chunks is None:
+            return None
+        chunks = list(chunks)
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+
+    def iter_events(self, name, columns, time_column, since):
+        path = self._table_path(name)
+        if not os.path.exists(path):
+            return None
+        return (
+            chunk if since is None else chunk[pd.to_datetime(chunk[time_column], errors='coerce') > since]
+            for chunk in pd.read_csv(path, usecols=lambda col: col in columns, chunksize=EVENT_CHUNK_ROWS)
+        )
+
+    def _write(self, df, path):
+        df.to_csv(path, index=False)
+
+
+class ParquetSource(_DirectorySource):
+    extension = '.parquet'
+
+    def _read(self, path, columns=None):
+        if columns:
+            import pyarrow.parquet as pq
+            present = set(pq.read_schema(path).names)
+            columns = [col for col in columns if col in present]
+        return pd.read_parquet(path, columns=columns)
+
+    def _write(self, df, path):
+        df.to_parquet(path, index=False)
+
+    def read_events(self, name, columns, time_column, since):
+        path = self._table_path(name)
+        if not os.path.exists(path):
+            return None
+        import pyarrow.parquet as pq
+        # Row groups entirely at or before the watermark are skipped using
+        # their min/max statistics, which only order like the times do for
+        # a timestamp column
+        filters = None
+        if since is not None and _is_timestamp(pq.read_schema(path), time_column):
+            filters = [(time_column, '>', since)]
+        events = pd.read_parquet(path, columns=columns, filters=filters)
+        if since is None:
+            return events
+        return events[pd.to_datetime(events[time_column], errors='coerce') > since]
+
+    def iter_events(self, name, columns, time_column, since):
+        path = self._table_path(name)
+        if not os.path.exists(path):
+            return None
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        columns = [col for col in columns if col in parquet.schema_arrow.names]
+        return self._iter_row_groups(parquet, columns, time_column, since)
+
+    @staticmethod
+    def _iter_row_groups(parquet, columns, time_column, since):
+        column = parquet.schema_arrow.get_field_index(time_column)
+        skip = since is not None and _is_timestamp(parquet.schema_arrow, time_column)
+        for group in range(parquet.num_row_groups):
+            stats = parquet.metadata.row_group(group).column(column).statistics
+            if skip and stats is not None and stats.has_min_max and pd.Timestamp(stats.max) <= since:
+                continue
+            for batch in parquet.iter_batches(batch_size=EVENT_CHUNK_ROWS, row_groups=[group], columns=columns):
+                chunk = batch.to_pandas()
+                yield chunk if since is None else chunk[pd.to_datetime(chunk[time_column], errors='coerce') > since]
+
+
+def _is_timestamp(schema, column):
+    """Whether ``column`` of the Arrow ``schema`` holds timestamps (rather than e.g. strings)."""
+    import pyarrow as pa
+    index = schema.get_field_index(column)
+    return index >= 0 and pa.types.is_timestamp(schema.field(index).type)
+
+
+class ExcelSource(DataSource):
+    """One worksheet per table in an .xlsx workbook (read with openpyxl)."""
+
+    def read_tables(self):
+        sheets = pd.read_excel(self.path, sheet_name=None, engine='openpyxl')
+        return {name: df for name, df in sheets.items() if name in TABLES}
+
+    def read_raw(self, name, columns):
+        try:
+            return pd.read_excel(self.path, sheet_name=name, engine='openpyxl',
+                                 usecols=lambda col: col in columns)
+        except ValueError:
+            # Worksheet not found
+            return None
+
+    def write_tables(self, tables):
+        with pd.ExcelWriter(self.path, engine='openpyxl') as writer:
+            for name, df in tables.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+
+
+class SQLiteSource(DataSource):
+    """One table per dataset in a SQLite database."""
+
+    def files(self):
+        # Writes in WAL mode land in the -wal file before the main database
+        return [self.path, self.path + '-wal']
+
+    def read_tables(self):
+        with sqlite3.connect(self.path) as conn:
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            return {
+                name: pd.read_sql_query(f'SELECT * FROM "{name}"', conn)
+                for name in TABLES if name in existing
+            }
+
+    def read_raw(self, name, columns):
+        with sqlite3.connect(self.path) as conn:
+            present = [row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')]
+            if not present:
+                return None
+            selected = ', '.join(f'"{col}"' for col in columns if col in present)
+            return pd.read_sql_query(f'SELECT {selected} FROM "{name}"', conn)
+
+    def read_events(self, name, columns, time_column, since):
+        if since is None:
+            return self.read_raw(name, columns)
+        with sqlite3.connect(self.path) as conn:
+            if not conn.execute(f'PRAGMA table_info("{name}")').fetchall():
+                return None
+            query, params = self._events_query(name, columns, time_column, since)
+            return pd.read_sql_query(query, conn, params=params)
+
+    @staticmethod
+    def _events_query(name, columns, time_column, since):
+        selected = ', '.join(f'"{col}"' for col in columns)
+        if since is None:
+            return f'SELECT {selected} FROM "{name}"', []
+        # Timestamps are stored as text, so compare on the date prefix,
+        # which is never later than the stored value in any ISO format
+        return f'SELECT {selected} FROM "{name}" WHERE "{time_column}" >= ?', [since.strftime('%Y-%m-%d')]
+
+    def iter_events(self, name, columns, time_column, since):
+        with sqlite3.connect(self.path) as conn:
+            present = [row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')]
+            if not present:
+                return None
+        columns = [col for col in columns if col in present]
+        return self._iter_query(*self._events_query(name, columns, time_column, since), time_column, since)
+
+    def _iter_query(self, query, params, time_column, since):
+        conn = sqlite3.connect(self.path)
+        try:
+            for chunk in pd.read_sql_query(query, conn, params=params, chunksize=EVENT_CHUNK_ROWS):
+                yield chunk if since is None else chunk[pd.to_datetime(chunk[time_column], errors='coerce') > since]
+        finally:
+            conn.close()
+
+    def write_tables(self, tables):
+        with sqlite3.connect(self.path) as conn:
+            for name, df in tables.items():
+                df.to_sql(name, conn, if_exists='replace', index=False)
+
+
+def open_source(path):
+    """Pick the backend for ``path`` from its extension or directory contents."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        return ExcelSource(path)
+    if ext in ('.db', '.sqlite', '.sqlite3'):
+        return SQLiteSource(path)
+    if ext == '.parquet' or (os.path.isdir(path) and any(f.endswith('.parquet') for f in os.listdir(path))):
+        return ParquetSource(path)
+    if ext in ('', '.csv'):
+        return CSVSource(path)
+    raise ValueError(f"Unsupported data source: {path}")
+
+
+def list_cohorts(path):
+    """Cohort ids under ``<path>/cohorts/``, oldest first; empty if there are none."""
+    if not path or not os.path.isdir(os.path.join(path, COHORTS_DIR)):
+        return []
+    entries = os.listdir(os.path.join(path, COHORTS_DIR))
+    return sorted({os.path.splitext(entry)[0] for entry in entries if not entry.startswith('.')})
+
+
+def cohort_path(path, cohort):
+    """Path of the source holding ``cohort`` under ``<path>/cohorts/``."""
+    cohorts_dir = os.path.join(path, COHORTS_DIR)
+    for entry in sorted(os.listdir(cohorts_dir)):
+        if os.path.splitext(entry)[0] == cohort and not entry.startswith('.'):
+            return os.path.join(cohorts_dir, entry)
+    raise ValueError(f"Unknown cohort: {cohort}")
+
+
+def data_version(path=None, cohort=None):
+    """Cheap stamp that changes when the source files change or the TTL period ends."""
+    if not path:
+        return None
+    if cohort is not None:
+        path = cohort_path(path, cohort)
+    return open_source(path).signature(), int(time.time() // DATA_TTL_SECONDS)
+
+
+def load_data(path=None, cohort=None):
+    """Return the dashboard data dicts from ``path`` (or one of its cohorts), or the built-in data."""
+    if not path:
+        return copy.deepcopy(BUILTIN_DATA)
+    if cohort is not None:
+        path = cohort_path(path, cohort)
+    return open_source(path).load()
+
+
+def write_data(data, path):
+    """Write dashboard data dicts to ``path`` in that backend's format."""
+    open_source(path).write_tables(to_tables(data))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit("usage: python data_sources.py <csv dir | parquet dir | .xlsx | .db>")
+    write_data(BUILTIN_DATA, sys.argv[1])
+    print(f"Wrote built-in data to {sys.argv[1]}")
@@ -0,0 +1,153 @@
+"""Static snapshot export of the Self-Care School Dashboard.
+
+``python app.py --export out/`` runs the normal dashboard script without a
+Streamlit server. Before anything is rendered, app.py swaps its ``st`` module
+for a ``StaticPage``, which records every ``st.markdown``, ``st.plotly_chart``
+and ``st.dataframe`` call made by the usual render functions. The recording
+is then written out as:
+
+- ``index.html``: one self-contained page with every tab, with the Plotly JS
+  bundle inlined once and shared by all figures
+- ``<section>-<n>.png`` / ``.pdf``: each figure, named after the section
+  (``sub-header``) it appears in. This needs the optional ``kaleido``
+  package; without it only the HTML is written.
+"""
+import contextlib
+import html
+import os
+import re
+import textwrap
+
+import plotly.offline
+
+EXPORT_FLAG = '--export'
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<script type="text/javascript">{plotly_js}</script>
+<style>
+    body {{ font-family: "Source Sans Pro", -apple-system, "Segoe UI", Roboto, sans-serif; color: #31333f; max-width: 1200px; margin: 0 auto; padding: 24px; }}
+    .export-tab {{ font-size: 1.5rem; font-weight: 700; color: #4338ca; margin: 48px 0 16px; padding-bottom: 8px; border-bottom: 2px solid #e0e7ff; }}
+    .data-table {{ border-collapse: collapse; width: 100%; margin: 12px 0; font-size: 0.9rem; }}
+    .data-table th, .data-table td {{ border: 1px solid #e5e7eb; padding: 6px 10px; text-align: left; }}
+    .data-table th {{ background-color: #f9fafb; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def export_dir_from_args(argv):
+    """Return the directory given after ``--export`` in ``argv``, if any."""
+    if EXPORT_FLAG not in argv:
+        return None
+    index = argv.index(EXPORT_FLAG)
+    if index + 1 >= len(argv):
+        raise SystemExit("usage: python app.py --export <output directory>")
+    return argv[index + 1]
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'dashboard'
+
+
+class StaticPage:
+    """Stand-in for the ``streamlit`` module that records output as static HTML."""
+
+    def __init__(self):
+        self.title = "Self-Care School Dashboard"
+        self.parts = []
+        self.figures = []
+        self.section = 'overview'
+
+    # Streamlit API used by app.py
+
+    def set_page_config(self, page_title=None, **kwargs):
+        if page_title:
+            self.title = page_title
+
+    def experimental_get_query_params(self):
+        return {}
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        selected = options[index]
+        self.parts.append(f'<p><strong>{html.escape(label)}:</strong> {html.escape(str(selected))}</p>')
+        return selected
+
+    def text_input(self, label, value='', **kwargs):
+        if value:
+            self.parts.append(f'<p><strong>{html.escape(label)}:</strong> {html.escape(value)}</p>')
+        return value
+
+    def markdown(self, body, unsafe_allow_html=False):
+        body = textwrap.dedent(body)
+        match = re.search(r'<p class="sub-header">(.*?)</p>', body)
+        if match:
+            self.section = _slug(html.unescape(match.group(1)))
+        self.parts.append(body if unsafe_allow_html else f'<p>{html.escape(body)}</p>')
+
+    def plotly_chart(self, fig, use_container_width=False, **kwargs):
+        self.figures.append((self.section, fig))
+        self.parts.append(fig.to_html(
+            full_html=False,
+            include_plotlyjs=False,
+            default_width='100%',
+            config={'displaylogo': False, 'responsive': True}
+        ))
+
+    def dataframe(self, data, use_container_width=False, hide_index=False, **kwargs):
+        self.parts.append(data.to_html(index=not hide_index, classes='data-table', border=0))
+
+    @contextlib.contextmanager
+    def _block(self, open_tag, close_tag):
+        self.parts.append(open_tag)
+        yield
+        self.parts.append(close_tag)
+
+    def tabs(self, labels):
+        return [self._block(f'<h1 class="export-tab">{html.escape(label)}</h1>', '') for label in labels]
+
+    def columns(self, spec):
+        # Entered columns are written one below the other at their share of
+        # the width, centered; columns that are never entered write nothing
+        weights = [1] * spec if isinstance(spec, int) else spec
+        return [
+            self._block(f'<div style="width: {weight / sum(weights) * 100:.0f}%; margin: 0 auto;">', '</div>')
+            for weight in weights
+        ]
+
+    # Output
+
+    def write_to(self, out_dir):
+        """Write index.html and, if kaleido is installed, per-section figure images."""
+        os.makedirs(out_dir, exist_ok=True)
+        page = PAGE.format(
+            title=html.escape(self.title),
+            plotly_js=plotly.offline.get_plotlyjs(),
+            body='\n'.join(self.parts)
+        )
+        index_path = os.path.join(out_dir, 'index.html')
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.write(page)
+        written = [index_path]
+
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            print("kaleido is not installed; skipping PNG/PDF export (pip install kaleido)")
+        else:
+            counts = {}
+            for section, fig in self.figures:
+                counts[section] = counts.get(section, 0) + 1
+                for ext in ('png', 'pdf'):
+                    path = os.path.join(out_dir, f'{section}-{counts[section]}.{ext}')
+                    fig.write_image(path, width=1100, height=fig.layout.height or 450)
+                    written.append(path)
+        return written
@@ -0,0 +1,113 @@
+"""Monte Carlo KPI forecasts for the "KPI Forecast with Recommended Actions" section.
+
+Each weekly series the dashboard has (badge claims, podcast plays and, with a
+story table, stories submitted) is projected to the end of the program with
+a simple trend/decay model: the log of the weekly value is a random walk
+whose drift is the average week-over-week log change so far and whose
+volatility is the spread of those changes. The drift is estimated from a
+handful of weeks, so each path also draws its own drift around it.
+
+``PATHS`` paths are simulated at once as one paths x weeks array, and the
+bands shown are percentiles across the paths (``BAND``). Forecasts are
+computed once per data version as part of the shared snapshot (see
+snapshot.py), and the generator is seeded, so the same data always gives the
+same bands.
+"""
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from data_sources import week_names
+
+# Simulated paths per series
+PATHS = 10_000
+
+# Weeks in the program, Week 0 to Week PROGRAM_WEEKS - 1
+PROGRAM_WEEKS = int(os.environ.get('DASHBOARD_PROGRAM_WEEKS', 6))
+
+# Percentiles of the low end, midpoint and high end of a forecast band
+BAND = (10, 50, 90)
+
+# Week-over-week log volatility assumed for a series with fewer than three weeks
+DEFAULT_VOLATILITY = 0.25
+
+SEED = 2025
+
+Forecast = namedtuple('Forecast', [
+    'name', 'weeks', 'history', 'future_weeks', 'low', 'median', 'high', 'total', 'target', 'cumulative', 'chance'
+])
+
+
+def simulate(series, weeks, paths=PATHS, rng=None, cap=None):
+    """``(paths, weeks)`` array of simulated values for the weeks after ``series``, optionally capped at ``cap``."""
+    rng = rng or np.random.default_rng(SEED)
+    logs = np.log(np.maximum(np.asarray(series, dtype=np.float64), 1))
+    steps = np.diff(logs)
+    drift = steps.mean() if len(steps) else 0.0
+    volatility = steps.std(ddof=1) if len(steps) > 1 else DEFAULT_VOLATILITY
+    drifts = drift + volatility / np.sqrt(max(len(steps), 1)) * rng.standard_normal((paths, 1))
+    shocks = volatility * rng.standard_normal((paths, weeks))
+    values = np.exp(logs[-1] + np.cumsum(drifts + shocks, axis=1))
+    return np.minimum(values, cap) if cap is not None else values
+
+
+def forecast(name, weekly, target=None, cumulative=False, so_far=None, cap=None,
+             program_weeks=PROGRAM_WEEKS, paths=PATHS):
+    """Forecast of the ``{'Week N': value}`` series ``weekly`` to the end of the program.
+
+    ``target`` is a weekly target, reached if the program's last week gets
+    there, or with ``cumulative`` a target for the program total, which
+    starts from ``so_far`` (the sum of the series by default). A program
+    already past its last week is forecast one week ahead. Returns None for
+    an empty series.
+    """
+    weeks = week_names(weekly)
+    if not weeks:
+        return None
+    history = [weekly[week] for week in weeks]
+    last = int(weeks[-1][5:])
+    future_weeks = [f'Week {week}' for week in range(last + 1, max(program_weeks, last + 2))]
+
+    # Whole counts, so a path landing exactly on the target reaches it
+    values = simulate(history, len(future_weeks), paths, np.random.default_rng(SEED), cap).round()
+    low, median, high = np.percentile(values, BAND, axis=0)
+    totals = (sum(history) if so_far is None else so_far) + values.sum(axis=1)
+    chance = None
+    if target is not None:
+        reached = totals >= target if cumulative else values[:, -1] >= target
+        chance = float(reached.mean())
+    return Forecast(
+        name=name,
+        weeks=weeks,
+        history=history,
+        future_weeks=future_weeks,
+        low=low.round().tolist(),
+        median=median.round().tolist(),
+        high=high.round().tolist(),
+        total=np.percentile(totals, BAND).round().tolist(),
+        target=target,
+        cumulative=cumulative,
+        chance=chance
+    )
+
+
+def forecasts(data):
+    """``{name: Forecast}`` for each weekly series in ``data``."""
+    badges_data = data['badges_data']
+    podcast_data = data['podcast_data']
+    results = {
+        'Badge Claims': forecast(
+            'Badge Claims', {week: badges_data[week] for week in week_names(badges_data)},
+            target=badges_data['Target'], cap=data['program_metrics']['Registrants']['value']
+        ),
+        'Podcast Plays': forecast('Podcast Plays', podcast_data['Weekly Plays'])
+    }
+    story_store = data.get('story_store')
+    if story_store is not None:
+        weekly = {week: sum(counts) for week, counts in story_store.counts_by_week().items()}
+        results['Story Submissions'] = forecast(
+            'Story Submissions', weekly, target=data['stories_data']['Target'], cumulative=True,
+            so_far=data['stories_data']['Submitted']
+        )
+    return {name: result for name, result in results.items() if result is not None}
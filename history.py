@@ -0,0 +1,169 @@
+"""Metric history for the Self-Care School Dashboard.
+
+Every data refresh snapshots each numeric metric into a SQLite database
+(``DASHBOARD_HISTORY_DB``). Snapshots are taken at most once per
+``SNAPSHOT_SECONDS`` (hourly by default); a later refresh within the same
+hour replaces that hour's value.
+
+Alongside the raw snapshots the store keeps ``daily``, ``weekly`` (Monday
+start) and ``monthly`` rollups with the first, last, lowest and highest value
+of each period. The rollups are upserted as snapshots arrive, so a trend
+query is a primary-key range read of at most ``TREND_POINTS`` rows per metric
+and never scans the raw snapshots, however long the history grows.
+
+Metric names are ``<table>.<key>`` (e.g. ``traffic_data.Visitors``) for the
+dashboard data and ``kpi.<name>`` for the KPI progress values.
+"""
+import datetime
+import os
+import sqlite3
+import threading
+
+SNAPSHOT_SECONDS = int(os.environ.get('DASHBOARD_HISTORY_INTERVAL', 3600))
+
+# Raw snapshots older than this are dropped; the rollups are kept
+SNAPSHOT_RETENTION_DAYS = 400
+
+GRAINS = ('daily', 'weekly', 'monthly')
+
+# Number of periods shown in a trend sparkline
+TREND_POINTS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    metric TEXT NOT NULL,
+    at INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (at, metric)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    grain TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    first REAL NOT NULL,
+    last REAL NOT NULL,
+    low REAL NOT NULL,
+    high REAL NOT NULL,
+    PRIMARY KEY (grain, metric, bucket)
+) WITHOUT ROWID;
+"""
+
+UPSERT_SNAPSHOT = """
+INSERT INTO snapshots (metric, at, value) VALUES (?, ?, ?)
+ON CONFLICT (at, metric) DO UPDATE SET value = excluded.value
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (grain, metric, bucket, first, last, low, high) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (grain, metric, bucket) DO UPDATE SET
+    last = excluded.last,
+    low = min(low, excluded.low),
+    high = max(high, excluded.high)
+"""
+
+# Open stores and the last snapshot written to each (per set of metrics, e.g.
+# per cohort), so reruns with unchanged data skip the write
+_stores = {}
+_recorded = {}
+_lock = threading.Lock()
+
+
+def metrics_from(data, kpi_results=None, prefix=''):
+    """Flatten the dashboard data (and KPI progress results) into ``{metric: value}``.
+
+    ``prefix`` is prepended to every name, e.g. to keep one series per cohort.
+    """
+    metrics = {}
+    for table in ('program_metrics', 'age_data'):
+        for key, fields in data[table].items():
+            metrics[f'{prefix}{table}.{key}'] = fields['value']
+    for table in ('traffic_data', 'stream_data', 'social_data', 'badges_data', 'stories_data', 'podcast_data'):
+        for key, value in data[table].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metrics[f'{prefix}{table}.{key}'] = value
+    for name, result in (kpi_results or {}).get('progress', {}).items():
+        if result['current'] is not None:
+            metrics[f'{prefix}kpi.{name}'] = result['current']
+    return metrics
+
+
+def bucket_start(at, grain):
+    """Start of the ``grain`` period containing the UTC timestamp ``at`` (seconds)."""
+    day = at - at % 86400
+    if grain == 'daily':
+        return day
+    if grain == 'weekly':
+        # 1970-01-01 was a Thursday; step back to the Monday
+        days = day // 86400
+        return (days - (days + 3) % 7) * 86400
+    date = datetime.datetime.fromtimestamp(day, tz=datetime.timezone.utc)
+    return int(date.replace(day=1).timestamp())
+
+
+class HistoryStore:
+    """Snapshots and rollups of every dashboard metric in one SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        with sqlite3.connect(self.path) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def record(self, metrics, at=None):
+        """Snapshot ``metrics`` at ``at`` (default now); returns False if nothing changed."""
+        at = int(at if at is not None else datetime.datetime.now(datetime.timezone.utc).timestamp())
+        at -= at % SNAPSHOT_SECONDS
+        items = tuple(sorted(metrics.items()))
+        key = (self.path, tuple(metric for metric, _ in items))
+        with _lock:
+            if _recorded.get(key) == (at, items):
+                return False
+
+            snapshot_rows = [(metric, at, value) for metric, value in items]
+            rollup_rows = [
+                (grain, metric, bucket_start(at, grain), value, value, value, value)
+                for grain in GRAINS for metric, value in items
+            ]
+            with sqlite3.connect(self.path) as conn:
+                new_snapshot = conn.execute('SELECT 1 FROM snapshots WHERE at = ? LIMIT 1', (at,)).fetchone() is None
+                conn.executemany(UPSERT_SNAPSHOT, snapshot_rows)
+                conn.executemany(UPSERT_ROLLUP, rollup_rows)
+                if new_snapshot:
+                    conn.execute('DELETE FROM snapshots WHERE at < ?', (at - SNAPSHOT_RETENTION_DAYS * 86400,))
+            _recorded[key] = (at, items)
+        return True
+
+    def trends(self, metrics, grain='daily', points=TREND_POINTS, at=None):
+        """Return ``{metric: [last value of each period]}`` for the latest ``points`` periods."""
+        if grain not in GRAINS:
+            raise ValueError(f"Unknown trend grain: {grain}")
+        at = int(at if at is not None else datetime.datetime.now(datetime.timezone.utc).timestamp())
+        # Period length is at most 31 days, so this start covers ``points`` periods
+        since = bucket_start(at - (points - 1) * {'daily': 1, 'weekly': 7, 'monthly': 31}[grain] * 86400, grain)
+
+        series = {metric: [] for metric in metrics}
+        placeholders = ', '.join('?' * len(series))
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute(
+                f'SELECT metric, last FROM rollups WHERE grain = ? AND metric IN ({placeholders}) AND bucket >= ? '
+                'ORDER BY metric, bucket',
+                [grain, *series, since]
+            ).fetchall()
+        for metric, value in rows:
+            series[metric].append(value)
+        return {metric: values[-points:] for metric, values in series.items()}
+
+
+def open_store(path):
+    """The shared ``HistoryStore`` for ``path``, creating the database on first use."""
+    with _lock:
+        if path not in _stores:
+            _stores[path] = HistoryStore(path)
+        return _stores[path]
+
+
+def track(path, metrics, grain='daily', points=TREND_POINTS):
+    """Snapshot ``metrics`` into the store at ``path`` and return their trends."""
+    store = open_store(path)
+    store.record(metrics)
+    return store.trends(list(metrics), grain=grain, points=points)
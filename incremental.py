@@ -0,0 +1,225 @@
+"""Incremental aggregation of append-only event feeds.
+
+Event logs such as podcast plays only ever grow, so recomputing their
+totals from the full log on every refresh wastes work. An
+``IncrementalAggregator`` keeps per-key running counts, an exact bitmap of
+distinct user ids and the timestamp of the newest event applied (the
+watermark). A refresh only reads and applies events newer than the
+watermark; the state is saved to disk so it survives restarts.
+
+Feeds (see ``FEEDS``) and the columns their logs must have:
+
+- ``podcast_plays``: ``user_id``, ``week``, ``day``, ``played_at``
+
+User ids must be non-negative integers. Events are assumed to be appended in
+time order: an event stamped at or before the watermark is treated as
+already applied.
+
+Badge claims are aggregated the same way, with a user bitmap per week, by
+badges.py, and SMS clicks together with the deliveries they follow by sms.py.
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Number of set bits for every byte value
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# Masks for counting the bits of 64-bit words in parallel (SWAR popcount)
+_M1, _M2, _M4, _H01 = (np.uint64(mask) for mask in (0x5555555555555555, 0x3333333333333333,
+                                                      0x0f0f0f0f0f0f0f0f, 0x0101010101010101))
+
+
+def _popcount(bits):
+    """Number of set bits in a uint8 array, counted eight bytes at a time."""
+    whole = len(bits) // 8 * 8
+    words = bits[:whole].view(np.uint64)
+    words = words - ((words >> np.uint64(1)) & _M1)
+    words = (words & _M2) + ((words >> np.uint64(2)) & _M2)
+    words = (words + (words >> np.uint64(4))) & _M4
+    counts = (words * _H01) >> np.uint64(56)
+    return int(counts.sum(dtype=np.int64)) + int(_POPCOUNT[bits[whole:]].sum(dtype=np.int64))
+
+
+class UserBitmap:
+    """Exact set of non-negative integer user ids, one bit per id."""
+
+    def __init__(self, bits=None):
+        self.bits = np.zeros(0, dtype=np.uint8) if bits is None else bits
+
+    def add(self, ids):
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if not len(ids):
+            return
+        if ids[0] < 0:
+            raise ValueError("User ids must be non-negative integers")
+        needed = int(ids[-1] >> 3) + 1
+        if needed > len(self.bits):
+            # Grow geometrically so repeated small appends stay cheap
+            grown = np.zeros(max(needed, 2 * len(self.bits)), dtype=np.uint8)
+            grown[:len(self.bits)] = self.bits
+            self.bits = grown
+        np.bitwise_or.at(self.bits, ids >> 3, (1 << (ids & 7)).astype(np.uint8))
+
+    def __len__(self):
+        return _popcount(self.bits)
+
+    def __contains__(self, user_id):
+        byte = user_id >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (user_id & 7)))
+
+    def _aligned(self, other):
+        size = max(len(self.bits), len(other.bits))
+        return (np.pad(self.bits, (0, size - len(self.bits))),
+                np.pad(other.bits, (0, size - len(other.bits))))
+
+    def __or__(self, other):
+        a, b = self._aligned(other)
+        return UserBitmap(a | b)
+
+    def __and__(self, other):
+        a, b = self._aligned(other)
+        return UserBitmap(a & b)
+
+    def __sub__(self, other):
+        a, b = self._aligned(other)
+        return UserBitmap(a & ~b)
+
+    def ids(self):
+        """The user ids in the set, sorted."""
+        return np.flatnonzero(np.unpackbits(self.bits, bitorder='little'))
+
+
+class IdCodes:
+    """Dense codes 0, 1, 2, ... for arbitrary integer ids, in the order the ids are first added.
+
+    The ids seen so far are kept sorted next to their codes, so looking up a
+    chunk of ids is one ``np.searchsorted`` of its distinct ids. Memory grows with the number of
+    distinct ids rather than with their values, so phone numbers or hashed
+    ids can index dense per-id arrays and bitmaps through their codes.
+    """
+
+    def __init__(self, ids=None, codes=None):
+        self.ids = np.zeros(0, dtype=np.int64) if ids is None else ids
+        self.codes = np.zeros(0, dtype=np.int64) if codes is None else codes
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _lookup_unique(self, unique):
+        # Sorted queries walk the sorted ids in order, which is several times
+        # faster than searching for the ids of a chunk in log order
+        positions = np.minimum(np.searchsorted(self.ids, unique), max(len(self.ids) - 1, 0))
+        codes = np.full(len(unique), -1, dtype=np.int64)
+        if len(self.ids):
+            found = self.ids[positions] == unique
+            codes[found] = self.codes[positions[found]]
+        return codes
+
+    def lookup(self, ids):
+        """Codes of ``ids``; -1 for ids not added yet."""
+        unique, inverse = np.unique(np.asarray(ids, dtype=np.int64), return_inverse=True)
+        return self._lookup_unique(unique)[inverse]
+
+    def encode(self, ids):
+        """Codes of ``ids``, giving the ids not added yet the next free codes."""
+        unique, inverse = np.unique(np.asarray(ids, dtype=np.int64), return_inverse=True)
+        codes = self._lookup_unique(unique)
+        new = codes < 0
+        if new.any():
+            fresh = unique[new]
+            fresh_codes = np.arange(len(self.ids), len(self.ids) + len(fresh), dtype=np.int64)
+            positions = np.searchsorted(self.ids, fresh)
+            self.ids = np.insert(self.ids, positions, fresh)
+            self.codes = np.insert(self.codes, positions, fresh_codes)
+            codes[new] = fresh_codes
+        return codes[inverse]
+
+
+Feed = namedtuple('Feed', ['keys', 'user', 'time'])
+
+FEEDS = {
+    'podcast_plays': Feed(keys=['week', 'day'], user='user_id', time='played_at')
+}
+
+
+class IncrementalAggregator:
+    """Running per-key event counts, distinct users and a time watermark for one feed."""
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.counts = {}
+        self.users = UserBitmap()
+        self.watermark = None
+
+    @property
+    def columns(self):
+        return [*self.feed.keys, self.feed.user, self.feed.time]
+
+    def update(self, events):
+        """Apply the events newer than the watermark; returns how many were applied."""
+        times = pd.to_datetime(events[self.feed.time])
+        if self.watermark is not None:
+            newer = (times > self.watermark).to_numpy()
+            events, times = events[newer], times[newer]
+        if not len(events):
+            return 0
+
+        grouped = events.groupby(self.feed.keys, sort=False, observed=True).size()
+        for key, count in grouped.items():
+            key = key if isinstance(key, tuple) else (key,)
+            key = tuple(k.item() if hasattr(k, 'item') else k for k in key)
+            self.counts[key] = self.counts.get(key, 0) + int(count)
+        self.users.add(events[self.feed.user].to_numpy())
+        self.watermark = times.max()
+        return len(events)
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def save(self, path):
+        """Write the state to ``path`` (.npz), replacing any previous state atomically."""
+        meta = {
+            'counts': [[list(key), count] for key, count in self.counts.items()],
+            'watermark': self.watermark.isoformat() if self.watermark is not None else None
+        }
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, bits=self.users.bits, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, feed, path):
+        """Restore the state saved at ``path``, or start empty if there is none."""
+        aggregator = cls(feed)
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as state:
+                meta = json.loads(str(state['meta']))
+                aggregator.users = UserBitmap(state['bits'])
+            aggregator.counts = {tuple(key): count for key, count in meta['counts']}
+            if meta['watermark'] is not None:
+                aggregator.watermark = pd.Timestamp(meta['watermark'])
+        return aggregator
+
+
+def apply_podcast_plays(data, aggregator):
+    podcast = data['podcast_data']
+    for episode in podcast['Episodes']:
+        episode['plays'] = aggregator.counts.get((episode['week'], episode['day']), 0)
+
+    weekly = {}
+    for (week, _), count in aggregator.counts.items():
+        weekly[f'Week {week}'] = weekly.get(f'Week {week}', 0) + count
+    podcast['Weekly Plays'] = {
+        name: weekly.get(name, 0)
+        for name in sorted({*podcast['Weekly Plays'], *weekly}, key=lambda name: int(name.split()[-1]))
+    }
+    podcast['Total Plays'] = aggregator.total()
+    podcast['Average Plays'] = round(aggregator.total() / max(len(podcast['Episodes']), 1))
+
+
+APPLY = {
+    'podcast_plays': apply_podcast_plays
+}
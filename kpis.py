@@ -0,0 +1,175 @@
+"""Declarative KPI registry for the Self-Care School Dashboard.
+
+Each entry in ``KPIS`` is an expression over the dashboard data (the dicts
+returned by ``data_sources.load_data``), the datasets it reads, a target and
+the status thresholds. ``evaluate`` computes every KPI once per data version.
+Results are memoized per KPI on a fingerprint of only that KPI's inputs, so
+when one dataset changes only the KPIs reading it are recomputed.
+
+Groups:
+
+- ``progress``: the KPI progress bars, with a status and status color
+- ``card``: ratios shown on metric cards
+- ``funnel``: conversion of each funnel stage relative to its base stage
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+from data_sources import week_names
+from profiling import CACHE_STATS
+
+KPI = namedtuple('KPI', ['name', 'group', 'inputs', 'value', 'target', 'thresholds', 'label'])
+KPI.__new__.__defaults__ = ((100, 10), None)
+
+# Percent of target needed for each status: at or above the first threshold is
+# Achieved, at or above the second is Behind, anything lower is At Risk. A KPI
+# without a value or target (e.g. a cohort with no claims yet) has No Data.
+STATUS_COLORS = {
+    'Achieved': '#10b981',
+    'Behind': '#f59e0b',
+    'At Risk': '#ef4444',
+    'No Data': '#9ca3af'
+}
+
+# Memoized KPI results kept across data versions (e.g. several cohorts)
+RESULT_CACHE_ENTRIES = 512
+
+
+def _weeks(badges_data):
+    return [badges_data[week] for week in week_names(badges_data)]
+
+
+def _average(values):
+    return sum(values) / len(values) if values else None
+
+
+KPIS = [
+    # KPI progress bars
+    KPI('Enrollment', 'progress', ('program_metrics',),
+        value=lambda d: d['program_metrics']['Registrants']['value'],
+        target=lambda d: d['program_metrics']['Registrants']['target']),
+    KPI('18-25 Enrollment', 'progress', ('age_data',),
+        value=lambda d: d['age_data']['18-25']['value'],
+        target=5000),
+    KPI('Average Weekly Badges', 'progress', ('badges_data',),
+        value=lambda d: _average(_weeks(d['badges_data'])),
+        target=lambda d: d['badges_data']['Target']),
+    KPI('Site Traffic', 'progress', ('traffic_data',),
+        value=lambda d: d['traffic_data']['Visitors'],
+        target=250000),
+    KPI('Downloads', 'progress', ('stream_data',),
+        value=lambda d: d['stream_data']['Downloads'],
+        target=lambda d: d['stream_data']['Target']),
+    KPI('Stories Submitted', 'progress', ('stories_data',),
+        value=lambda d: d['stories_data']['Submitted'],
+        target=lambda d: d['stories_data']['Target']),
+
+    # Metric card ratios
+    KPI('Badge Claims', 'card', ('badges_data',),
+        value=lambda d: d['badges_data']['Total Claimed'],
+        target=lambda d: len(_weeks(d['badges_data'])) * d['badges_data']['Target']),
+    KPI('Badge Reach', 'card', ('badges_data', 'program_metrics'),
+        value=lambda d: d['badges_data']['Unique Users'],
+        target=lambda d: d['program_metrics']['Registrants']['value']),
+    KPI('Engagement Rate', 'card', ('social_data',),
+        value=lambda d: d['social_data']['Direct Engagements'],
+        target=lambda d: d['social_data']['Impressions Delivered']),
+
+    # Funnel stages; the target is the stage the conversion is measured against
+    KPI('Impressions (Ads)', 'funnel', ('social_data',),
+        value=lambda d: d['social_data']['Impressions Delivered'],
+        target=None),
+    KPI('Visitors', 'funnel', ('traffic_data', 'social_data'),
+        value=lambda d: d['traffic_data']['Visitors'],
+        target=lambda d: d['social_data']['Impressions Delivered'], label='impressions'),
+    KPI('Registrants', 'funnel', ('program_metrics', 'traffic_data'),
+        value=lambda d: d['program_metrics']['Registrants']['value'],
+        target=lambda d: d['traffic_data']['Visitors'], label='visitors'),
+    KPI('Downloads', 'funnel', ('stream_data', 'program_metrics'),
+        value=lambda d: d['stream_data']['Downloads'],
+        target=lambda d: d['program_metrics']['Registrants']['value'], label='registrants'),
+    KPI('Week 0 Complete', 'funnel', ('program_metrics',),
+        value=lambda d: d['program_metrics']['Completed Week 0']['value'],
+        target=lambda d: d['program_metrics']['Registrants']['value'], label='registrants'),
+]
+
+
+def status_for(percentage, thresholds):
+    if percentage is None:
+        return 'No Data'
+    achieved, behind = thresholds
+    if percentage >= achieved:
+        return 'Achieved'
+    if percentage >= behind:
+        return 'Behind'
+    return 'At Risk'
+
+
+def _fingerprint(value):
+    encoded = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _compute(kpi, data):
+    current = kpi.value(data)
+    target = kpi.target(data) if callable(kpi.target) else kpi.target
+    percent = current / target * 100 if current is not None and target else None
+    result = {
+        'current': current,
+        'target': target,
+        'percent': percent,
+        'percentage': round(percent) if percent is not None else None,
+        'label': kpi.label
+    }
+    if kpi.group == 'progress':
+        result['status'] = status_for(percent, kpi.thresholds)
+        result['color'] = STATUS_COLORS[result['status']]
+    return result
+
+
+def percent_text(result, spec='.0f'):
+    """The percent of a KPI result formatted with ``spec``, or 'n/a' if it has none."""
+    percent = result['percent']
+    return 'n/a' if percent is None else f"{percent:{spec}}%"
+
+
+class KPIEngine:
+    """Evaluates a KPI registry, recomputing only KPIs whose inputs changed."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.stats = CACHE_STATS['kpis']
+
+    def evaluate(self, data):
+        """Return ``{group: {name: result}}`` for ``data``."""
+        inputs = {name for kpi in self.registry for name in kpi.inputs}
+        fingerprints = {name: _fingerprint(data[name]) for name in inputs}
+
+        results = {}
+        with self._lock:
+            for kpi in self.registry:
+                key = (kpi.group, kpi.name, tuple(fingerprints[name] for name in kpi.inputs))
+                if key in self._results:
+                    self._results.move_to_end(key)
+                    self.stats['hits'] += 1
+                else:
+                    self._results[key] = _compute(kpi, data)
+                    self.computed += 1
+                    self.stats['misses'] += 1
+                    if len(self._results) > RESULT_CACHE_ENTRIES:
+                        self._results.popitem(last=False)
+                results.setdefault(kpi.group, {})[kpi.name] = self._results[key]
+        return results
+
+
+# Shared by every session in the process
+ENGINE = KPIEngine(KPIS)
+
+
+def evaluate(data):
+    return ENGINE.evaluate(data)
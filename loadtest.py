@@ -0,0 +1,354 @@
+"""Concurrent-viewer load test for the Self-Care School Dashboard.
+
+Starts ``streamlit run app.py`` on a free local port and drives it with
+simulated viewers that talk Streamlit's websocket protocol the way a browser
+does. Each viewer opens the page, then performs a number of actions with some
+think time in between: switching between the Dashboard and Analysis tabs,
+picking a podcast week, or rerunning the page. Every page load and action is
+timed from the request to the end of the script run::
+
+    python loadtest.py
+    python loadtest.py --users 1 10 25 50 --actions 10 --report loadtest.html
+
+Viewers are added level by level; at each level that many viewers run at the
+same time. For every level the report has the p50/p90/p95/p99 latency of
+page loads and of actions, the error count, and the server's CPU (percent of
+one core) and resident memory, sampled from ``/proc``. It names the largest
+level whose p95 page load stays within ``--p95`` seconds; the command exits
+non-zero if even the smallest level does not.
+
+Everything runs offline: the server listens on 127.0.0.1 with usage
+statistics off, and the report is one self-contained HTML file. The server
+inherits the environment, so ``DASHBOARD_DATA_SOURCE`` (e.g. a source written
+by synthetic.py) applies.
+"""
+import argparse
+import asyncio
+import html
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.offline
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+import export
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+USERS = [1, 5, 10, 25, 50]
+ACTIONS = 5
+THINK_SECONDS = 1.0
+P95_SECONDS = 2.0
+SEED = 42
+
+# Relative weights of the actions a viewer picks from
+ACTION_WEIGHTS = {'tab': 3, 'week': 3, 'rerun': 1}
+
+# Keys of the tab selectors in app.py (lazy render mode)
+MAIN_TAB = 'main_tab'
+PODCAST_WEEK = 'podcast_week'
+
+PERCENTILES = [50, 90, 95, 99]
+SAMPLE_SECONDS = 0.5
+STARTUP_SECONDS = 60
+CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+class Viewer:
+    """One simulated browser session."""
+
+    def __init__(self, url, query, rng):
+        self.url = url
+        self.query = query
+        self.rng = rng
+        self.ws = None
+        # Radio widgets seen so far: key -> (widget id, options), and the
+        # values this viewer has picked, sent back with every rerun
+        self.widgets = {}
+        self.values = {}
+        self.received_bytes = 0
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.url, max_message_size=1 << 30)
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+
+    async def run_script(self):
+        """Ask for a script run and wait until it finishes; returns the latency in seconds."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query
+        msg.rerun_script.page_script_hash = ''
+        for widget_id, value in self.values.items():
+            state = WidgetState(id=widget_id, int_value=value)
+            msg.rerun_script.widget_states.widgets.append(state)
+
+        start = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise ConnectionError("server closed the connection")
+            self.received_bytes += len(raw)
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                if element.WhichOneof('type') == 'radio':
+                    key = element.radio.id.rsplit('-', 1)[-1]
+                    self.widgets[key] = (element.radio.id, list(element.radio.options))
+                elif element.WhichOneof('type') == 'exception':
+                    raise RuntimeError(element.exception.message)
+            elif kind == 'script_finished':
+                if forward.script_finished != forward.FINISHED_SUCCESSFULLY:
+                    raise RuntimeError(f"script run ended with status {forward.script_finished}")
+                return time.perf_counter() - start
+
+    def pick(self, key, value):
+        widget_id, _ = self.widgets[key]
+        self.values[widget_id] = value
+
+    def choose_action(self):
+        """Change the widget values for a random action and return its name."""
+        actions = [action for action in ACTION_WEIGHTS if action != 'week' or PODCAST_WEEK in self.widgets]
+        if MAIN_TAB not in self.widgets:
+            actions = ['rerun']
+        action = self.rng.choices(actions, [ACTION_WEIGHTS[action] for action in actions])[0]
+        if action == 'tab':
+            widget_id, options = self.widgets[MAIN_TAB]
+            self.pick(MAIN_TAB, (self.values.get(widget_id, 0) + 1) % len(options))
+        elif action == 'week':
+            # The week selector is on the Dashboard tab
+            self.pick(MAIN_TAB, 0)
+            self.pick(PODCAST_WEEK, self.rng.randrange(len(self.widgets[PODCAST_WEEK][1])))
+        return action
+
+
+async def run_viewer(url, query, actions, think, rng, results):
+    """Open the page and perform ``actions`` actions, appending ``(kind, seconds)`` to ``results``."""
+    viewer = Viewer(url, query, rng)
+    try:
+        await asyncio.sleep(rng.random())
+        await viewer.connect()
+        results.append(('load', await viewer.run_script()))
+        for _ in range(actions):
+            await asyncio.sleep(rng.expovariate(1 / think) if think else 0)
+            viewer.choose_action()
+            results.append(('action', await viewer.run_script()))
+    except Exception as error:
+        results.append(('error', str(error) or type(error).__name__))
+    finally:
+        viewer.close()
+    return viewer.received_bytes
+
+
+def read_proc(pid):
+    """CPU seconds used so far and resident memory in bytes of process ``pid``."""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLK_TCK
+    rss = 0
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1]) * 1024
+    return cpu, rss
+
+
+async def sample_server(pid, samples, stop):
+    """Append ``(time, cpu percent, rss bytes)`` to ``samples`` until ``stop`` is set."""
+    last_time, (last_cpu, _) = time.perf_counter(), read_proc(pid)
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), SAMPLE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        now, (cpu, rss) = time.perf_counter(), read_proc(pid)
+        samples.append((now, (cpu - last_cpu) / (now - last_time) * 100, rss))
+        last_time, last_cpu = now, cpu
+
+
+async def run_level(url, pid, users, args, seed):
+    results, samples = [], []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_server(pid, samples, stop))
+    start = time.perf_counter()
+    received = await asyncio.gather(*[
+        run_viewer(url, args.query, args.actions, args.think, random.Random(seed * 100_003 + i), results)
+        for i in range(users)
+    ])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+
+    row = {'users': users, 'seconds': elapsed, 'received_mb': sum(received) / 2**20}
+    for kind in ('load', 'action'):
+        latencies = [value for k, value in results if k == kind]
+        row[f'{kind}_count'] = len(latencies)
+        for p in PERCENTILES:
+            row[f'{kind}_p{p}'] = float(np.percentile(latencies, p)) if latencies else float('nan')
+    row['errors'] = [value for kind, value in results if kind == 'error']
+    row['cpu_mean'] = float(np.mean([cpu for _, cpu, _ in samples])) if samples else float('nan')
+    row['cpu_max'] = max((cpu for _, cpu, _ in samples), default=float('nan'))
+    row['rss_mb'] = max((rss for _, _, rss in samples), default=0) / 2**20
+    row['samples'] = [(t - start, cpu, rss / 2**20) for t, cpu, rss in samples]
+    return row
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port):
+    """Start ``streamlit run app.py`` on ``port`` and wait until it is healthy."""
+    server = subprocess.Popen([
+        sys.executable, '-m', 'streamlit', 'run', APP,
+        '--server.headless', 'true',
+        '--server.address', '127.0.0.1',
+        '--server.port', str(port),
+        '--server.fileWatcherType', 'none',
+        '--browser.gatherUsageStats', 'false'
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + STARTUP_SECONDS
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited: {server.stderr.read().decode(errors='replace')}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"streamlit did not become healthy within {STARTUP_SECONDS}s")
+
+
+def capacity(rows, p95):
+    """Largest number of users whose p95 page load is within ``p95`` seconds, or None."""
+    within = [row['users'] for row in rows if row['load_p95'] <= p95 and not row['errors']]
+    return max(within, default=None)
+
+
+def print_row(row):
+    print(f"{row['users']:>6}{row['load_p50']:>9.3f}{row['load_p95']:>9.3f}{row['action_p50']:>9.3f}"
+          f"{row['action_p95']:>9.3f}{row['cpu_mean']:>8.0f}{row['rss_mb']:>9.0f}{len(row['errors']):>7}")
+
+
+def _table(headers, rows):
+    head = ''.join(f'<th>{html.escape(header)}</th>' for header in headers)
+    body = ''.join('<tr>' + ''.join(f'<td>{html.escape(str(cell))}</td>' for cell in row) + '</tr>' for row in rows)
+    return f'<table class="data-table"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def _figure_html(fig):
+    fig.update_layout(height=360, margin=dict(t=48, b=40, l=48, r=16), template='plotly_white')
+    return fig.to_html(full_html=False, include_plotlyjs=False, default_width='100%',
+                       config={'displaylogo': False, 'responsive': True})
+
+
+def write_report(path, rows, args):
+    """Write the results as one self-contained HTML page."""
+    users = [row['users'] for row in rows]
+    latency = go.Figure(layout_title_text='Latency by concurrent viewers')
+    for kind, dash in (('load', None), ('action', 'dot')):
+        for p in (50, 95):
+            latency.add_scatter(x=users, y=[row[f'{kind}_p{p}'] for row in rows], mode='lines+markers',
+                                name=f'{kind} p{p}', line=dict(dash=dash))
+    latency.add_hline(y=args.p95, line=dict(color='#ef4444', dash='dash'), annotation_text=f'{args.p95:g} s')
+    latency.update_layout(xaxis_title='viewers', yaxis_title='seconds')
+
+    server = go.Figure(layout_title_text='Server CPU and memory during each level')
+    for row in rows:
+        seconds = [t for t, _, _ in row['samples']]
+        server.add_scatter(x=seconds, y=[cpu for _, cpu, _ in row['samples']], name=f"{row['users']} CPU %")
+        server.add_scatter(x=seconds, y=[rss for _, _, rss in row['samples']], name=f"{row['users']} RSS MB",
+                           yaxis='y2', line=dict(dash='dot'))
+    server.update_layout(xaxis_title='seconds into level', yaxis_title='CPU % of one core',
+                         yaxis2=dict(title='RSS MB', overlaying='y', side='right'))
+
+    best = capacity(rows, args.p95)
+    verdict = (f'Up to <strong>{best}</strong> concurrent viewers keep the p95 page load within {args.p95:g} s.'
+               if best else f'No level kept the p95 page load within {args.p95:g} s.')
+    table = _table(
+        ['Viewers', 'Loads', *[f'Load p{p} s' for p in PERCENTILES], 'Actions',
+         *[f'Action p{p} s' for p in PERCENTILES], 'Errors', 'CPU mean %', 'CPU max %', 'RSS max MB', 'Received MB'],
+        [[row['users'], row['load_count'], *[f"{row[f'load_p{p}']:.3f}" for p in PERCENTILES], row['action_count'],
+          *[f"{row[f'action_p{p}']:.3f}" for p in PERCENTILES], len(row['errors']), f"{row['cpu_mean']:.0f}",
+          f"{row['cpu_max']:.0f}", f"{row['rss_mb']:.0f}", f"{row['received_mb']:.1f}"] for row in rows]
+    )
+    errors = [(row['users'], error) for row in rows for error in sorted(set(row['errors']))]
+    settings = (f"{args.actions} actions per viewer, {args.think:g} s mean think time, "
+                f"query string '{html.escape(args.query)}', data source "
+                f"{html.escape(os.environ.get('DASHBOARD_DATA_SOURCE', 'built-in'))}")
+
+    body = [
+        '<h1 class="export-tab">Dashboard load test</h1>',
+        f'<p>{verdict}</p>',
+        f'<p>{settings}.</p>',
+        table,
+        _figure_html(latency),
+        _figure_html(server)
+    ]
+    if errors:
+        body += ['<h1 class="export-tab">Errors</h1>', _table(['Viewers', 'Error'], errors)]
+    page = export.PAGE.format(title='Dashboard load test', plotly_js=plotly.offline.get_plotlyjs(),
+                              body='\n'.join(body))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+
+
+async def run(args):
+    port = free_port()
+    server = start_server(port)
+    url = f'ws://127.0.0.1:{port}/_stcore/stream'
+    rows = []
+    try:
+        print(f"{'users':>6}{'load50':>9}{'load95':>9}{'act50':>9}{'act95':>9}{'cpu%':>8}{'rss MB':>9}{'errors':>7}")
+        for users in args.users:
+            row = await run_level(url, server.pid, users, args, args.seed + users)
+            print_row(row)
+            rows.append(row)
+    finally:
+        server.terminate()
+        server.wait()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, nargs='+', default=USERS, help="concurrent viewers per level")
+    parser.add_argument('--actions', type=int, default=ACTIONS, help="actions per viewer after the page load")
+    parser.add_argument('--think', type=float, default=THINK_SECONDS, help="mean seconds between actions")
+    parser.add_argument('--p95', type=float, default=P95_SECONDS, help="p95 page-load target in seconds")
+    parser.add_argument('--query', default='', help="query string the viewers open, e.g. render=eager")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--report', default='loadtest.html', help="HTML report path")
+    args = parser.parse_args(argv)
+
+    rows = asyncio.run(run(args))
+    write_report(args.report, rows, args)
+    best = capacity(rows, args.p95)
+    print(f"\nReport written to {args.report}")
+    if best is None:
+        print(f"No level kept the p95 page load within {args.p95:g}s")
+        return 1
+    print(f"Up to {best} concurrent viewers keep the p95 page load within {args.p95:g}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
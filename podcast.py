@@ -0,0 +1,184 @@
+"""Podcast episode analytics for the Self-Care School Dashboard.
+
+Two parts:
+
+- ``ListenStats``: per-episode histograms of how long each play lasted, from
+  the optional ``listen_seconds`` column of the ``podcast_plays`` log. As
+  with the feeds in incremental.py, only plays newer than the watermark are
+  read, chunk by chunk (see ``DataSource.iter_events``), and the state is
+  saved next to the data source. ``update_plays`` reads the log once for
+  both the histograms and the feed's play counts.
+- ``PodcastCube``: built once per data version as part of the shared
+  snapshot (see snapshot.py). It keeps the episode catalog in a columnar
+  ``RecordStore`` (see records.py) and, for each week, a ``Week`` with the
+  episodes in day order, the totals the week tab shows and each episode's
+  retention curve. A week tab is then a dict lookup instead of a
+  scan of the whole episode list.
+
+A retention curve gives, for each minute into an episode, the percentage of
+its plays that were still listening at that minute.
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from incremental import FEEDS, IncrementalAggregator
+from records import RecordStore
+
+LOG = 'podcast_plays'
+COLUMNS = ['week', 'day', 'played_at', 'listen_seconds']
+
+# Plays longer than this share the last minute of the histogram
+RETENTION_MINUTES = 90
+
+STATE_FILE = 'podcast.npz'
+
+EPISODE_FIELDS = ['week', 'day', 'title', 'plays', 'color']
+
+Week = namedtuple('Week', ['name', 'episodes', 'total', 'average', 'most_played', 'retention'])
+
+
+class ListenStats:
+    """Plays per whole minute listened, for each ``(week, day)`` episode."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.watermark = None
+
+    def update(self, events):
+        """Apply the plays newer than the watermark; returns how many were applied."""
+        times = pd.to_datetime(events['played_at'])
+        if self.watermark is not None:
+            newer = (times > self.watermark).to_numpy()
+            events, times = events[newer], times[newer]
+        if not len(events):
+            return 0
+
+        listened = events['listen_seconds'].notna().to_numpy()
+        minutes = np.clip(events['listen_seconds'].to_numpy()[listened] // 60, 0, RETENTION_MINUTES).astype(np.int64)
+        weeks = events['week'].to_numpy()[listened]
+        days = events['day'].to_numpy()[listened]
+        codes, keys = pd.factorize(pd.MultiIndex.from_arrays([weeks, days]))
+
+        # Every episode's histogram from one bincount over (episode, minute)
+        bins = RETENTION_MINUTES + 1
+        known = codes >= 0
+        counts = np.bincount(codes[known] * bins + minutes[known], minlength=len(keys) * bins).reshape(len(keys), bins)
+        for (week, day), row in zip(keys, counts):
+            key = (int(week), int(day))
+            self.histograms[key] = self.histograms.get(key, 0) + row
+        self.watermark = times.max()
+        return len(events)
+
+    def save(self, path):
+        """Write the state to ``path`` (.npz), replacing any previous state atomically."""
+        keys = list(self.histograms)
+        histograms = np.array([self.histograms[key] for key in keys], dtype=np.int64).reshape(len(keys), -1)
+        meta = {
+            'keys': [list(key) for key in keys],
+            'watermark': self.watermark.isoformat() if self.watermark is not None else None
+        }
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, histograms=histograms, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore the state saved at ``path``, or start empty if there is none."""
+        stats = cls()
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as state:
+                meta = json.loads(str(state['meta']))
+                stats.histograms = {tuple(key): row for key, row in zip(meta['keys'], state['histograms'])}
+            if meta['watermark'] is not None:
+                stats.watermark = pd.Timestamp(meta['watermark'])
+        return stats
+
+
+def update_plays(source):
+    """Apply new plays of ``source`` to its saved play counts and listen histograms.
+
+    The ``podcast_plays`` log is read once, chunk by chunk, from the older
+    of the two watermarks; each state then skips the plays it already has.
+    Returns ``(aggregator, listens)``: the up-to-date ``IncrementalAggregator``
+    of the feed and the ``ListenStats``, both None if the source has no play
+    log, and ``listens`` None if the log has no ``listen_seconds`` column.
+    """
+    feed = FEEDS[LOG]
+    counts_path = os.path.join(source.state_dir(), LOG + '.npz')
+    listens_path = os.path.join(source.state_dir(), STATE_FILE)
+    aggregator = IncrementalAggregator.load(feed, counts_path)
+    listens = ListenStats.load(listens_path)
+    watermarks = [aggregator.watermark, listens.watermark]
+    since = None if None in watermarks else min(watermarks)
+    chunks = source.iter_events(LOG, list(dict.fromkeys([*aggregator.columns, *COLUMNS])), feed.time, since)
+    if chunks is None:
+        return None, None
+
+    counted = listened = 0
+    has_listens = True
+    for chunk in chunks:
+        counted += aggregator.update(chunk)
+        if 'listen_seconds' in chunk:
+            listened += listens.update(chunk)
+        else:
+            has_listens = False
+    if counted or listened:
+        os.makedirs(source.state_dir(), exist_ok=True)
+    if counted:
+        aggregator.save(counts_path)
+    if listened:
+        listens.save(listens_path)
+    return aggregator, listens if has_listens else None
+
+
+def apply_listens(data, stats):
+    """Add the listen histograms to ``data`` as ``podcast_listens``."""
+    data['podcast_listens'] = {key: counts.tolist() for key, counts in stats.histograms.items()}
+    return data
+
+
+def retention_curve(histogram):
+    """Percentage of plays still listening at each minute, from a plays-per-minute histogram."""
+    counts = np.asarray(histogram, dtype=np.int64)
+    remaining = counts[::-1].cumsum()[::-1]
+    if not remaining[0]:
+        return []
+    last = np.flatnonzero(counts)[-1]
+    return np.round(remaining[:last + 1] / remaining[0] * 100, 1).tolist()
+
+
+class PodcastCube:
+    """Each week's episodes and figures, precomputed once per data version.
+
+    The episodes are held in a ``RecordStore`` ordered by week and day, so
+    each ``Week.episodes`` is a slice sharing the store's buffers.
+    """
+
+    def __init__(self, podcast_data, listens=None):
+        self.episodes = RecordStore.from_records(podcast_data['Episodes'], EPISODE_FIELDS).sorted_by('week', 'day')
+        listens = listens or {}
+        episode_weeks = self.episodes.column('week')
+        episode_days = self.episodes.column('day')
+        plays = self.episodes.column('plays')
+        weeks = sorted({*episode_weeks.tolist(), *(int(name.split()[-1]) for name in podcast_data['Weekly Plays'])})
+
+        self.weeks = {}
+        bounds = np.searchsorted(episode_weeks, weeks + [max(weeks, default=0) + 1])
+        for week, start, stop in zip(weeks, bounds[:-1], bounds[1:]):
+            week_episodes = self.episodes[start:stop]
+            total = int(plays[start:stop].sum())
+            self.weeks[week] = Week(
+                name=f'Week {week}',
+                episodes=week_episodes,
+                total=total,
+                average=int(total / len(week_episodes)) if len(week_episodes) else 0,
+                most_played=week_episodes[int(np.argmax(plays[start:stop]))] if len(week_episodes) else None,
+                retention={
+                    day: retention_curve(listens[(week, day)])
+                    for day in episode_days[start:stop].tolist() if (week, day) in listens
+                }
+            )
@@ -0,0 +1,218 @@
+"""Per-section profiling of a dashboard run.
+
+app.py marks where each section starts with ``profiler.section(name)``. A
+section ends where the next one starts (or at ``finish()``). For each
+section a run records:
+
+- ``seconds``: wall time
+- ``peak_bytes``: peak Python memory allocated above the section's starting
+  point; only measured while ``tracemalloc`` is tracing
+- ``payload_bytes`` / ``messages``: size and count of the ForwardMsgs the
+  section sent to the browser
+
+Profiling is off unless ``DASHBOARD_PROFILE=1`` (or ``ENABLED`` is set by a
+harness such as bench.py, or the app's debug mode turns it on for a run), in
+which case finished runs are appended to ``RUNS`` and added to the
+process-wide ``TOTALS``. A disabled profiler costs one attribute check per
+section.
+
+Caches report their hits and misses in ``CACHE_STATS``; ``cache_data`` and
+``cache_resource`` are ``st.cache_data`` and ``st.cache_resource`` with that
+counting added. ``prometheus_text`` renders the
+totals and cache counters in the Prometheus text exposition format.
+"""
+import collections
+import functools
+import os
+import threading
+import time
+import tracemalloc
+
+import streamlit as st
+from streamlit.runtime.caching import get_data_cache_stats_provider
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+ENABLED = os.environ.get('DASHBOARD_PROFILE') == '1'
+
+# Most recent profiled runs, newest last
+RUNS = collections.deque(maxlen=100)
+
+# Per-section sums over every profiled run in the process, plus the run count
+TOTALS = collections.defaultdict(collections.Counter)
+RUN_COUNT = collections.Counter()
+_totals_lock = threading.Lock()
+
+# Hits and misses per cache name
+CACHE_STATS = collections.defaultdict(collections.Counter)
+
+Section = collections.namedtuple('Section', ['name', 'seconds', 'peak_bytes', 'payload_bytes', 'messages'])
+
+
+class Profiler:
+    """Collects section timings, memory and payload for one script run."""
+
+    def __init__(self, enabled=None, trace_memory=False):
+        self.enabled = ENABLED if enabled is None else enabled
+        self.sections = []
+        self._current = None
+        self._ctx = None
+        self._enqueue = None
+        # Only stop tracing at the end if this run started it
+        self._started_tracing = self.enabled and trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        if self.enabled:
+            self._wrap_enqueue()
+
+    def _wrap_enqueue(self):
+        # Count every message the script sends; there is no context when
+        # running outside Streamlit (e.g. the static export)
+        self._ctx = get_script_run_ctx()
+        if self._ctx is None:
+            return
+        # A run that raised never restored the original; don't wrap the wrapper
+        self._enqueue = getattr(self._ctx._enqueue, 'original', self._ctx._enqueue)
+
+        def enqueue(msg):
+            if self._current is not None:
+                self._current['payload_bytes'] += msg.ByteSize()
+                self._current['messages'] += 1
+            self._enqueue(msg)
+
+        enqueue.original = self._enqueue
+        self._ctx._enqueue = enqueue
+
+    def section(self, name):
+        """End the current section and start timing ``name``."""
+        if not self.enabled:
+            return
+        self._end()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._current = {
+            'name': name,
+            'start': time.perf_counter(),
+            'memory': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+            'payload_bytes': 0,
+            'messages': 0
+        }
+
+    def _end(self):
+        current, self._current = self._current, None
+        if current is None:
+            return
+        peak = None
+        if current['memory'] is not None and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1] - current['memory'], 0)
+        self.sections.append(Section(
+            current['name'],
+            time.perf_counter() - current['start'],
+            peak,
+            current['payload_bytes'],
+            current['messages']
+        ))
+
+    def finish(self):
+        """End the last section and record the run in ``RUNS``."""
+        if not self.enabled:
+            return
+        self._end()
+        if self._ctx is not None:
+            self._ctx._enqueue = self._enqueue
+        if self._started_tracing:
+            tracemalloc.stop()
+        RUNS.append(self.sections)
+        with _totals_lock:
+            RUN_COUNT['runs'] += 1
+            for section in self.sections:
+                totals = TOTALS[section.name]
+                totals['runs'] += 1
+                totals['seconds'] += section.seconds
+                totals['payload_bytes'] += section.payload_bytes
+                totals['messages'] += section.messages
+
+
+def _counted(cache, kwargs):
+    """Decorator applying the Streamlit ``cache`` decorator with ``kwargs`` and counting in ``CACHE_STATS``."""
+    def decorate(func):
+        stats = CACHE_STATS[func.__name__]
+
+        @functools.wraps(func)
+        def compute(*args, **kw):
+            # Only runs on a cache miss
+            stats['misses'] += 1
+            return func(*args, **kw)
+
+        cached = cache(**kwargs)(compute)
+
+        @functools.wraps(func)
+        def call(*args, **kw):
+            stats['calls'] += 1
+            return cached(*args, **kw)
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+def cache_data(**kwargs):
+    """``st.cache_data`` that also counts hits and misses in ``CACHE_STATS``."""
+    return _counted(st.cache_data, kwargs)
+
+
+def cache_resource(**kwargs):
+    """``st.cache_resource`` that also counts hits and misses in ``CACHE_STATS``."""
+    return _counted(st.cache_resource, kwargs)
+
+
+def cache_counts():
+    """``{cache: (hits, misses)}`` for every cache that has been used."""
+    counts = {}
+    for name, stats in sorted(CACHE_STATS.items()):
+        misses = stats['misses']
+        hits = stats['hits'] + max(stats['calls'] - misses, 0)
+        counts[name] = (hits, misses)
+    return counts
+
+
+def cache_bytes():
+    """Bytes held by each ``st.cache_data`` cache."""
+    sizes = collections.Counter()
+    for stat in get_data_cache_stats_provider().get_stats():
+        sizes[stat.cache_name.rsplit('.', 1)[-1]] += stat.byte_length
+    return dict(sorted(sizes.items()))
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_text():
+    """Process-wide section totals and cache counters in Prometheus text format."""
+    with _totals_lock:
+        totals = {name: dict(counter) for name, counter in TOTALS.items()}
+        runs = RUN_COUNT['runs']
+    lines = [
+        '# HELP dashboard_runs_total Profiled script runs.',
+        '# TYPE dashboard_runs_total counter',
+        f'dashboard_runs_total {runs}'
+    ]
+    for metric, field, help_text in [
+        ('dashboard_section_seconds', 'seconds', 'Wall time spent in each dashboard section.'),
+        ('dashboard_section_payload_bytes', 'payload_bytes', 'Bytes sent to the browser by each section.')
+    ]:
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} summary']
+        for name, counter in totals.items():
+            lines.append(f'{metric}_sum{{section="{_label(name)}"}} {counter.get(field, 0):g}')
+            lines.append(f'{metric}_count{{section="{_label(name)}"}} {counter["runs"]}')
+
+    counts = cache_counts()
+    for metric, index, help_text in [
+        ('dashboard_cache_hits_total', 0, 'Cache lookups answered from the cache.'),
+        ('dashboard_cache_misses_total', 1, 'Cache lookups that had to compute the value.')
+    ]:
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        lines += [f'{metric}{{cache="{_label(name)}"}} {values[index]}' for name, values in counts.items()]
+    lines += ['# HELP dashboard_cache_bytes Bytes held by each data cache.', '# TYPE dashboard_cache_bytes gauge']
+    lines += [f'dashboard_cache_bytes{{cache="{_label(name)}"}} {size}' for name, size in cache_bytes().items()]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,112 @@
+"""Columnar record storage for catalogs such as the podcast episode list.
+
+The data sources hand over catalogs as lists of dicts, so every record
+repeats its key strings and holds each number as a separate Python object. A
+``RecordStore`` keeps the same records column by column. Numeric fields
+become one read-only NumPy array each. Text fields become a pandas
+``Categorical``: int codes plus a single copy of each distinct string, so
+colors and repeated titles cost a byte or two per record.
+
+- ``store[i]`` is a ``Record``: a ``__slots__`` view that reads its fields
+  from the columns on access (``record['plays']``, like the dict it replaces)
+- ``store[a:b]`` is a store over views of the same buffers; ``take`` selects
+  arbitrary rows (which copies)
+- ``frame()`` wraps the columns in a DataFrame without copying them, and
+  ``column(name)`` returns a column as is, ready for Plotly
+
+Stores live in the shared snapshot (see snapshot.py), so their buffers are
+read-only.
+"""
+import numbers
+
+import numpy as np
+import pandas as pd
+
+_INT32 = np.iinfo(np.int32)
+
+
+class Record:
+    """Read-only view of one row of a ``RecordStore``."""
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, field):
+        value = self._store.columns[field][self._index]
+        return value.item() if hasattr(value, 'item') else value
+
+    def get(self, field, default=None):
+        return self[field] if field in self._store.columns else default
+
+    def keys(self):
+        return self._store.columns.keys()
+
+    def to_dict(self):
+        return {field: self[field] for field in self._store.columns}
+
+    def __repr__(self):
+        return f'Record({self.to_dict()!r})'
+
+
+class RecordStore:
+    """Records of the same fields stored as one array per field."""
+
+    def __init__(self, columns):
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns of a record store must have the same length")
+        self.columns = columns
+        for values in columns.values():
+            if isinstance(values, np.ndarray):
+                values.flags.writeable = False
+
+    @classmethod
+    def from_records(cls, records, fields):
+        """Build a store from a list of dicts; fields holding only numbers become arrays, the rest categoricals."""
+        columns = {}
+        for field in fields:
+            values = [record.get(field) for record in records]
+            if all(isinstance(value, numbers.Number) and not isinstance(value, bool) for value in values):
+                # With no records there is nothing to infer from: an empty int32 column
+                array = np.array(values) if values else np.zeros(0, dtype=np.int32)
+                if array.dtype.kind == 'i' and len(array) and _INT32.min <= array.min() and array.max() <= _INT32.max:
+                    array = array.astype(np.int32)
+                columns[field] = array
+            else:
+                columns[field] = pd.Categorical(values)
+        return cls(columns)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return RecordStore({field: values[index] for field, values in self.columns.items()})
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return Record(self, index)
+
+    def __iter__(self):
+        return (Record(self, index) for index in range(len(self)))
+
+    def take(self, indices):
+        return RecordStore({field: values[indices] for field, values in self.columns.items()})
+
+    def sorted_by(self, *fields):
+        """A copy of the store ordered by ``fields`` (first field first)."""
+        return self.take(np.lexsort([np.asarray(self.columns[field]) for field in reversed(fields)]))
+
+    def column(self, field):
+        return self.columns[field]
+
+    def frame(self):
+        """The columns as a DataFrame sharing the store's buffers."""
+        return pd.DataFrame(self.columns, copy=False)
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.columns.values())
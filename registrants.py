@@ -0,0 +1,205 @@
+"""Registrant-level aggregation for the Self-Care School Dashboard.
+
+Instead of typing in pre-aggregated counts, a data source can provide the raw
+registrant export (one row per registrant). ``compact_registrants`` turns that
+export into a small typed frame once per data version, and
+``aggregate_registrants`` computes the registrant count, the age-band
+breakdown and the funnel stages from it with NumPy bincounts, which stays well
+under 100 ms at millions of rows. ``funnel_cube`` precomputes the same funnel
+over acquisition channel x age band x cohort week, so any filtered or broken
+down view of it is a sum over a few hundred cells rather than a rescan.
+
+Expected columns of the raw export:
+
+- ``age`` (years) or ``age_band`` (one of ``AGE_BANDS``)
+- ``downloads`` - number of resources the registrant downloaded
+- ``completed_week_0`` - whether the registrant completed Week 0
+- optionally ``channel`` (acquisition channel, e.g. SMS or Facebook) and
+  ``registered_at``, whose Monday-start week is the registrant's cohort week
+"""
+import numpy as np
+import pandas as pd
+
+# Age bands as [lower, upper) year ranges; missing ages fall into 'Unknown'
+AGE_BAND_EDGES = [18, 26, 35, 45, 55, 65]
+AGE_BANDS = ['Under 18', '18-25', '26-34', '35-44', '45-54', '55-64', '65+', 'Unknown']
+
+# The band the 18-25 enrollment KPI is about
+TARGET_AGE_BAND = '18-25'
+
+REGISTRANT_COLUMNS = ['age', 'age_band', 'downloads', 'completed_week_0', 'channel', 'registered_at']
+
+# Registrant-level funnel stages, in order
+FUNNEL_STAGES = ['Registrants', 'Downloaded', 'Week 0 Complete']
+
+# Dimensions of the funnel cube, in axis order, with their display names
+FUNNEL_DIMENSIONS = {'channel': 'Channel', 'age_band': 'Age Band', 'cohort_week': 'Cohort Week'}
+
+# Label of a dimension the export does not have
+UNKNOWN = 'Unknown'
+
+
+def _categorical(codes, labels):
+    """Categorical from factorized codes, with -1 (missing) mapped to ``UNKNOWN``."""
+    codes = np.asarray(codes)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(labels), codes)
+        labels = [*labels, UNKNOWN]
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def age_band_codes(raw):
+    """Index into ``AGE_BANDS`` (int8) of each row, from its ``age_band`` or else its ``age`` column."""
+    if 'age_band' in raw.columns:
+        band = pd.Categorical(raw['age_band'].fillna('Unknown'), categories=AGE_BANDS)
+        return np.where(band.codes < 0, AGE_BANDS.index('Unknown'), band.codes).astype(np.int8)
+    if 'age' not in raw.columns:
+        return np.full(len(raw), AGE_BANDS.index('Unknown'), dtype=np.int8)
+    age = pd.to_numeric(raw['age'], errors='coerce').to_numpy(dtype=np.float64)
+    codes = np.searchsorted(AGE_BAND_EDGES, age, side='right').astype(np.int8)
+    codes[np.isnan(age)] = AGE_BANDS.index('Unknown')
+    return codes
+
+
+def compact_registrants(raw):
+    """Convert a raw registrant export into the compact typed frame.
+
+    The result has a categorical ``age_band`` column (int8 codes), an int32
+    ``downloads`` column and a bool ``completed_week_0`` column, plus
+    categorical ``channel`` and ``cohort_week`` (week start date) columns
+    that are all ``UNKNOWN`` when the export lacks them.
+    """
+    codes = age_band_codes(raw)
+    if 'channel' in raw.columns:
+        channel_codes, labels = pd.factorize(raw['channel'], sort=True)
+        channel = _categorical(channel_codes, [str(label) for label in labels])
+    else:
+        channel = _categorical(np.full(len(raw), -1), [])
+    if 'registered_at' in raw.columns:
+        days = pd.to_datetime(raw['registered_at'], errors='coerce').to_numpy(dtype='datetime64[D]')
+        missing = np.isnat(days)
+        days = days[~missing].astype(np.int64)
+        # 1970-01-01 was a Thursday; step back to the Monday
+        week_codes = np.full(len(raw), -1, dtype=np.int64)
+        week_codes[~missing], labels = pd.factorize(days - (days + 3) % 7, sort=True)
+        cohort_week = _categorical(week_codes, [str(np.datetime64(int(day), 'D')) for day in labels])
+    else:
+        cohort_week = _categorical(np.full(len(raw), -1), [])
+
+    return pd.DataFrame({
+        'age_band': pd.Categorical.from_codes(codes, categories=AGE_BANDS),
+        'downloads': raw['downloads'].fillna(0).to_numpy(dtype=np.int32),
+        'completed_week_0': raw['completed_week_0'].fillna(False).to_numpy(dtype=bool),
+        'channel': channel,
+        'cohort_week': cohort_week
+    })
+
+
+def aggregate_registrants(frame):
+    """Aggregate a compact registrant frame.
+
+    Returns a dict with the registrant count, total downloads, per-age-band
+    counts and a ``funnel`` matrix of stage x age band counts.
+    """
+    codes = frame['age_band'].cat.codes.to_numpy()
+    downloads = frame['downloads'].to_numpy()
+    completed = frame['completed_week_0'].to_numpy()
+    n_bands = len(AGE_BANDS)
+
+    # One integer bincount over (age band, downloaded, completed) instead of
+    # a weighted bincount per stage, which would cast everything to float64
+    key = codes.astype(np.int32) * 4
+    key += (downloads > 0) * np.int32(2)
+    key += completed
+    counts = np.bincount(key, minlength=n_bands * 4).reshape(n_bands, 2, 2)
+
+    band_counts = counts.sum(axis=(1, 2))
+    downloaded_counts = counts[:, 1, :].sum(axis=1)
+    completed_counts = counts[:, :, 1].sum(axis=1)
+    funnel = np.vstack([band_counts, downloaded_counts, completed_counts]).astype(np.int64)
+
+    return {
+        'registrants': int(len(frame)),
+        'downloads': int(downloads.sum(dtype=np.int64)),
+        'age_bands': dict(zip(AGE_BANDS, band_counts.tolist())),
+        'funnel': funnel
+    }
+
+
+def funnel_conversions(funnel):
+    """Stage-to-stage conversion rates (percent) for each group of registrants.
+
+    ``funnel`` is a stage x group matrix of counts, such as the stage x age
+    band matrix from ``aggregate_registrants`` or a transposed
+    ``FunnelCube.rollup``; the result has one row per transition between
+    consecutive stages, 0 where the earlier stage is empty.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = funnel[1:] / funnel[:-1] * 100
+    return np.nan_to_num(rates)
+
+
+class FunnelCube:
+    """Registrant counts per funnel stage over channel x age band x cohort week."""
+
+    def __init__(self, labels, counts):
+        # ``labels`` maps each of FUNNEL_DIMENSIONS to its labels; ``counts``
+        # has one axis per dimension, in that order, then one per stage
+        self.labels = labels
+        self.counts = counts
+
+    def select(self, **filters):
+        """Counts with each dimension given in ``filters`` narrowed to that label (None keeps all)."""
+        counts = self.counts
+        for axis, dimension in enumerate(FUNNEL_DIMENSIONS):
+            label = filters.get(dimension)
+            if label is not None:
+                counts = np.take(counts, [self.labels[dimension].index(label)], axis=axis)
+        return counts
+
+    def rollup(self, by=None, **filters):
+        """Stage counts for the registrants matching ``filters``, broken down by the dimension ``by``.
+
+        Returns a DataFrame with one column per stage and one row per label
+        of ``by`` that has registrants (a single ``'All'`` row without ``by``).
+        """
+        counts = self.select(**filters)
+        axes = tuple(axis for axis, dimension in enumerate(FUNNEL_DIMENSIONS) if dimension != by)
+        rolled = counts.sum(axis=axes)
+        if by is None:
+            return pd.DataFrame([rolled], index=['All'], columns=FUNNEL_STAGES)
+        labels = [filters[by]] if filters.get(by) is not None else self.labels[by]
+        table = pd.DataFrame(rolled, index=labels, columns=FUNNEL_STAGES)
+        return table[table['Registrants'] > 0]
+
+
+def funnel_cube(frame):
+    """Build the ``FunnelCube`` of a compact registrant frame with one bincount."""
+    dimensions = [frame[dimension].cat for dimension in FUNNEL_DIMENSIONS]
+    shape = [len(dimension.categories) for dimension in dimensions]
+
+    # Same (downloaded, completed) trick as aggregate_registrants, with the
+    # three dimensions folded into the key in front
+    key = np.zeros(len(frame), dtype=np.int64)
+    for dimension, size in zip(dimensions, shape):
+        key = key * size + dimension.codes.to_numpy()
+    key = key * 4 + (frame['downloads'].to_numpy() > 0) * 2 + frame['completed_week_0'].to_numpy()
+    counts = np.bincount(key, minlength=int(np.prod(shape)) * 4).reshape(*shape, 2, 2)
+
+    stages = np.stack([counts.sum(axis=(-2, -1)), counts[..., 1, :].sum(axis=-1), counts[..., :, 1].sum(axis=-1)], axis=-1)
+    labels = {name: list(dimension.categories) for name, dimension in zip(FUNNEL_DIMENSIONS, dimensions)}
+    return FunnelCube(labels, stages)
+
+
+def apply_registrants(data, frame):
+    """Overwrite the registrant-derived metrics in ``data`` with aggregates of ``frame``."""
+    summary = aggregate_registrants(frame)
+    target_count = summary['age_bands'][TARGET_AGE_BAND]
+
+    data['age_data'][TARGET_AGE_BAND]['value'] = target_count
+    data['age_data']['Other Ages']['value'] = summary['registrants'] - target_count
+    data['program_metrics']['Registrants']['value'] = summary['registrants']
+    data['program_metrics']['Completed Week 0']['value'] = int(summary['funnel'][FUNNEL_STAGES.index('Week 0 Complete')].sum())
+    data['stream_data']['Downloads'] = summary['downloads']
+    data['registrant_funnel'] = funnel_cube(frame)
+    return data
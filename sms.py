@@ -0,0 +1,264 @@
+"""Streaming SMS campaign analytics over the vendor's delivery and click logs.
+
+The SMS vendor exports one row per delivered message and one per link click:
+
+- ``sms_deliveries``: ``campaign``, ``recipient_id``, ``delivered_at``
+- ``sms_clicks``: ``campaign``, ``recipient_id``, ``clicked_at``
+
+``update_analytics`` reads both logs from a data source chunk by chunk (see
+``DataSource.iter_events``), so no log is ever held in memory whole. Like the
+feeds in incremental.py, only events newer than the last refresh are read
+and the state is saved next to the source.
+
+Recipient ids can be phone numbers or hashes, so they are first mapped to
+dense codes (``IdCodes``, shared by all campaigns and saved with the state).
+Per campaign the state then holds, indexed by recipient code:
+
+- delivered and clicked counts, plus exact sets of the recipients reached
+  and of those who clicked (``UserBitmap``)
+- each recipient's delivery time, as int32 seconds after the campaign's
+  first delivery, so a click can be matched to its delivery
+- a per-minute histogram of time to click, up to ``MAX_DELAY_MINUTES``
+- deliveries and clicks by hour of day
+
+The memory used grows with the number of distinct recipients, not with the
+length of the logs or the size of the ids. Deliveries are applied before
+clicks, so a click whose delivery is in the same refresh still gets a time to
+click. Clicks without a known delivery are counted but have no time to
+click. A source with only the click log still gets the clicked counts, with
+the delivered counts left as they are.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from incremental import IdCodes, UserBitmap
+
+DELIVERIES = 'sms_deliveries'
+CLICKS = 'sms_clicks'
+LOGS = {
+    DELIVERIES: ['campaign', 'recipient_id', 'delivered_at'],
+    CLICKS: ['campaign', 'recipient_id', 'clicked_at']
+}
+
+# Clicks later than this after delivery share the last histogram bin
+MAX_DELAY_MINUTES = 7 * 24 * 60
+
+# Time-to-click buckets shown on the dashboard: (lower bound in minutes, label)
+DELAY_BUCKETS = [
+    (0, '< 1 min'),
+    (1, '1-5 min'),
+    (5, '5-15 min'),
+    (15, '15-60 min'),
+    (60, '1-6 h'),
+    (360, '6-24 h'),
+    (1440, '1 day +')
+]
+
+STATE_FILE = 'sms.npz'
+
+_NOT_DELIVERED = -1
+
+
+class CampaignStats:
+    """Running delivery, click and time-to-click aggregates for one campaign."""
+
+    def __init__(self):
+        self.delivered = 0
+        self.clicked = 0
+        self.matched = 0
+        self.recipients = UserBitmap()
+        self.clickers = UserBitmap()
+        # Epoch second of the first delivery, and the delivery time of each
+        # recipient code relative to it (_NOT_DELIVERED where unknown)
+        self.start = None
+        self.delivered_at = np.zeros(0, dtype=np.int32)
+        self.delay_minutes = np.zeros(MAX_DELAY_MINUTES + 1, dtype=np.int64)
+        self.delivered_by_hour = np.zeros(24, dtype=np.int64)
+        self.clicked_by_hour = np.zeros(24, dtype=np.int64)
+
+    def _grow(self, size):
+        if size > len(self.delivered_at):
+            grown = np.full(max(size, 2 * len(self.delivered_at)), _NOT_DELIVERED, dtype=np.int32)
+            grown[:len(self.delivered_at)] = self.delivered_at
+            self.delivered_at = grown
+
+    def add_deliveries(self, recipients, seconds, hours):
+        if self.start is None:
+            self.start = int(seconds.min())
+        self.delivered += len(recipients)
+        self.recipients.add(recipients)
+        self._grow(int(recipients.max()) + 1)
+        # A recipient delivered to twice keeps the first delivery time
+        ids, index = np.unique(recipients, return_index=True)
+        offsets = (seconds[index] - self.start).astype(np.int32)
+        first = self.delivered_at[ids] == _NOT_DELIVERED
+        self.delivered_at[ids[first]] = offsets[first]
+        self.delivered_by_hour += np.bincount(hours, minlength=24)
+
+    def add_clicks(self, recipients, seconds, hours):
+        self.clicked += len(recipients)
+        self.clickers.add(recipients)
+        self.clicked_by_hour += np.bincount(hours, minlength=24)
+        if self.start is None:
+            return
+        known = recipients < len(self.delivered_at)
+        delivered = np.full(len(recipients), _NOT_DELIVERED, dtype=np.int64)
+        delivered[known] = self.delivered_at[recipients[known]]
+        matched = delivered != _NOT_DELIVERED
+        delays = (seconds[matched] - self.start - delivered[matched]) // 60
+        self.matched += int(matched.sum())
+        self.delay_minutes += np.bincount(np.clip(delays, 0, MAX_DELAY_MINUTES), minlength=MAX_DELAY_MINUTES + 1)
+
+    def median_minutes(self):
+        """Median time to click in minutes, or None before any matched click."""
+        if not self.matched:
+            return None
+        return int(np.searchsorted(np.cumsum(self.delay_minutes), (self.matched + 1) / 2))
+
+    def summary(self):
+        bounds = [lower for lower, _ in DELAY_BUCKETS] + [MAX_DELAY_MINUTES + 1]
+        return {
+            'delivered': self.delivered,
+            'clicked': self.clicked,
+            'recipients': len(self.recipients),
+            'clickers': len(self.clickers),
+            'ctr': round(self.clicked / self.delivered * 100, 1) if self.delivered else 0,
+            'unique_ctr': round(len(self.clickers) / len(self.recipients) * 100, 1) if self.delivered else 0,
+            'median_minutes': self.median_minutes(),
+            'time_to_click': {
+                label: int(self.delay_minutes[low:high].sum())
+                for (low, label), high in zip(DELAY_BUCKETS, bounds[1:])
+            },
+            'delivered_by_hour': self.delivered_by_hour.tolist(),
+            'clicked_by_hour': self.clicked_by_hour.tolist()
+        }
+
+
+class SMSAnalytics:
+    """Per-campaign ``CampaignStats``, the recipient id codes and a time watermark for each log."""
+
+    def __init__(self):
+        self.campaigns = {}
+        self.recipients = IdCodes()
+        self.watermarks = {log: None for log in LOGS}
+
+    def campaign(self, name):
+        if name not in self.campaigns:
+            self.campaigns[name] = CampaignStats()
+        return self.campaigns[name]
+
+    def update(self, log, events):
+        """Apply one chunk of ``log`` events newer than its watermark; returns how many were applied."""
+        campaign_column, recipient_column, time_column = LOGS[log]
+        times = pd.to_datetime(events[time_column])
+        watermark = self.watermarks[log]
+        if watermark is not None:
+            newer = (times > watermark).to_numpy()
+            events, times = events[newer], times[newer]
+        if not len(events):
+            return 0
+
+        seconds = times.to_numpy(dtype='datetime64[s]').astype(np.int64)
+        hours = times.dt.hour.to_numpy()
+        recipients = self.recipients.encode(events[recipient_column].to_numpy(dtype=np.int64))
+        campaigns = events[campaign_column].astype(str).to_numpy()
+        for name in pd.unique(campaigns):
+            rows = campaigns == name
+            stats = self.campaign(name)
+            add = stats.add_deliveries if log == DELIVERIES else stats.add_clicks
+            add(recipients[rows], seconds[rows], hours[rows])
+        self.watermarks[log] = times.max()
+        return len(events)
+
+    def summary(self):
+        return {name: stats.summary() for name, stats in self.campaigns.items()}
+
+    def save(self, path):
+        """Write the state to ``path`` (.npz), replacing any previous state atomically."""
+        arrays, campaigns = {}, []
+        for i, (name, stats) in enumerate(self.campaigns.items()):
+            campaigns.append({
+                'name': name, 'delivered': stats.delivered, 'clicked': stats.clicked,
+                'matched': stats.matched, 'start': stats.start
+            })
+            for field in ('delivered_at', 'delay_minutes', 'delivered_by_hour', 'clicked_by_hour'):
+                arrays[f'{i}.{field}'] = getattr(stats, field)
+            arrays[f'{i}.recipients'] = stats.recipients.bits
+            arrays[f'{i}.clickers'] = stats.clickers.bits
+        arrays['recipient_ids'], arrays['recipient_codes'] = self.recipients.ids, self.recipients.codes
+        meta = {
+            'campaigns': campaigns,
+            'watermarks': {log: mark.isoformat() if mark is not None else None for log, mark in self.watermarks.items()}
+        }
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore the state saved at ``path``, or start empty if there is none."""
+        analytics = cls()
+        if not os.path.exists(path):
+            return analytics
+        with np.load(path, allow_pickle=False) as state:
+            if 'recipient_ids' not in state.files:
+                # Saved before recipient ids were coded: rebuild from the logs
+                return analytics
+            meta = json.loads(str(state['meta']))
+            analytics.recipients = IdCodes(state['recipient_ids'], state['recipient_codes'])
+            for i, fields in enumerate(meta['campaigns']):
+                stats = analytics.campaign(fields['name'])
+                stats.delivered, stats.clicked = fields['delivered'], fields['clicked']
+                stats.matched, stats.start = fields['matched'], fields['start']
+                for field in ('delivered_at', 'delay_minutes', 'delivered_by_hour', 'clicked_by_hour'):
+                    setattr(stats, field, state[f'{i}.{field}'])
+                stats.recipients = UserBitmap(state[f'{i}.recipients'])
+                stats.clickers = UserBitmap(state[f'{i}.clickers'])
+        analytics.watermarks.update({
+            log: pd.Timestamp(mark) if mark is not None else None for log, mark in meta['watermarks'].items()
+        })
+        return analytics
+
+
+def update_analytics(source):
+    """Apply new delivery and click events of ``source`` to its saved SMS state.
+
+    Returns the up-to-date ``SMSAnalytics``, or None if the source has
+    neither log.
+    """
+    state_path = os.path.join(source.state_dir(), STATE_FILE)
+    analytics = SMSAnalytics.load(state_path)
+    applied, found = 0, False
+    # Deliveries first, so clicks can be matched to them
+    for log in (DELIVERIES, CLICKS):
+        chunks = source.iter_events(log, LOGS[log], LOGS[log][2], analytics.watermarks[log])
+        if chunks is not None:
+            found = True
+            applied += sum(analytics.update(log, chunk) for chunk in chunks)
+    if not found:
+        return None
+    if applied:
+        os.makedirs(source.state_dir(), exist_ok=True)
+        analytics.save(state_path)
+    return analytics
+
+
+def apply_sms_analytics(data, analytics):
+    """Overwrite the campaign counts in ``data`` and add the per-campaign details as ``sms_analytics``.
+
+    Without deliveries in the logs a campaign keeps its delivered count, and
+    its rate is the logged clicks over that count.
+    """
+    summary = analytics.summary()
+    for campaign, fields in summary.items():
+        campaign_data = data['sms_data'].setdefault(campaign, {'delivered': 0, 'clicked': 0, 'rate': 0})
+        if fields['delivered']:
+            campaign_data['delivered'] = fields['delivered']
+        campaign_data['clicked'] = fields['clicked']
+        if campaign_data['delivered']:
+            campaign_data['rate'] = round(fields['clicked'] / campaign_data['delivered'] * 100, 1)
+    data['sms_analytics'] = summary
+    return data
@@ -0,0 +1,97 @@
+"""Process-wide, read-only dashboard snapshots.
+
+Every Streamlit session runs app.py on its own. Without sharing, a data drop
+followed by many sessions opening the page means each of them loads the
+data, evaluates the KPIs and reads the metric history. Instead, everything
+derived from one data version is built once into a ``Snapshot`` that all
+sessions in the process share:
+
+- single flight: the first session to ask for a new version builds it, and
+  sessions asking for the same version meanwhile wait for that result
+  instead of building their own
+- atomic swap: a finished snapshot replaces the previous one for its source
+  in a single assignment, so a session sees either the old or the new
+  snapshot, never a partly built one
+- bounded: snapshots for at most ``SNAPSHOT_ENTRIES`` sources (e.g. cohorts)
+  are kept, least recently used first out
+
+Snapshots are shared, so their contents must be treated as read-only.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from data_sources import DATA_CACHE_ENTRIES
+from profiling import CACHE_STATS
+
+Snapshot = namedtuple('Snapshot', ['data', 'kpi_results', 'trends', 'podcast', 'forecasts'])
+
+SNAPSHOT_ENTRIES = DATA_CACHE_ENTRIES
+
+
+class _Flight:
+    """A snapshot build in progress, waited on by every other requester."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SnapshotStore:
+    """Latest snapshot per source key, built at most once per version."""
+
+    def __init__(self, max_entries=SNAPSHOT_ENTRIES):
+        self.max_entries = max_entries
+        self._snapshots = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.stats = CACHE_STATS['snapshot']
+
+    def get(self, key, version, build):
+        """Return the snapshot of ``key`` at ``version``, calling ``build()`` only if nobody else is."""
+        # Hits take the lock too, to mark the entry as recently used
+        with self._lock:
+            entry = self._snapshots.get(key)
+            if entry is not None and entry[0] == version:
+                self._snapshots.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            flight = self._flights.get((key, version))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(key, version)] = _Flight()
+
+        if not leader:
+            # Served by another session's build
+            self.stats['hits'] += 1
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        self.stats['misses'] += 1
+        try:
+            flight.result = build()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._snapshots[key] = (version, flight.result)
+                    self._snapshots.move_to_end(key)
+                    while len(self._snapshots) > self.max_entries:
+                        self._snapshots.popitem(last=False)
+                    self.builds += 1
+                del self._flights[(key, version)]
+            flight.done.set()
+        return flight.result
+
+
+# Shared by every session in the process
+STORE = SnapshotStore()
+
+
+def get(key, version, build):
+    return STORE.get(key, version, build)
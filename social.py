@@ -0,0 +1,84 @@
+"""Per-post social media metrics for the Self-Care School Dashboard.
+
+Instead of typing in campaign totals, a data source can provide the ads
+manager's per-post (or per-ad) export, one row per post:
+
+- ``social_posts``: ``post_id``, ``campaign`` and any of the metric columns
+  in ``METRICS`` (``impressions``, ``video_views``, ``link_clicks``,
+  ``reactions``, ``comments``, ``shares``, ``saves``, ``page_likes``)
+
+``rollup_posts`` sums the metrics per campaign with one groupby. The data
+source does this while loading, so it runs once per version of the export
+(see snapshot.py) and reruns only read the result. ``apply_posts`` puts the
+totals of the metrics the export has into ``social_data``.
+
+'Direct Engagements' is never typed in: ``derive_engagements`` sums it from
+the interactions in ``ENGAGEMENTS``, with or without a per-post export.
+"""
+import numpy as np
+import pandas as pd
+
+TABLE = 'social_posts'
+
+# Export column -> the social_data metric it adds up to
+METRICS = {
+    'impressions': 'Impressions Delivered',
+    'video_views': 'Video Views',
+    'link_clicks': 'Clicks to Site',
+    'reactions': 'Reactions',
+    'comments': 'Comments',
+    'shares': 'Shares',
+    'saves': 'Saves',
+    'page_likes': 'Page Likes'
+}
+
+POST_COLUMNS = ['post_id', 'campaign', *METRICS]
+
+# Interactions that count as Direct Engagements
+ENGAGEMENTS = ['Reactions', 'Comments', 'Shares', 'Saves']
+
+# Campaign of posts the export leaves unassigned
+UNASSIGNED = 'Unassigned'
+
+
+def derive_engagements(social_data):
+    """Set 'Direct Engagements' in ``social_data`` to the sum of its ``ENGAGEMENTS``."""
+    social_data['Direct Engagements'] = sum(social_data[metric] for metric in ENGAGEMENTS)
+    return social_data
+
+
+def rollup_posts(posts):
+    """Per-campaign totals of a per-post export.
+
+    Returns a DataFrame indexed by campaign with a ``Posts`` count, one column
+    per ``METRICS`` entry the export has (under its social_data name) and,
+    when all the interactions are there, ``Direct Engagements`` and
+    ``Engagement Rate`` (% of impressions).
+    """
+    metrics = [column for column in METRICS if column in posts.columns]
+    if 'campaign' in posts:
+        campaigns = posts['campaign'].astype(object).fillna(UNASSIGNED)
+    else:
+        campaigns = pd.Series(UNASSIGNED, index=posts.index)
+    grouped = posts[metrics].fillna(0).astype(np.int64).groupby(campaigns.rename('campaign'), sort=True)
+    totals = grouped.sum().rename(columns=METRICS)
+    totals.insert(0, 'Posts', grouped.size())
+
+    if set(ENGAGEMENTS) <= set(totals.columns):
+        totals['Direct Engagements'] = totals[ENGAGEMENTS].sum(axis=1)
+        if 'Impressions Delivered' in totals:
+            impressions = totals['Impressions Delivered'].to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rate = np.where(impressions > 0, totals['Direct Engagements'].to_numpy() / impressions * 100, 0)
+            totals['Engagement Rate'] = rate.round(2)
+    return totals
+
+
+def apply_posts(data, campaigns):
+    """Overwrite the social totals in ``data`` with sums of ``campaigns`` and add it as ``social_campaigns``."""
+    social_data = data['social_data']
+    for metric in METRICS.values():
+        if metric in campaigns:
+            social_data[metric] = int(campaigns[metric].sum())
+    data['social_campaigns'] = campaigns
+    return data
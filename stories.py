@@ -0,0 +1,275 @@
+"""Story submissions: a searchable store for the Story Submissions section.
+
+A data source can provide the submissions themselves, one row per story:
+
+- ``stories``: ``story_id``, ``submitted_at``, ``week``, ``age`` or
+  ``age_band``, ``title``, ``text``
+
+Submissions only ever grow, so like the feeds in incremental.py the
+``StoryStore`` only ingests those newer than its watermark, chunk by chunk
+(see ``DataSource.iter_events``), and is saved next to the data source.
+Stories whose ``submitted_at`` is missing or unreadable are never ingested:
+a watermark cannot tell whether they were seen before, so keeping them
+would make the store depend on when the state was started. The
+loaded store is part of the data version shared by every session (see
+snapshot.py). As each chunk comes in it updates:
+
+- running counts of stories per program week x age band (one bincount)
+- the stories themselves, in a columnar ``RecordStore`` (see records.py)
+- an inverted index: for every word, the sorted positions of the stories
+  whose title or text has it, kept as one array grouped by word plus the
+  offset where each word's group starts
+
+A search looks up the stories of each query word and intersects them, rarest
+word first, then applies the week and age band filters to the matches only.
+It never scans the stories, so it stays in the milliseconds at tens of
+thousands of stories.
+"""
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from records import RecordStore
+from registrants import AGE_BANDS, age_band_codes
+
+TABLE = 'stories'
+STORY_COLUMNS = ['story_id', 'submitted_at', 'week', 'age', 'age_band', 'title', 'text']
+
+# What counts as a word, in both stories and queries
+WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+
+# Stories a search returns at most
+RESULT_LIMIT = 20
+
+STATE_FILE = 'stories.npz'
+
+_UNKNOWN_WEEK = -1
+
+
+def words(text):
+    """The distinct lowercase words of ``text``, in order."""
+    return list(dict.fromkeys(WORD.findall(text.lower())))
+
+
+class StoryStore:
+    """Story submissions with running counts and an inverted word index."""
+
+    def __init__(self):
+        self.stories = RecordStore(self._columns(pd.DataFrame(columns=STORY_COLUMNS), np.zeros(0, dtype=np.int8)))
+        # Row 0 counts stories without a week, row w + 1 those of week w
+        self.counts = np.zeros((1, len(AGE_BANDS)), dtype=np.int64)
+        self.vocabulary = pd.Index([], dtype=object)
+        # Story positions grouped by word code, each group sorted; the
+        # stories with word code c are postings[offsets[c]:offsets[c + 1]]
+        self.postings = np.zeros(0, dtype=np.int32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self._posting_words = np.zeros(0, dtype=np.int32)
+        self.watermark = None
+
+    def __len__(self):
+        return len(self.stories)
+
+    @staticmethod
+    def _columns(chunk, bands):
+        """The store's columns for a chunk of raw submissions."""
+        def text(column):
+            values = chunk[column] if column in chunk else pd.Series('', index=chunk.index)
+            return values.fillna('').astype(str).to_numpy(dtype=object)
+
+        week = pd.to_numeric(chunk['week'], errors='coerce') if 'week' in chunk else pd.Series(np.nan, index=chunk.index)
+        story_id = chunk['story_id'] if 'story_id' in chunk else pd.Series(np.arange(len(chunk)), index=chunk.index)
+        return {
+            'story_id': story_id.to_numpy(dtype=np.int64),
+            'submitted_at': pd.to_datetime(chunk['submitted_at'], errors='coerce').to_numpy(dtype='datetime64[ns]'),
+            'week': week.fillna(_UNKNOWN_WEEK).to_numpy(dtype=np.int16),
+            'age_band': pd.Categorical.from_codes(bands, categories=AGE_BANDS),
+            'title': text('title'),
+            'text': text('text')
+        }
+
+    def update(self, chunk):
+        """Ingest the dated submissions newer than the watermark; returns how many were added."""
+        times = pd.to_datetime(chunk['submitted_at'], errors='coerce')
+        keep = times.notna()
+        if self.watermark is not None:
+            keep &= times > self.watermark
+        keep = keep.to_numpy()
+        chunk, times = chunk[keep], times[keep]
+        if not len(chunk):
+            return 0
+        chunk = chunk.reset_index(drop=True)
+        bands = age_band_codes(chunk)
+        columns = self._columns(chunk, bands)
+
+        # Running counts
+        rows = columns['week'].astype(np.int64) + 1
+        if rows.max() >= len(self.counts):
+            self.counts = np.pad(self.counts, ((0, int(rows.max()) + 1 - len(self.counts)), (0, 0)))
+        self.counts += np.bincount(rows * len(AGE_BANDS) + bands, minlength=self.counts.size).reshape(self.counts.shape)
+
+        # (word, story) pairs of the chunk, with new words appended to the vocabulary
+        first = len(self)
+        tokens = (pd.Series(columns['title']) + ' ' + pd.Series(columns['text'])).str.lower().str.findall(WORD).explode().dropna()
+        pairs = pd.DataFrame({'story': tokens.index.to_numpy() + first, 'word': tokens.to_numpy()}).drop_duplicates()
+        new_words = pd.Index(pairs['word'].unique()).difference(self.vocabulary)
+        self.vocabulary = self.vocabulary.append(new_words)
+        codes = self.vocabulary.get_indexer(pairs['word'])
+
+        # Merge into the postings, grouped by word and sorted by story
+        word_codes = np.concatenate([self._posting_words, codes.astype(np.int32)])
+        stories = np.concatenate([self.postings, pairs['story'].to_numpy(dtype=np.int32)])
+        order = np.lexsort((stories, word_codes))
+        self._posting_words, self.postings = word_codes[order], stories[order]
+        self.offsets = np.searchsorted(self._posting_words, np.arange(len(self.vocabulary) + 1))
+
+        merged = {}
+        for name, values in columns.items():
+            existing = self.stories.column(name)
+            if isinstance(values, pd.Categorical):
+                merged[name] = pd.Categorical.from_codes(np.concatenate([existing.codes, values.codes]), categories=AGE_BANDS)
+            else:
+                merged[name] = np.concatenate([existing, values])
+        self.stories = RecordStore(merged)
+        self.watermark = max(times.max(), self.watermark) if self.watermark is not None else times.max()
+        return len(chunk)
+
+    def matching(self, word):
+        """Sorted positions of the stories that have ``word``."""
+        code = self.vocabulary.get_indexer([word])[0]
+        if code < 0:
+            return self.postings[:0]
+        return self.postings[self.offsets[code]:self.offsets[code + 1]]
+
+    def search(self, query='', week=None, age_band=None, limit=RESULT_LIMIT):
+        """Stories with every word of ``query``, optionally of one ``week`` and ``age_band``.
+
+        Returns the number of matches and a ``RecordStore`` of the newest
+        ``limit`` of them.
+        """
+        terms = words(query)
+        if terms:
+            postings = sorted((self.matching(term) for term in terms), key=len)
+            ids = postings[0]
+            for other in postings[1:]:
+                ids = np.intersect1d(ids, other, assume_unique=True)
+        else:
+            ids = np.arange(len(self), dtype=np.int32)
+        if week is not None:
+            ids = ids[self.stories.column('week')[ids] == week]
+        if age_band is not None:
+            ids = ids[self.stories.column('age_band').codes[ids] == AGE_BANDS.index(age_band)]
+
+        # Newest first
+        submitted = self.stories.column('submitted_at')[ids].astype(np.int64)
+        newest = ids[np.argsort(submitted, kind='stable')[::-1][:limit]]
+        return len(ids), self.stories.take(newest)
+
+    def weeks(self):
+        """Program weeks with at least one story, in order."""
+        return np.flatnonzero(self.counts[1:].sum(axis=1)).tolist()
+
+    def counts_by_week(self):
+        """``{'Week N': [stories per age band]}`` for every week with stories, plus 'Unknown' for stories without one."""
+        counts = {f'Week {week}': self.counts[week + 1].tolist() for week in self.weeks()}
+        if self.counts[0].any():
+            counts['Unknown'] = self.counts[0].tolist()
+        return counts
+
+    def save(self, path):
+        """Write the store to ``path`` (.npz), replacing any previous state atomically.
+
+        Text columns and the vocabulary are saved as UTF-8 bytes plus offsets,
+        so loading needs no pickling.
+        """
+        arrays = {
+            'counts': self.counts,
+            'postings': self.postings,
+            'posting_words': self._posting_words,
+            'age_band': self.stories.column('age_band').codes
+        }
+        for name in ('story_id', 'submitted_at', 'week'):
+            arrays[name] = self.stories.column(name)
+        for name, values in [('title', self.stories.column('title')), ('text', self.stories.column('text')),
+                             ('vocabulary', self.vocabulary)]:
+            arrays[name], arrays[name + '.offsets'] = _pack(values)
+        meta = {'watermark': self.watermark.isoformat() if self.watermark is not None else None}
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore the store saved at ``path``, or start empty if there is none."""
+        store = cls()
+        if not os.path.exists(path):
+            return store
+        with np.load(path, allow_pickle=False) as state:
+            meta = json.loads(str(state['meta']))
+            store.counts = state['counts']
+            store.postings = state['postings']
+            store._posting_words = state['posting_words']
+            store.vocabulary = pd.Index(_unpack(state['vocabulary'], state['vocabulary.offsets']), dtype=object)
+            store.stories = RecordStore({
+                'story_id': state['story_id'],
+                'submitted_at': state['submitted_at'],
+                'week': state['week'],
+                'age_band': pd.Categorical.from_codes(state['age_band'], categories=AGE_BANDS),
+                'title': _unpack(state['title'], state['title.offsets']),
+                'text': _unpack(state['text'], state['text.offsets'])
+            })
+        store.offsets = np.searchsorted(store._posting_words, np.arange(len(store.vocabulary) + 1))
+        if meta['watermark'] is not None:
+            store.watermark = pd.Timestamp(meta['watermark'])
+        return store
+
+
+def _pack(strings):
+    """UTF-8 bytes of ``strings`` back to back, and the offset where each starts (plus the end)."""
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack(data, offsets):
+    """The strings packed by ``_pack``, as an object array."""
+    raw = data.tobytes()
+    strings = np.empty(len(offsets) - 1, dtype=object)
+    strings[:] = [raw[start:stop].decode('utf-8') for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    return strings
+
+
+def result_rows(results):
+    """The stories of a search result as plain dicts for display, with ``submitted`` as a date string ('' if unknown)."""
+    frame = results.frame()
+    frame['submitted'] = frame['submitted_at'].dt.strftime('%b %d, %Y').fillna('')
+    frame['age_band'] = frame['age_band'].astype(str)
+    return frame[['story_id', 'week', 'age_band', 'submitted', 'title', 'text']].to_dict('records')
+
+
+def update_stories(source):
+    """Ingest the new submissions of ``source`` into its saved story store.
+
+    Returns the up-to-date ``StoryStore``, or None if the source has no
+    story table.
+    """
+    state_path = os.path.join(source.state_dir(), STATE_FILE)
+    store = StoryStore.load(state_path)
+    chunks = source.iter_events(TABLE, STORY_COLUMNS, 'submitted_at', store.watermark)
+    if chunks is None:
+        return None
+
+    if sum(store.update(chunk) for chunk in chunks):
+        os.makedirs(source.state_dir(), exist_ok=True)
+        store.save(state_path)
+    return store
+
+
+def apply_stories(data, store):
+    """Set the submission count in ``data`` and add the store as ``story_store``."""
+    data['stories_data']['Submitted'] = len(store)
+    data['story_store'] = store
+    return data
@@ -0,0 +1,469 @@
+"""Synthetic event data for stress-testing the Self-Care School Dashboard.
+
+Writes a complete data source (see data_sources.py): the aggregate tables
+from the built-in data plus realistic row-level logs in the schemas the
+dashboard reads, at any scale::
+
+    python synthetic.py data/stress.parquet --scale 100
+    python synthetic.py data/stress-csv --scale 0.05 --seed 7
+
+Scale 1 matches the volumes behind the built-in data, about 320k rows in
+total; scale 0.03 is about 10k rows and scale 155 about 50M. A path ending in
+``.parquet`` gets a Parquet directory, anything else a CSV directory.
+
+Tables and columns:
+
+- ``registrants``: ``registrant_id``, ``age``, ``channel``, ``downloads``,
+  ``completed_week_0``, ``registered_at``
+- ``badge_claims``: ``user_id``, ``week``, ``claimed_at``
+- ``podcast_plays``: ``user_id``, ``week``, ``day``, ``played_at``,
+  ``listen_seconds``
+- ``sms_deliveries``: ``campaign``, ``recipient_id``, ``delivered_at``
+- ``sms_clicks``: ``campaign``, ``recipient_id``, ``clicked_at``
+- ``pageviews``: ``visitor_id``, ``page``, ``viewed_at``
+- ``social_posts``: ``post_id``, ``campaign`` and the per-post metrics of
+  ``social.METRICS``
+- ``stories``: ``story_id``, ``submitted_at``, ``week``, ``age``, ``title``,
+  ``text``
+
+Every log is written in time order, in chunks of at most ``CHUNK_ROWS`` rows
+(one Parquet row group each), so memory stays flat at any scale. Each chunk
+draws from its own generator seeded with the seed, table, window and chunk
+number, so the same seed always produces the same files. Activity follows a
+daily cycle (``HOUR_WEIGHTS``); podcast plays decay after each episode's
+release and SMS clicks follow their delivery.
+
+The aggregate tables get the SMS delivery counts and the website totals of
+the generated logs, so the dashboard's numbers match them.
+"""
+import argparse
+import copy
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import data_sources
+import registrants
+import social
+from incremental import UserBitmap
+
+SEED = 42
+CHUNK_ROWS = 1_000_000
+
+# First day of Week 0; registration opens three weeks earlier
+PROGRAM_START = pd.Timestamp('2025-03-31')
+REGISTRATION_START = PROGRAM_START - pd.Timedelta(days=21)
+REGISTRATION_DAYS = 28
+PROGRAM_DAYS = 35
+
+# Relative activity by hour of day
+HOUR_WEIGHTS = np.array([
+    1.0, 0.6, 0.4, 0.3, 0.3, 0.5, 1.0, 2.0, 3.0, 3.5, 3.5, 3.5,
+    4.0, 3.5, 3.5, 3.5, 4.0, 4.5, 5.0, 5.5, 5.0, 4.0, 3.0, 2.0
+])
+
+# Share of registrants per age band (registrants.AGE_BANDS); the youngest
+# adults are as scarce as in the real program
+AGE_WEIGHTS = np.array([0.002, 0.0084, 0.10, 0.22, 0.27, 0.25, 0.14, 0.01])
+AGE_RANGES = list(zip([13, *registrants.AGE_BAND_EDGES], [*registrants.AGE_BAND_EDGES, 86]))
+
+CHANNELS = ['Facebook', 'Instagram', 'SMS', 'Website', 'Referral']
+CHANNEL_WEIGHTS = np.array([0.38, 0.22, 0.18, 0.14, 0.08])
+
+PAGES = ['/', '/register', '/podcast', '/stories', '/resources', '/badges', '/about']
+LANDING_WEIGHTS = np.array([0.45, 0.25, 0.12, 0.06, 0.05, 0.04, 0.03])
+PAGE_WEIGHTS = np.array([0.10, 0.20, 0.25, 0.15, 0.15, 0.10, 0.05])
+
+# Single-page sessions, and the geometric chance of stopping after each
+# further page: about 1.84 pageviews per session
+BOUNCE_SHARE = 0.35
+EXTRA_PAGE_STOP = 0.776
+
+# Posts behind the built-in social totals, and their campaigns
+SOCIAL_POSTS = 2_000
+SOCIAL_CAMPAIGNS = ['Awareness', 'Registration Drive', 'Week 0 Kickoff', 'Podcast Promo', 'Story Spotlight']
+SOCIAL_CAMPAIGN_WEIGHTS = np.array([0.35, 0.3, 0.15, 0.12, 0.08])
+
+# Words stories are written with, most common first, and their lengths
+STORY_WORDS = (
+    "i the and to my of a me was it this for in that with week self care felt "
+    "program learned finally time more how about helped family rest myself "
+    "healing boundaries podcast mother daughter sister friends community "
+    "listening breathing journal prayer anxiety stress trauma joy gratitude "
+    "sleep walk therapy support safe love strength courage peace tears laugh "
+    "morning night body mind heart voice homegirl hotline aces badge story "
+    "growth forgive patience honest grief hope purpose connection kindness"
+).split()
+STORY_WORD_RANGE = (40, 240)
+
+# When each SMS campaign was sent, relative to PROGRAM_START; deliveries go
+# out over SMS_BURST_SECONDS and clicks arrive within SMS_CLICK_HOURS
+SMS_SEND_OFFSETS = {
+    'Week 1 Reminder': pd.Timedelta(days=7, hours=10),
+    'Technical Issue': pd.Timedelta(days=11, hours=15)
+}
+SMS_BURST_SECONDS = 2 * 3600
+SMS_CLICK_HOURS = 72
+
+# Share of an episode's plays on each day after its release
+PLAY_DECAY = 0.55
+
+TABLE_IDS = {name: i for i, name in enumerate(
+    ['registrants', 'badge_claims', 'podcast_plays', 'sms_deliveries', 'sms_clicks', 'pageviews', 'social_posts', 'stories']
+)}
+
+
+def _rng(seed, table, window, chunk):
+    return np.random.default_rng([seed, TABLE_IDS[table], window, chunk])
+
+
+def _daily_cycle(day_weights):
+    """Per-hour probabilities for days weighted by ``day_weights``."""
+    day_weights = np.asarray(day_weights, dtype=float)
+    hours = HOUR_WEIGHTS / HOUR_WEIGHTS.sum()
+    return np.outer(day_weights / day_weights.sum(), hours).ravel()
+
+
+def _time_chunks(seed, table, window, start, total, bin_seconds, probabilities, chunk_rows):
+    """Spread ``total`` events over time bins and yield them in time-ordered chunks.
+
+    Yields ``(rng, seconds, end)``: the chunk's generator, sorted event
+    offsets in seconds from ``start`` and the offset where the chunk ends.
+    A chunk holds whole bins and at most ``chunk_rows`` events unless a
+    single bin has more.
+    """
+    counts = _rng(seed, table, window, 0).multinomial(total, probabilities)
+    chunk, first, size = 0, 0, 0
+    for index in range(len(counts) + 1):
+        if index < len(counts) and (size == 0 or size + counts[index] <= chunk_rows):
+            size += counts[index]
+            continue
+        if size:
+            chunk += 1
+            rng = _rng(seed, table, window, chunk)
+            bins = np.repeat(np.arange(first, index), counts[first:index])
+            seconds = np.sort(bins * bin_seconds + rng.integers(0, bin_seconds, size))
+            yield rng, seconds, index * bin_seconds
+        first, size = index, counts[index] if index < len(counts) else 0
+
+
+def _timestamps(start, seconds):
+    return pd.to_datetime(start) + pd.to_timedelta(seconds, unit='s')
+
+
+def _categorical(values, categories):
+    return pd.Categorical.from_codes(values, categories=categories)
+
+
+def generate_registrants(scale, seed=SEED, chunk_rows=CHUNK_ROWS):
+    total = round(data_sources.program_metrics['Registrants']['value'] * scale)
+    downloads_rate = data_sources.stream_data['Downloads'] / data_sources.program_metrics['Registrants']['value']
+    completion_rate = (data_sources.program_metrics['Completed Week 0']['value']
+                       / data_sources.program_metrics['Registrants']['value'])
+    lows, highs = np.array([*AGE_RANGES, (0, 1)]).T
+    unknown = registrants.AGE_BANDS.index('Unknown')
+
+    next_id = 0
+    probabilities = _daily_cycle(np.ones(REGISTRATION_DAYS))
+    for rng, seconds, _ in _time_chunks(seed, 'registrants', 0, REGISTRATION_START, total, 3600, probabilities, chunk_rows):
+        size = len(seconds)
+        band = rng.choice(len(AGE_WEIGHTS), size, p=AGE_WEIGHTS / AGE_WEIGHTS.sum())
+        age = rng.integers(lows[band], highs[band]).astype(float)
+        age[band == unknown] = np.nan
+        yield pd.DataFrame({
+            'registrant_id': np.arange(next_id, next_id + size, dtype=np.int32),
+            'age': age,
+            'channel': _categorical(rng.choice(len(CHANNELS), size, p=CHANNEL_WEIGHTS), CHANNELS),
+            'downloads': rng.poisson(downloads_rate, size).astype(np.int32),
+            'completed_week_0': rng.random(size) < completion_rate,
+            'registered_at': _timestamps(REGISTRATION_START, seconds)
+        })
+        next_id += size
+
+
+def generate_badge_claims(scale, seed=SEED, chunk_rows=CHUNK_ROWS):
+    users = round(data_sources.program_metrics['Registrants']['value'] * scale)
+    probabilities = _daily_cycle(np.ones(7))
+    for week_name in data_sources.week_names(data_sources.badges_data):
+        week = int(week_name.split()[-1])
+        start = PROGRAM_START + pd.Timedelta(days=7 * week)
+        total = round(data_sources.badges_data[week_name] * scale)
+        for rng, seconds, _ in _time_chunks(seed, 'badge_claims', week, start, total, 3600, probabilities, chunk_rows):
+            yield pd.DataFrame({
+                'user_id': rng.integers(0, users, len(seconds), dtype=np.int32),
+                'week': np.full(len(seconds), week, dtype=np.int8),
+                'claimed_at': _timestamps(start, seconds)
+            })
+
+
+def _episode_day_weights(episodes):
+    """Expected plays of each episode on each program day (episodes x days)."""
+    weights = np.zeros((len(episodes), PROGRAM_DAYS))
+    for i, episode in enumerate(episodes):
+        release = 7 * episode['week'] + episode['day'] - 1
+        decay = PLAY_DECAY ** np.arange(PROGRAM_DAYS - release)
+        weights[i, release:] = episode['plays'] * decay / decay.sum()
+    return weights
+
+
+def generate_podcast_plays(scale, seed=SEED, chunk_rows=CHUNK_ROWS):
+    users = round(data_sources.program_metrics['Registrants']['value'] * scale)
+    episodes = data_sources.podcast_data['Episodes']
+    weights = _episode_day_weights(episodes)
+    day_totals = weights.sum(axis=0)
+    episode_weeks = np.array([episode['week'] for episode in episodes], dtype=np.int8)
+    episode_days = np.array([episode['day'] for episode in episodes], dtype=np.int8)
+    # Episode running times, fixed per seed
+    lengths = _rng(seed, 'podcast_plays', 1, 0).integers(18 * 60, 36 * 60, len(episodes))
+
+    total = round(sum(episode['plays'] for episode in episodes) * scale)
+    for rng, seconds, _ in _time_chunks(seed, 'podcast_plays', 0, PROGRAM_START, total, 3600,
+                                        _daily_cycle(day_totals), chunk_rows):
+        day = seconds // 86400
+        episode = np.empty(len(seconds), dtype=np.int64)
+        for d in np.unique(day):
+            mask = day == d
+            episode[mask] = rng.choice(len(episodes), mask.sum(), p=weights[:, d] / day_totals[d])
+        yield pd.DataFrame({
+            'user_id': rng.integers(0, users, len(seconds), dtype=np.int32),
+            'week': episode_weeks[episode],
+            'day': episode_days[episode],
+            'played_at': _timestamps(PROGRAM_START, seconds),
+            'listen_seconds': (lengths[episode] * rng.beta(2.0, 1.2, len(seconds))).astype(np.int32)
+        })
+
+
+def _sms_campaigns(scale):
+    """``(campaign, send time, deliveries, clicks, contacts)`` for each campaign."""
+    contacts = max(round(fields['delivered'] * scale) for fields in data_sources.sms_data.values())
+    return [
+        (campaign, PROGRAM_START + SMS_SEND_OFFSETS.get(campaign, pd.Timedelta(days=7 * i + 3, hours=10)),
+         round(fields['delivered'] * scale), round(fields['clicked'] * scale), contacts)
+        for i, (campaign, fields) in enumerate(data_sources.sms_data.items())
+    ]
+
+
+def _recipient_ids(positions, contacts, campaign_index):
+    # A fixed pseudo-random permutation of the contact list per campaign:
+    # multiplying by a stride coprime with the list size is a bijection
+    stride = 2_654_435_761 % contacts or 1
+    while math.gcd(stride, contacts) != 1:
+        stride += 1
+    return ((positions * stride + campaign_index * 7919) % contacts).astype(np.int32)
+
+
+def generate_sms_deliveries(scale, seed=SEED, chunk_rows=CHUNK_ROWS):
+    campaigns = [name for name, *_ in _sms_campaigns(scale)]
+    for index, (campaign, sent_at, deliveries, _, contacts) in enumerate(_sms_campaigns(scale)):
+        # Messages go out in contact-list order over the burst
+        for first in range(0, deliveries, chunk_rows):
+            positions = np.arange(first, min(first + chunk_rows, deliveries))
+            yield pd.DataFrame({
+                'campaign': _categorical(np.full(len(positions), index), campaigns),
+                'recipient_id': _recipient_ids(positions, contacts, index),
+                'delivered_at': _timestamps(sent_at, positions * SMS_BURST_SECONDS // max(deliveries, 1))
+            })
+
+
+def generate_sms_clicks(scale, seed=SEED, chunk_rows=CHUNK_ROWS):
+    campaigns = [name for name, *_ in _sms_campaigns(scale)]
+    for index, (campaign, sent_at, deliveries, clicks, contacts) in enumerate(_sms_campaigns(scale)):
+        # Click time = delivery time + a log-normal delay (median 20 minutes),
+        # binned by minute; each click goes to someone already delivered to
+        plan = _rng(seed, 'sms_clicks', index, 0)
+        sample = plan.integers(0, SMS_BURST_SECONDS, 200_000) + plan.lognormal(np.log(1200), 1.5, 200_000)
+        minutes = SMS_CLICK_HOURS * 60
+        histogram = np.bincount(np.minimum(sample // 60, minutes - 1).astype(np.int64), minlength=minutes)
+        for rng, seconds, _ in _time_chunks(seed, 'sms_clicks', index + 1, sent_at, clicks, 60,
+                                            histogram / histogram.sum(), chunk_rows):
+            delivered = np.clip(seconds * deliveries // SMS_BURST_SECONDS, 1, deliveries)
+            positions = (rng.random(len(seconds)) * delivered).astype(np.int64)
+            yield pd.DataFrame({
+                'campaign': _categorical(np.full(len(seconds), index), campaigns),
+                'recipient_id': _recipient_ids(positions, contacts, index),
+                'clicked_at': _timestamps(sent_at, seconds)
+            })
+
+
+def generate_pageviews(scale, seed=SEED, chunk_rows=CHUNK_ROWS, totals=None):
+    """Pageview log; fills ``totals`` with the session, visitor and bounce counts if given."""
+    sessions = round(data_sources.traffic_data['Sessions'] * scale)
+    visitors = round(data_sources.traffic_data['Visitors'] * scale)
+    days = REGISTRATION_DAYS + PROGRAM_DAYS - 14
+    probabilities = _daily_cycle(np.ones(days))
+    seen = UserBitmap()
+    bounces = 0
+    carry = None
+    # Sessions per chunk are sized so the expanded pageviews stay near chunk_rows
+    session_rows = max(chunk_rows // 2, 1)
+    for rng, seconds, end in _time_chunks(seed, 'pageviews', 0, REGISTRATION_START, sessions, 3600,
+                                          probabilities, session_rows):
+        pages = np.where(rng.random(len(seconds)) < BOUNCE_SHARE, 1, 2 + rng.geometric(EXTRA_PAGE_STOP, len(seconds)) - 1)
+        visitor = rng.integers(0, visitors, len(seconds), dtype=np.int32)
+        seen.add(visitor)
+        bounces += int((pages == 1).sum())
+
+        rows = int(pages.sum())
+        session = np.repeat(np.arange(len(seconds)), pages)
+        first = np.r_[0, np.cumsum(pages)[:-1]]
+        step = np.arange(rows) - np.repeat(first, pages)
+        # Gaps between pages of a session, about 45 seconds on average
+        gaps = np.where(step == 0, 0, rng.exponential(45, rows)).astype(np.int64)
+        gap_totals = np.cumsum(gaps)
+        offsets = seconds[session] + gap_totals - np.repeat(gap_totals[first], pages)
+        page = np.where(step == 0,
+                        rng.choice(len(PAGES), rows, p=LANDING_WEIGHTS),
+                        rng.choice(len(PAGES), rows, p=PAGE_WEIGHTS))
+
+        frame = pd.DataFrame({
+            'visitor_id': visitor[session],
+            'page': _categorical(page, PAGES),
+            'viewed_at': offsets
+        })
+        if carry is not None:
+            frame = pd.concat([carry, frame], ignore_index=True)
+        frame = frame.sort_values('viewed_at', kind='stable')
+        # Pages of sessions running past the end of this chunk go with the next one
+        later = frame['viewed_at'].to_numpy() >= end
+        carry = frame[later]
+        yield frame[~later].assign(viewed_at=lambda df: _timestamps(REGISTRATION_START, df['viewed_at']))
+
+    if carry is not None and len(carry):
+        yield carry.assign(viewed_at=lambda df: _timestamps(REGISTRATION_START, df['viewed_at']))
+    if totals is not None:
+        totals.update(sessions=sessions, visitors=len(seen), bounces=bounces)
+
+
+def generate_social_posts(scale, seed=SEED, chunk_rows=CHUNK_ROWS):
+    total = max(round(SOCIAL_POSTS * scale), 1)
+    for chunk, first in enumerate(range(0, total, chunk_rows)):
+        rng = _rng(seed, 'social_posts', 0, chunk)
+        size = min(chunk_rows, total - first)
+        # Reach is heavy-tailed: a few posts get most of every metric. The
+        # lognormal weights average 1, so the metrics add up to the built-in
+        # totals times the scale
+        weight = rng.lognormal(0, 1, size) / np.exp(0.5)
+        yield pd.DataFrame({
+            'post_id': np.arange(first, first + size, dtype=np.int32),
+            'campaign': _categorical(rng.choice(len(SOCIAL_CAMPAIGNS), size, p=SOCIAL_CAMPAIGN_WEIGHTS), SOCIAL_CAMPAIGNS),
+            **{
+                column: rng.poisson(weight * data_sources.social_data[metric] / SOCIAL_POSTS).astype(np.int32)
+                for column, metric in social.METRICS.items()
+            }
+        })
+
+
+def generate_stories(scale, seed=SEED, chunk_rows=CHUNK_ROWS):
+    total = round(data_sources.stories_data['Submitted'] * scale)
+    lows, highs = np.array([*AGE_RANGES, (0, 1)]).T
+    # Zipf-like word frequencies, as in real text
+    word_weights = 1 / np.arange(1, len(STORY_WORDS) + 1)
+    word_weights /= word_weights.sum()
+    vocabulary = np.array(STORY_WORDS, dtype=object)
+
+    next_id = 0
+    probabilities = _daily_cycle(np.ones(PROGRAM_DAYS))
+    for rng, seconds, _ in _time_chunks(seed, 'stories', 0, PROGRAM_START, total, 3600, probabilities, chunk_rows):
+        size = len(seconds)
+        band = rng.choice(len(AGE_WEIGHTS), size, p=AGE_WEIGHTS / AGE_WEIGHTS.sum())
+        age = rng.integers(lows[band], highs[band]).astype(float)
+        age[band == registrants.AGE_BANDS.index('Unknown')] = np.nan
+        lengths = rng.integers(*STORY_WORD_RANGE, size)
+        text = vocabulary[rng.choice(len(vocabulary), int(lengths.sum()), p=word_weights)]
+        bounds = np.r_[0, np.cumsum(lengths)]
+        yield pd.DataFrame({
+            'story_id': np.arange(next_id, next_id + size, dtype=np.int32),
+            'submitted_at': _timestamps(PROGRAM_START, seconds),
+            'week': (seconds // (7 * 86400)).astype(np.int8),
+            'age': age,
+            'title': [' '.join(text[start:start + 4]).capitalize() for start in bounds[:-1]],
+            'text': [' '.join(text[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])]
+        })
+        next_id += size
+
+
+GENERATORS = {
+    'registrants': generate_registrants,
+    'badge_claims': generate_badge_claims,
+    'podcast_plays': generate_podcast_plays,
+    'sms_deliveries': generate_sms_deliveries,
+    'sms_clicks': generate_sms_clicks,
+    'pageviews': generate_pageviews,
+    'social_posts': generate_social_posts,
+    'stories': generate_stories
+}
+
+
+def _write_chunks(path, chunks):
+    """Write DataFrame chunks to one Parquet (row group per chunk) or CSV file; returns the row count."""
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            if path.endswith('.parquet'):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(path, mode='a' if rows else 'w', header=not rows, index=False)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def generate(path, scale=1.0, seed=SEED, chunk_rows=CHUNK_ROWS, tables=None):
+    """Write a synthetic data source to ``path``; returns ``{table: rows}``."""
+    source = data_sources.open_source(path)
+    if not isinstance(source, (data_sources.CSVSource, data_sources.ParquetSource)):
+        raise ValueError("Synthetic data can only be written to a CSV or Parquet directory")
+    os.makedirs(path, exist_ok=True)
+
+    counts = {}
+    web = {}
+    for name in tables or GENERATORS:
+        kwargs = {'totals': web} if name == 'pageviews' else {}
+        chunks = GENERATORS[name](scale, seed=seed, chunk_rows=chunk_rows, **kwargs)
+        counts[name] = _write_chunks(source._table_path(name), chunks)
+
+    # Aggregate tables, with the totals the logs do not otherwise feed back
+    data = copy.deepcopy(data_sources.BUILTIN_DATA)
+    for campaign, _, deliveries, clicks, _ in _sms_campaigns(scale):
+        data['sms_data'][campaign].update(
+            delivered=deliveries, clicked=clicks, rate=round(clicks / max(deliveries, 1) * 100, 1)
+        )
+    if web:
+        data['traffic_data'].update({
+            'Pageviews': counts['pageviews'],
+            'Sessions': web['sessions'],
+            'Visitors': web['visitors'],
+            'Bounce Rate': round(web['bounces'] / max(web['sessions'], 1) * 100, 1)
+        })
+    source.write_tables(data_sources.to_tables(data))
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help="output directory; ending in .parquet writes Parquet, otherwise CSV")
+    parser.add_argument('--scale', type=float, default=1.0, help="volume relative to the built-in data (default 1)")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--tables', nargs='+', choices=list(GENERATORS), help="only generate these logs")
+    args = parser.parse_args(argv)
+
+    counts = generate(args.path, scale=args.scale, seed=args.seed, chunk_rows=args.chunk_rows, tables=args.tables)
+    for name, rows in counts.items():
+        print(f"{name:<16}{rows:>14,} rows")
+    print(f"{'total':<16}{sum(counts.values()):>14,} rows -> {args.path}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
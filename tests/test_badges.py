@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from badges import BadgeStats, apply_badges
+
+
+def claims(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'user_id': rng.integers(0, 300, n),
+        'week': rng.integers(0, 4, n),
+        'claimed_at': pd.Timestamp('2025-01-06') + pd.to_timedelta(np.arange(n), unit='min')
+    })
+
+
+def check(stats, events):
+    users = events.groupby('week')['user_id'].apply(set)
+    assert stats.claims == events['week'].value_counts().to_dict()
+    assert len(stats.unique_users()) == events['user_id'].nunique()
+    assert stats.continuation() == {
+        week: (len(users[week]), len(users[week] & users[week + 1])) for week in users.index if week + 1 in users.index
+    }
+    # Cohort = week of first claim; cell = cohort users claiming in the later week
+    first = events.groupby('user_id')['week'].min()
+    expected = pd.crosstab(events['user_id'].map(first), events['week'],
+                           values=events['user_id'], aggfunc='nunique')
+    expected = expected.reindex(expected.columns).fillna(0).astype(int)
+    assert stats.retention_matrix().tolist() == expected.to_numpy().tolist()
+
+
+def test_stats_match_pandas():
+    events = claims(2_000)
+    stats = BadgeStats()
+    stats.update(events)
+    check(stats, events)
+
+
+def test_state_round_trip_then_refresh(tmp_path):
+    events = claims(2_000, seed=1)
+    path = str(tmp_path / 'badges.npz')
+    stats = BadgeStats()
+    stats.update(events[:700])
+    stats.save(path)
+
+    restored = BadgeStats.load(path)
+    assert restored.claims == stats.claims and restored.watermark == stats.watermark
+    assert restored.update(events) == 1_300
+    check(restored, events)
+
+
+def test_empty_log():
+    stats = BadgeStats()
+    assert stats.update(claims(0)) == 0
+    assert stats.total() == 0 and len(stats.unique_users()) == 0
+    assert stats.continuation() == {} and stats.retention_matrix().shape == (0, 0)
+
+
+def test_hashed_user_ids(tmp_path):
+    events = claims(3_000, seed=2)
+    hashes = np.random.default_rng(2).integers(-2 ** 62, 2 ** 62, 300)
+    events['user_id'] = hashes[events['user_id']]
+    path = str(tmp_path / 'badges.npz')
+    stats = BadgeStats()
+    stats.update(events[:1_000])
+    stats.save(path)
+    restored = BadgeStats.load(path)
+    restored.update(events)
+    check(restored, events)
+    # Each week's bitmap follows the distinct users, not the size of the ids
+    assert len(restored.codes) == events['user_id'].nunique()
+    assert all(len(users.bits) <= 2 * 300 // 8 + 1 for users in restored.users.values())
+
+
+def test_apply_badges_replaces_every_week():
+    events = claims(500)
+    events = events[events['week'] != 1]
+    stats = BadgeStats()
+    stats.update(events)
+    data = {'badges_data': {'Week 0': 5, 'Week 1': 7, 'Week 4': 9, 'Target': 60}}
+    badges = apply_badges(data, stats)['badges_data']
+    weeks = {key: value for key, value in badges.items() if key.startswith('Week ')}
+    assert sorted(weeks) == ['Week 0', 'Week 1', 'Week 2', 'Week 3'] and weeks['Week 1'] == 0
+    assert sum(weeks.values()) == badges['Total Claimed'] == len(events)
+    assert badges['Target'] == 60
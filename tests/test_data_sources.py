@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from badges import update_badges
+from data_sources import CSVSource, ParquetSource
+
+
+def claims(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'user_id': rng.integers(0, 200, n),
+        'week': rng.integers(0, 3, n),
+        'claimed_at': pd.Timestamp('2025-01-06') + pd.to_timedelta(np.arange(n), unit='min')
+    })
+
+
+@pytest.mark.parametrize('source_type', [ParquetSource, CSVSource])
+@pytest.mark.parametrize('as_text', [False, True])
+def test_refresh_twice(tmp_path, source_type, as_text):
+    events = claims(1_000)
+    if as_text:
+        events['claimed_at'] = events['claimed_at'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    source = source_type(str(tmp_path))
+    path = source._table_path('badge_claims')
+
+    def write(frame):
+        if source_type is ParquetSource:
+            frame.to_parquet(path, index=False, row_group_size=200)
+        else:
+            frame.to_csv(path, index=False)
+
+    write(events[:600])
+    assert update_badges(source).total() == 600
+    # The second refresh filters the log by the saved watermark
+    write(events)
+    stats = update_badges(source)
+    assert stats.claims == events['week'].value_counts().to_dict()
+    assert len(stats.unique_users()) == events['user_id'].nunique()
+
+    since = pd.Timestamp(pd.to_datetime(events['claimed_at']).iloc[899])
+    newer = source.read_events('badge_claims', ['user_id', 'week', 'claimed_at'], 'claimed_at', since)
+    assert len(newer) == 100
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecast
+from forecast import BAND, SEED
+
+
+def weekly(values):
+    return {f'Week {week}': value for week, value in enumerate(values)}
+
+
+def test_bands_are_percentiles_of_the_simulated_paths():
+    history = [120, 150, 140, 190]
+    result = forecast.forecast('Plays', weekly(history), program_weeks=8, paths=2_000)
+    values = forecast.simulate(history, 4, 2_000, np.random.default_rng(SEED)).round()
+    quantiles = pd.DataFrame(values).quantile([q / 100 for q in BAND]).round()
+    assert result.future_weeks == ['Week 4', 'Week 5', 'Week 6', 'Week 7']
+    assert [result.low, result.median, result.high] == quantiles.to_numpy().tolist()
+    totals = pd.Series(sum(history) + values.sum(axis=1)).quantile([q / 100 for q in BAND]).round()
+    assert result.total == totals.tolist()
+    assert all(low <= median <= high for low, median, high in zip(result.low, result.median, result.high))
+
+
+def test_steady_growth_is_projected_exactly():
+    # Doubling every week has no volatility, so every path is the same
+    result = forecast.forecast('Claims', weekly([10, 20, 40, 80]), target=500, program_weeks=6, paths=500)
+    assert result.low == result.median == result.high == [160, 320]
+    assert result.total == [630, 630, 630]
+    assert result.chance == 0.0
+
+
+def test_targets_and_cap():
+    flat = weekly([100, 100, 100])
+    assert forecast.forecast('x', flat, target=100, program_weeks=5).chance == 1.0
+    assert forecast.forecast('x', flat, target=101, program_weeks=5).chance == 0.0
+    # A cumulative target counts the program so far plus the forecast weeks
+    cumulative = forecast.forecast('x', flat, target=500, cumulative=True, program_weeks=5)
+    assert cumulative.total == [500, 500, 500] and cumulative.chance == 1.0
+    assert forecast.forecast('x', flat, target=500, cumulative=True, so_far=250, program_weeks=5).chance == 0.0
+    capped = forecast.forecast('x', weekly([50, 100, 200]), cap=300, program_weeks=6)
+    assert max(capped.high) == 300
+
+
+def test_same_data_same_bands():
+    series = weekly([5, 9, 4, 12, 7])
+    assert forecast.forecast('x', series) == forecast.forecast('x', series)
+
+
+def test_short_and_finished_series():
+    assert forecast.forecast('x', {}) is None
+    single = forecast.forecast('x', weekly([40]), program_weeks=3, paths=1_000)
+    assert single.future_weeks == ['Week 1', 'Week 2'] and single.low[0] < 40 < single.high[0]
+    # Past the last program week the forecast is one week ahead
+    assert forecast.forecast('x', weekly([1, 2, 3, 4]), program_weeks=2).future_weeks == ['Week 4']
+
+
+@pytest.mark.parametrize('badge_weeks, plays, names', [
+    ({'Week 0': 30, 'Week 1': 45}, {'Week 0': 200}, ['Badge Claims', 'Podcast Plays']),
+    ({}, {}, [])
+])
+def test_forecasts_skip_empty_series(badge_weeks, plays, names):
+    data = {
+        'badges_data': {**badge_weeks, 'Target': 60},
+        'podcast_data': {'Weekly Plays': plays},
+        'program_metrics': {'Registrants': {'value': 100}}
+    }
+    assert sorted(forecast.forecasts(data)) == names
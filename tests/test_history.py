@@ -0,0 +1,84 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import history
+from history import HistoryStore, bucket_start
+
+DAY = 86400
+
+
+def at(text):
+    return int(pd.Timestamp(text, tz='UTC').timestamp())
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / 'history.db'))
+
+
+def rollup_rows(store, grain, metric):
+    with sqlite3.connect(store.path) as conn:
+        return conn.execute(
+            'SELECT bucket, first, last, low, high FROM rollups WHERE grain = ? AND metric = ? ORDER BY bucket',
+            (grain, metric)
+        ).fetchall()
+
+
+def test_bucket_start():
+    # 2025-01-08 was a Wednesday
+    wednesday = at('2025-01-08 15:30')
+    assert bucket_start(wednesday, 'daily') == at('2025-01-08')
+    assert bucket_start(wednesday, 'weekly') == at('2025-01-06')
+    assert bucket_start(wednesday, 'monthly') == at('2025-01-01')
+    assert bucket_start(at('2025-01-06'), 'weekly') == at('2025-01-06')
+
+
+def test_rollups_match_pandas_resample(store):
+    times = pd.date_range('2025-01-01', periods=24 * 40, freq='h', tz='UTC')
+    values = [float((i * 37) % 101) for i in range(len(times))]
+    for time, value in zip(times, values):
+        store.record({'traffic_data.Visitors': value}, at=int(time.timestamp()))
+
+    series = pd.Series(values, index=times)
+    for grain, rule in [('daily', 'D'), ('weekly', 'W-MON'), ('monthly', 'MS')]:
+        resampled = series.resample(rule, label='left', closed='left').agg(['first', 'last', 'min', 'max'])
+        expected = [
+            (int(bucket.timestamp()), *row)
+            for bucket, row in zip(resampled.index, resampled.itertuples(index=False))
+        ]
+        assert rollup_rows(store, grain, 'traffic_data.Visitors') == expected
+
+
+def test_same_hour_replaces_snapshot(store):
+    store.record({'kpi.x': 1.0}, at=at('2025-01-01 10:05'))
+    store.record({'kpi.x': 5.0}, at=at('2025-01-01 10:40'))
+    assert store.record({'kpi.x': 5.0}, at=at('2025-01-01 10:50')) is False
+    assert rollup_rows(store, 'daily', 'kpi.x') == [(at('2025-01-01'), 1.0, 5.0, 1.0, 5.0)]
+
+
+def test_trends_last_value_per_period(store):
+    for day in range(10):
+        store.record({'a': float(day), 'b': float(-day)}, at=at('2025-03-01') + day * DAY)
+    trends = store.trends(['a', 'b', 'missing'], points=4, at=at('2025-03-10 12:00'))
+    assert trends == {'a': [6.0, 7.0, 8.0, 9.0], 'b': [-6.0, -7.0, -8.0, -9.0], 'missing': []}
+    assert store.trends(['a'], grain='monthly', at=at('2025-03-10')) == {'a': [9.0]}
+    with pytest.raises(ValueError):
+        store.trends(['a'], grain='hourly')
+
+
+def test_empty_store(store):
+    assert store.trends(['a'], at=at('2025-01-01')) == {'a': []}
+    assert store.trends([], at=at('2025-01-01')) == {}
+
+
+def test_metrics_from_skips_missing_kpis():
+    data = {table: {} for table in ('program_metrics', 'age_data', 'traffic_data', 'stream_data', 'social_data',
+                                    'badges_data', 'stories_data', 'podcast_data')}
+    data['program_metrics']['Registrants'] = {'value': 10}
+    data['traffic_data'].update({'Visitors': 5, 'Label': 'x', 'Flag': True})
+    kpi_results = {'progress': {'A': {'current': 3}, 'B': {'current': None}}}
+    assert history.metrics_from(data, kpi_results, prefix='c1.') == {
+        'c1.program_metrics.Registrants': 10, 'c1.traffic_data.Visitors': 5, 'c1.kpi.A': 3
+    }
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental import FEEDS, IncrementalAggregator, UserBitmap
+
+FEED = FEEDS['podcast_plays']
+
+
+def plays(n, seed=0, start='2025-01-06'):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'user_id': rng.integers(0, 500, n),
+        'week': rng.integers(0, 3, n),
+        'day': rng.integers(1, 6, n),
+        'played_at': pd.Timestamp(start) + pd.to_timedelta(np.arange(n), unit='min')
+    })
+
+
+def reference(events):
+    counts = events.groupby(['week', 'day']).size()
+    return {key: int(count) for key, count in counts.items()}, events['user_id'].nunique()
+
+
+def test_bitmap_matches_python_sets():
+    a_ids, b_ids = [0, 3, 7, 8, 64, 1000, 3], [3, 8, 9, 2000]
+    a, b = UserBitmap(), UserBitmap()
+    a.add(a_ids)
+    b.add(b_ids)
+    assert len(a) == len(set(a_ids))
+    assert a.ids().tolist() == sorted(set(a_ids))
+    assert (a | b).ids().tolist() == sorted(set(a_ids) | set(b_ids))
+    assert (a & b).ids().tolist() == sorted(set(a_ids) & set(b_ids))
+    assert (a - b).ids().tolist() == sorted(set(a_ids) - set(b_ids))
+    assert 1000 in a and 1001 not in a and 10 ** 6 not in a
+
+
+def test_bitmap_popcount_counts_every_byte():
+    ids = np.random.default_rng(1).integers(0, 10_000, 5_000)
+    bitmap = UserBitmap()
+    for chunk in np.array_split(ids, 7):
+        bitmap.add(chunk)
+    assert len(bitmap) == len(np.unique(ids))
+
+
+def test_bitmap_empty_and_negative_ids():
+    bitmap = UserBitmap()
+    bitmap.add([])
+    assert len(bitmap) == 0 and bitmap.ids().tolist() == []
+    with pytest.raises(ValueError):
+        bitmap.add([-1, 2])
+
+
+def test_aggregator_matches_groupby():
+    events = plays(2_000)
+    aggregator = IncrementalAggregator(FEED)
+    assert aggregator.update(events) == len(events)
+    counts, users = reference(events)
+    assert aggregator.counts == counts
+    assert len(aggregator.users) == users
+    assert aggregator.total() == len(events)
+    assert aggregator.watermark == events['played_at'].max()
+
+
+def test_aggregator_skips_events_at_or_before_watermark():
+    events = plays(1_000)
+    aggregator = IncrementalAggregator(FEED)
+    aggregator.update(events[:600])
+    # Re-reading the whole log only applies the 400 newer events
+    assert aggregator.update(events) == 400
+    assert aggregator.update(events) == 0
+    assert aggregator.counts == reference(events)[0]
+
+
+def test_aggregator_empty_input():
+    aggregator = IncrementalAggregator(FEED)
+    assert aggregator.update(plays(0)) == 0
+    assert aggregator.counts == {} and aggregator.watermark is None and len(aggregator.users) == 0
+
+
+def test_aggregator_state_round_trip_then_refresh(tmp_path):
+    events = plays(3_000, seed=2)
+    path = str(tmp_path / 'plays.npz')
+    aggregator = IncrementalAggregator(FEED)
+    aggregator.update(events[:1_800])
+    aggregator.save(path)
+
+    restored = IncrementalAggregator.load(FEED, path)
+    assert restored.counts == aggregator.counts
+    assert restored.watermark == aggregator.watermark
+    assert restored.users.ids().tolist() == aggregator.users.ids().tolist()
+
+    assert restored.update(events) == 1_200
+    counts, users = reference(events)
+    assert restored.counts == counts
+    assert len(restored.users) == users
+
+
+def test_aggregator_load_without_state(tmp_path):
+    aggregator = IncrementalAggregator.load(FEED, str(tmp_path / 'missing.npz'))
+    assert aggregator.counts == {} and aggregator.watermark is None
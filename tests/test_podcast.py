@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from data_sources import CSVSource
+from podcast import RETENTION_MINUTES, ListenStats, update_plays
+
+
+def plays(n, seed=0):
+    rng = np.random.default_rng(seed)
+    events = pd.DataFrame({
+        'user_id': rng.integers(0, 400, n),
+        'week': rng.integers(0, 3, n),
+        'day': rng.integers(1, 6, n),
+        'played_at': pd.Timestamp('2025-01-06') + pd.to_timedelta(np.arange(n), unit='min'),
+        'listen_seconds': rng.integers(0, 7_200, n).astype(float)
+    })
+    events.loc[::9, 'listen_seconds'] = np.nan
+    return events
+
+
+def reference(events):
+    events = events.dropna(subset=['listen_seconds'])
+    minutes = (events['listen_seconds'] // 60).clip(0, RETENTION_MINUTES).astype(int)
+    return {
+        (int(week), int(day)): np.bincount(group, minlength=RETENTION_MINUTES + 1).tolist()
+        for (week, day), group in minutes.groupby([events['week'], events['day']])
+    }
+
+
+def histograms(stats):
+    return {key: row.tolist() for key, row in stats.histograms.items()}
+
+
+def test_histograms_match_groupby():
+    events = plays(3_000)
+    stats = ListenStats()
+    stats.update(events[:1_000])
+    stats.update(events)
+    assert histograms(stats) == reference(events)
+
+
+def test_empty_log():
+    stats = ListenStats()
+    assert stats.update(plays(0)) == 0
+    assert stats.histograms == {} and stats.watermark is None
+
+
+def test_update_plays_refreshes_saved_state(tmp_path):
+    events = plays(4_000, seed=5)
+    log = tmp_path / 'podcast_plays.csv'
+    events[:2_500].to_csv(log, index=False)
+    source = CSVSource(str(tmp_path))
+    update_plays(source)
+
+    # New plays appended to the log; the saved states only apply those
+    events.to_csv(log, index=False)
+    aggregator, listens = update_plays(source)
+    assert aggregator.counts == {key: int(count) for key, count in events.groupby(['week', 'day']).size().items()}
+    assert len(aggregator.users) == events['user_id'].nunique()
+    assert histograms(listens) == reference(events)
+
+
+def test_update_plays_without_log(tmp_path):
+    assert update_plays(CSVSource(str(tmp_path))) == (None, None)
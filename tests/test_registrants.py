@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from registrants import FUNNEL_STAGES, compact_registrants, funnel_conversions, funnel_cube
+
+
+def raw_registrants(n, seed=0):
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({
+        'age': rng.integers(14, 80, n).astype(float),
+        'downloads': rng.integers(0, 3, n),
+        'completed_week_0': rng.random(n) < 0.4,
+        'channel': rng.choice(['SMS', 'Facebook', 'Email', None], n),
+        'registered_at': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 30, n), unit='D')
+    })
+    raw.loc[::17, 'age'] = np.nan
+    raw.loc[::23, 'registered_at'] = None
+    return raw
+
+
+def reference(frame, by=None, **filters):
+    for dimension, label in filters.items():
+        frame = frame[frame[dimension].astype(str) == label]
+    stages = pd.DataFrame({
+        'Registrants': 1,
+        'Downloaded': (frame['downloads'] > 0).astype(int),
+        'Week 0 Complete': frame['completed_week_0'].astype(int)
+    }, index=frame.index)
+    if by is None:
+        return stages.sum().to_frame('All').T
+    table = stages.groupby(frame[by].astype(str)).sum()
+    return table[table['Registrants'] > 0]
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return compact_registrants(raw_registrants(5_000))
+
+
+@pytest.mark.parametrize('by', [None, 'channel', 'age_band', 'cohort_week'])
+def test_rollup_matches_groupby(frame, by):
+    table = funnel_cube(frame).rollup(by)
+    expected = reference(frame, by)
+    assert list(table.columns) == FUNNEL_STAGES
+    assert table.sort_index().to_dict('index') == expected.sort_index().to_dict('index')
+
+
+def test_filtered_rollup_matches_groupby(frame):
+    cube = funnel_cube(frame)
+    filters = {'channel': 'SMS', 'age_band': '18-25'}
+    table = cube.rollup('cohort_week', **filters)
+    expected = reference(frame, 'cohort_week', **filters)
+    assert table.sort_index().to_dict('index') == expected.sort_index().to_dict('index')
+    # Breaking down by a filtered dimension leaves one row
+    assert cube.rollup('channel', channel='SMS').index.tolist() == ['SMS']
+
+
+def test_missing_values_fall_into_unknown(frame):
+    cube = funnel_cube(frame)
+    assert 'Unknown' in cube.labels['channel']
+    assert 'Unknown' in cube.labels['cohort_week']
+    assert cube.rollup(channel='Unknown')['Registrants'].item() == int(frame['channel'].astype(str).eq('Unknown').sum())
+
+
+def test_export_without_optional_columns():
+    raw = raw_registrants(200).drop(columns=['channel', 'registered_at'])
+    cube = funnel_cube(compact_registrants(raw))
+    assert cube.labels['channel'] == ['Unknown'] and cube.labels['cohort_week'] == ['Unknown']
+    assert cube.rollup()['Registrants'].item() == 200
+
+
+def test_empty_export():
+    cube = funnel_cube(compact_registrants(raw_registrants(0)))
+    assert cube.rollup().iloc[0].tolist() == [0, 0, 0]
+    assert cube.rollup('age_band').empty
+
+
+def test_conversions_match_pandas(frame):
+    table = funnel_cube(frame).rollup('channel')
+    table.loc['Empty'] = 0
+    rates = funnel_conversions(table.to_numpy().T)
+    expected = table.div(table.shift(axis=1)).iloc[:, 1:].fillna(0) * 100
+    np.testing.assert_allclose(rates, expected.to_numpy().T)
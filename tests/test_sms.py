@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from incremental import IdCodes
+from sms import CLICKS, DELAY_BUCKETS, DELIVERIES, MAX_DELAY_MINUTES, SMSAnalytics
+
+
+def logs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Phone-number sized ids, some delivered to twice
+    phones = 2_340_000_000_000 + rng.choice(10 ** 9, 300, replace=False)
+    deliveries = pd.DataFrame({
+        'campaign': rng.choice(['Launch', 'Week 1'], n),
+        'recipient_id': rng.choice(phones, n),
+        'delivered_at': pd.Timestamp('2025-01-06') + pd.to_timedelta(np.sort(rng.integers(0, 3 * 86400, n)), unit='s')
+    })
+    clicked = deliveries.sample(frac=0.3, random_state=seed)
+    clicks = pd.DataFrame({
+        'campaign': clicked['campaign'],
+        'recipient_id': clicked['recipient_id'],
+        'clicked_at': clicked['delivered_at'] + pd.to_timedelta(rng.exponential(3600, len(clicked)).astype(int) + 1, unit='s')
+    })
+    # Clicks from recipients never delivered to
+    strays = pd.DataFrame({
+        'campaign': 'Launch',
+        'recipient_id': 2_350_000_000_000 + np.arange(5),
+        'clicked_at': pd.Timestamp('2025-01-07') + pd.to_timedelta(np.arange(5), unit='min')
+    })
+    clicks = pd.concat([clicks, strays]).sort_values('clicked_at', kind='stable').reset_index(drop=True)
+    return deliveries, clicks
+
+
+def reference(deliveries, clicks):
+    first = deliveries.groupby(['campaign', 'recipient_id'])['delivered_at'].min().rename('first')
+    clicks = clicks.join(first, on=['campaign', 'recipient_id'])
+    clicks['delay'] = ((clicks['clicked_at'] - clicks['first']).dt.total_seconds() // 60).clip(0, MAX_DELAY_MINUTES)
+    summary = {}
+    for name in deliveries['campaign'].unique():
+        sent = deliveries[deliveries['campaign'] == name]
+        clicked = clicks[clicks['campaign'] == name]
+        delays = np.sort(clicked['delay'].dropna().to_numpy())
+        bounds = [lower for lower, _ in DELAY_BUCKETS] + [MAX_DELAY_MINUTES + 1]
+        summary[name] = {
+            'delivered': len(sent),
+            'clicked': len(clicked),
+            'recipients': sent['recipient_id'].nunique(),
+            'clickers': clicked['recipient_id'].nunique(),
+            'median_minutes': int(delays[len(delays) // 2]) if len(delays) else None,
+            'time_to_click': {
+                label: int(((delays >= low) & (delays < high)).sum())
+                for (low, label), high in zip(DELAY_BUCKETS, bounds[1:])
+            },
+            'delivered_by_hour': np.bincount(sent['delivered_at'].dt.hour, minlength=24).tolist(),
+            'clicked_by_hour': np.bincount(clicked['clicked_at'].dt.hour, minlength=24).tolist()
+        }
+    return summary
+
+
+def check(analytics, deliveries, clicks):
+    expected = reference(deliveries, clicks)
+    summary = analytics.summary()
+    assert sorted(summary) == sorted(expected)
+    for name, fields in expected.items():
+        assert {field: summary[name][field] for field in fields} == fields
+
+
+def test_id_codes_are_dense_and_stable():
+    codes = IdCodes()
+    first = codes.encode([10 ** 12, 5, 10 ** 12, 7])
+    assert sorted(set(first.tolist())) == [0, 1, 2]
+    assert first[0] == first[2] and len(codes) == 3
+    second = codes.encode([7, 3, 10 ** 12])
+    assert second[0] == first[3] and second[2] == first[0] and second[1] == 3
+    assert codes.lookup([3, 4, 5]).tolist() == [3, -1, first[1]]
+    assert IdCodes().lookup([1, 2]).tolist() == [-1, -1]
+    assert IdCodes().encode([]).tolist() == []
+
+
+def test_campaign_stats_match_pandas():
+    deliveries, clicks = logs(4_000)
+    analytics = SMSAnalytics()
+    for chunk in np.array_split(np.arange(len(deliveries)), 5):
+        analytics.update(DELIVERIES, deliveries.iloc[chunk])
+    analytics.update(CLICKS, clicks)
+    check(analytics, deliveries, clicks)
+    # Codes, not raw phone numbers, size the per-recipient arrays
+    assert all(len(stats.delivered_at) < 1_000 for stats in analytics.campaigns.values())
+
+
+def test_state_round_trip_then_refresh(tmp_path):
+    deliveries, clicks = logs(3_000, seed=4)
+    cutoff = deliveries['delivered_at'].iloc[1_500]
+    path = str(tmp_path / 'sms.npz')
+    analytics = SMSAnalytics()
+    analytics.update(DELIVERIES, deliveries[deliveries['delivered_at'] <= cutoff])
+    analytics.update(CLICKS, clicks[clicks['clicked_at'] <= cutoff])
+    analytics.save(path)
+
+    restored = SMSAnalytics.load(path)
+    assert restored.summary() == analytics.summary()
+    restored.update(DELIVERIES, deliveries)
+    restored.update(CLICKS, clicks)
+    check(restored, deliveries, clicks)
+
+
+def test_clicks_only_and_empty_logs():
+    deliveries, clicks = logs(500)
+    analytics = SMSAnalytics()
+    assert analytics.update(DELIVERIES, deliveries.iloc[:0]) == 0
+    analytics.update(CLICKS, clicks)
+    launch = analytics.summary()['Launch']
+    assert launch['delivered'] == 0 and launch['ctr'] == 0 and launch['median_minutes'] is None
+    assert launch['clicked'] == int((clicks['campaign'] == 'Launch').sum())
+
+
+def test_load_without_state(tmp_path):
+    analytics = SMSAnalytics.load(str(tmp_path / 'missing.npz'))
+    assert analytics.campaigns == {} and len(analytics.recipients) == 0
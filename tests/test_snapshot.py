@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from snapshot import SnapshotStore
+
+
+def test_concurrent_requests_share_one_build():
+    store = SnapshotStore()
+    release = threading.Event()
+    calls = []
+
+    def build():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(store.get, 'all', 1, build) for _ in range(8)]
+        release.set()
+        results = [future.result(5) for future in futures]
+    assert len(calls) == 1 and store.builds == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_new_version_rebuilds_and_replaces():
+    store = SnapshotStore()
+    assert store.get('all', 1, lambda: 'v1') == 'v1'
+    assert store.get('all', 1, lambda: pytest.fail('rebuilt an unchanged version')) == 'v1'
+    assert store.get('all', 2, lambda: 'v2') == 'v2'
+    assert store.get('all', 2, lambda: 'again') == 'v2'
+    assert store.builds == 2
+
+
+def test_failed_build_raises_for_every_waiter_and_is_retried():
+    store = SnapshotStore()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('source unavailable')
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(store.get, 'all', 1, failing)
+        started.wait(5)
+        follower = pool.submit(store.get, 'all', 1, lambda: 'not called while the leader builds')
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result(5)
+    assert store.builds == 0
+    assert store.get('all', 1, lambda: 'ok') == 'ok'
+
+
+def test_least_recently_used_source_is_evicted():
+    store = SnapshotStore(max_entries=2)
+    store.get('a', 1, lambda: 'a')
+    store.get('b', 1, lambda: 'b')
+    store.get('a', 1, lambda: 'a again')
+    store.get('c', 1, lambda: 'c')
+    assert store.get('a', 1, lambda: 'a again') == 'a'
+    assert store.get('b', 1, lambda: 'b rebuilt') == 'b rebuilt'
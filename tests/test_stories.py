@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from registrants import AGE_BANDS, age_band_codes
+from stories import StoryStore, result_rows, words
+
+VOCABULARY = ['sleep', 'stress', 'walk', 'journal', "don't", 'family', 'work', 'breathe', 'Café']
+
+
+def submissions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    text = [' '.join(rng.choice(VOCABULARY, rng.integers(1, 6))) for _ in range(n)]
+    frame = pd.DataFrame({
+        'story_id': np.arange(n) + 100,
+        'submitted_at': pd.Timestamp('2025-01-06') + pd.to_timedelta(np.arange(n) * 7, unit='min'),
+        'week': rng.integers(0, 4, n).astype(float),
+        'age': rng.integers(15, 70, n),
+        'title': [f'Story {i}' for i in range(n)],
+        'text': text
+    })
+    frame.loc[::11, 'week'] = np.nan
+    return frame
+
+
+def reference(frame, query='', week=None, age_band=None):
+    frame = frame[frame['submitted_at'].notna()]
+    terms = words(query)
+    keep = pd.Series(True, index=frame.index)
+    for term in terms:
+        keep &= (frame['title'] + ' ' + frame['text']).map(lambda text: term in words(text))
+    if week is not None:
+        keep &= frame['week'].fillna(-1) == week
+    if age_band is not None:
+        keep &= pd.Series(np.asarray(AGE_BANDS)[age_band_codes(frame)], index=frame.index) == age_band
+    matches = frame[keep].sort_values('submitted_at', ascending=False)
+    return len(matches), matches['story_id'].tolist()
+
+
+def check_searches(store, frame):
+    for query, week, age_band in [('', None, None), ('sleep', None, None), ('Sleep walk', None, None),
+                                  ('DON\'T stress', 2, None), ('cafe', None, None), ('café', None, '18-25'),
+                                  ('family', None, '65+'), ('nothing-like-this', None, None)]:
+        count, results = store.search(query, week=week, age_band=age_band, limit=10)
+        expected_count, expected_ids = reference(frame, query, week, age_band)
+        assert count == expected_count, query
+        assert results.column('story_id').tolist() == expected_ids[:10], query
+
+
+def test_search_matches_pandas_filter():
+    frame = submissions(400)
+    store = StoryStore()
+    store.update(frame)
+    assert len(store) == 400
+    check_searches(store, frame)
+
+
+def test_counts_by_week_match_crosstab():
+    frame = submissions(400, seed=1)
+    store = StoryStore()
+    store.update(frame)
+    bands = pd.Categorical(np.asarray(AGE_BANDS)[age_band_codes(frame)], categories=AGE_BANDS)
+    table = pd.crosstab(frame['week'].fillna(-1).astype(int), bands, dropna=False)
+    expected = {f'Week {week}' if week >= 0 else 'Unknown': row.tolist() for week, row in table.iterrows()}
+    assert store.counts_by_week() == expected
+    assert store.weeks() == [0, 1, 2, 3]
+
+
+def test_state_round_trip_then_refresh(tmp_path):
+    frame = submissions(300, seed=2)
+    path = str(tmp_path / 'stories.npz')
+    store = StoryStore()
+    store.update(frame[:180])
+    store.save(path)
+
+    restored = StoryStore.load(path)
+    assert len(restored) == 180 and restored.counts_by_week() == store.counts_by_week()
+    assert restored.update(frame) == 120
+    check_searches(restored, frame)
+    assert result_rows(restored.search('sleep', limit=1)[1])[0]['submitted'] != ''
+
+
+def test_undated_stories_are_skipped_on_every_load():
+    frame = submissions(50)
+    frame['submitted_at'] = frame['submitted_at'].astype(object)
+    frame.loc[[3, 20], 'submitted_at'] = None
+    frame.loc[30, 'submitted_at'] = 'not a date'
+    cold = StoryStore()
+    cold.update(frame)
+    incremental = StoryStore()
+    incremental.update(frame[:25])
+    incremental.update(frame)
+    assert len(cold) == len(incremental) == 47
+    assert cold.search('sleep')[0] == incremental.search('sleep')[0]
+
+
+def test_empty_store():
+    store = StoryStore()
+    assert store.update(submissions(0)) == 0
+    count, results = store.search('sleep')
+    assert count == 0 and len(results) == 0
+    assert store.search()[0] == 0
+    assert store.counts_by_week() == {} and store.weeks() == []
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Don't STOP, don't stop!", ["don't", 'stop']),
+    ('snake_case and dash-word', ['snake', 'case', 'and', 'dash', 'word'])
+])
+def test_words(text, expected):
+    assert words(text) == expected
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from web import DAILY_FIELDS, SESSION_TIMEOUT, SessionStats
+
+
+def pageviews(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Distinct, increasing times a few minutes apart, so sessions both
+    # continue and time out, over several days
+    gaps = rng.integers(1, 240, n)
+    return pd.DataFrame({
+        'visitor_id': rng.integers(0, 60, n),
+        'viewed_at': pd.Timestamp('2025-02-03') + pd.to_timedelta(np.cumsum(gaps), unit='s')
+    })
+
+
+def reference(events):
+    events = events.sort_values(['visitor_id', 'viewed_at'])
+    seconds = events['viewed_at'].astype('int64') // 10 ** 9
+    gap = seconds.groupby(events['visitor_id']).diff()
+    starts = gap.isna() | (gap > SESSION_TIMEOUT)
+    session = starts.cumsum()
+    pages = session.value_counts()
+    per_visitor = starts.groupby(events['visitor_id']).sum()
+    day = events['viewed_at'].dt.floor('D')
+    first_view = ~events['visitor_id'].duplicated()
+    daily = pd.DataFrame({
+        'pageviews': day.value_counts(),
+        'sessions': starts.groupby(day).sum(),
+        'visitors': events.groupby(day)['visitor_id'].nunique(),
+        'new_visitors': first_view.groupby(day).sum()
+    })
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq='D'), fill_value=0)
+    return {
+        'pageviews': len(events),
+        'sessions': int(starts.sum()),
+        'visitors': events['visitor_id'].nunique(),
+        'returning': int((per_visitor >= 2).sum()),
+        'bounces': int((pages == 1).sum()),
+        'duration': int(gap[~starts].sum())
+    }, {
+        'date': daily.index.strftime('%Y-%m-%d').tolist(),
+        **{field: daily[field].astype(int).tolist() for field in DAILY_FIELDS}
+    }
+
+
+def check(stats, events):
+    totals, daily = reference(events)
+    summary = stats.summary()
+    assert {field: summary[field] for field in totals} == totals
+    assert summary['daily'] == daily
+
+
+@pytest.mark.parametrize('chunks', [1, 7])
+def test_sessions_match_pandas(chunks):
+    events = pageviews(3_000)
+    stats = SessionStats()
+    bounds = np.linspace(0, len(events), chunks + 1).astype(int)
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        stats.update(events.iloc[start:stop])
+    check(stats, events)
+
+
+def test_state_round_trip_then_refresh(tmp_path):
+    events = pageviews(2_000, seed=3)
+    path = str(tmp_path / 'web.npz')
+    stats = SessionStats()
+    stats.update(events[:1_100])
+    stats.save(path)
+
+    restored = SessionStats.load(path)
+    assert restored.summary() == stats.summary()
+    # The refresh re-reads the log; only the newer pageviews are applied
+    assert restored.update(events) == 900
+    check(restored, events)
+
+
+def test_empty_log():
+    stats = SessionStats()
+    assert stats.update(pageviews(0)) == 0
+    summary = stats.summary()
+    assert summary['sessions'] == 0 and summary['bounce_rate'] == 0 and summary['avg_session_seconds'] == 0
+    assert summary['daily']['date'] == []
+
+
+def test_hashed_visitor_ids():
+    events = pageviews(2_000, seed=6)
+    # Signed 64-bit hashes of the 60 visitors
+    hashes = np.random.default_rng(6).integers(-2 ** 62, 2 ** 62, 60)
+    events['visitor_id'] = hashes[events['visitor_id']]
+    stats = SessionStats()
+    for chunk in (events.iloc[:900], events):
+        stats.update(chunk)
+    check(stats, events)
+    # Codes, not raw ids, size the per-visitor arrays
+    assert len(stats.visitors) == 60 and len(stats.last_seen) < 1_000
+
+
+def test_sparse_visitor_ids_round_trip(tmp_path):
+    events = pd.DataFrame({
+        'visitor_id': [3_000_000_000, 5, 3_000_000_000],
+        'viewed_at': pd.to_datetime(['2025-02-03 10:00', '2025-02-03 10:01', '2025-02-03 10:05'])
+    })
+    path = str(tmp_path / 'web.npz')
+    stats = SessionStats()
+    stats.update(events[:2])
+    stats.save(path)
+    restored = SessionStats.load(path)
+    restored.update(events)
+    check(restored, events)
+    assert len(restored.last_seen) == 2
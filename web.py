@@ -0,0 +1,220 @@
+"""Sessionized website analytics over the raw pageview log.
+
+The site's analytics export has one row per pageview:
+
+- ``pageviews``: ``visitor_id``, ``page``, ``viewed_at``
+
+A session is a run of one visitor's pageviews with no gap longer than
+``SESSION_TIMEOUT``. ``update_sessions`` reads the log from a data source
+chunk by chunk (see ``DataSource.iter_events``). Each chunk is sorted by
+visitor and time, and sessions are found by comparing every pageview with
+the visitor's previous one: the previous row of the chunk, or the visitor's
+last pageview from earlier chunks, kept in the state. Like the feeds in
+incremental.py, only pageviews newer than the last refresh are read and the
+state is saved next to the source.
+
+Visitor ids can be hashes, so they are first mapped to dense codes
+(``IdCodes``, saved with the state). The state then holds:
+
+- totals: pageviews, sessions, visitors, returning visitors (those with more
+  than one session), single-page sessions (bounces) and time spent in sessions
+- per visitor code, the time of their last pageview and their session and
+  current-session page counts, each capped at 2 since only "one or more than
+  one" matters
+- per day: pageviews, sessions started, distinct visitors and first-time
+  visitors
+
+Memory grows with the number of distinct visitors and days, not with the
+length of the log or the size of the ids. Pageviews are assumed to be
+appended in time order. A session still open at a refresh carries on
+into the next one.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from incremental import IdCodes
+
+LOG = 'pageviews'
+COLUMNS = ['visitor_id', 'viewed_at']
+
+# Inactivity after which a visitor's next pageview starts a new session
+SESSION_TIMEOUT = 30 * 60
+
+STATE_FILE = 'web.npz'
+
+DAILY_FIELDS = ['pageviews', 'sessions', 'visitors', 'new_visitors']
+TOTAL_FIELDS = ['pageviews', 'sessions', 'visitors', 'returning', 'bounces', 'duration']
+
+_UNSEEN = -1
+_DAY = 24 * 3600
+
+
+class SessionStats:
+    """Running session totals, per-visitor session state and daily aggregates."""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(TOTAL_FIELDS, 0)
+        self.visitors = IdCodes()
+        # Indexed by visitor code: epoch second of each visitor's last pageview (_UNSEEN if none yet)
+        self.last_seen = np.zeros(0, dtype=np.int64)
+        self.session_count = np.zeros(0, dtype=np.uint8)
+        self.session_pages = np.zeros(0, dtype=np.uint8)
+        # One row per DAILY_FIELDS entry, one column per day from first_day
+        self.first_day = None
+        self.daily = np.zeros((len(DAILY_FIELDS), 0), dtype=np.int64)
+        self.watermark = None
+
+    def _grow(self, size):
+        if size > len(self.last_seen):
+            size = max(size, 2 * len(self.last_seen))
+            grow = size - len(self.last_seen)
+            self.last_seen = np.pad(self.last_seen, (0, grow), constant_values=_UNSEEN)
+            self.session_count = np.pad(self.session_count, (0, grow))
+            self.session_pages = np.pad(self.session_pages, (0, grow))
+
+    def _add_daily(self, days, counts):
+        if self.first_day is None:
+            self.first_day = int(days.min())
+        columns = days - self.first_day
+        if columns.max() >= self.daily.shape[1]:
+            self.daily = np.pad(self.daily, ((0, 0), (0, int(columns.max()) + 1 - self.daily.shape[1])))
+        for row, values in enumerate(counts):
+            self.daily[row] += np.bincount(columns, weights=values, minlength=self.daily.shape[1]).astype(np.int64)
+
+    def update(self, events):
+        """Apply the pageviews newer than the watermark; returns how many were applied."""
+        times = pd.to_datetime(events['viewed_at'])
+        if self.watermark is not None:
+            newer = (times > self.watermark).to_numpy()
+            events, times = events[newer], times[newer]
+        if not len(events):
+            return 0
+
+        visitors = self.visitors.encode(events['visitor_id'].to_numpy(dtype=np.int64))
+        seconds = times.to_numpy(dtype='datetime64[s]').astype(np.int64)
+        order = np.lexsort((seconds, visitors))
+        visitors, seconds = visitors[order], seconds[order]
+        self._grow(len(self.visitors))
+
+        # Each pageview's previous pageview by the same visitor
+        first = np.r_[True, visitors[1:] != visitors[:-1]]
+        last = np.r_[first[1:], True]
+        previous = np.r_[_UNSEEN, seconds[:-1]]
+        previous[first] = self.last_seen[visitors[first]]
+        seen = previous != _UNSEEN
+        starts = ~seen | (seconds - previous > SESSION_TIMEOUT)
+
+        # Runs of pageviews of one session within the chunk; a visitor's first
+        # run continues their open session unless it starts a new one
+        runs = starts | first
+        run = np.cumsum(runs) - 1
+        run_pages = np.bincount(run)
+        run_visitors = visitors[runs]
+        continued = ~starts[runs]
+        carried = np.where(continued, self.session_pages[run_visitors], 0)
+        # A session is a bounce while it has one page: new single-page runs
+        # add one, and a carried single-page session that grows drops out
+        bounces = int(((~continued) & (run_pages == 1)).sum() - (continued & (carried == 1)).sum())
+
+        chunk_visitors = visitors[first]
+        prior_sessions = self.session_count[chunk_visitors].astype(np.int64)
+        sessions = np.add.reduceat(starts.astype(np.int64), np.flatnonzero(first))
+        self.session_count[chunk_visitors] = np.minimum(prior_sessions + sessions, 2)
+        last_runs = run[last]
+        self.session_pages[chunk_visitors] = np.minimum(carried[last_runs] + run_pages[last_runs], 2)
+        self.last_seen[chunk_visitors] = seconds[last]
+
+        days = seconds // _DAY
+        new_day = ~seen | (previous // _DAY != days)
+        self._add_daily(days, [np.ones(len(days)), starts, new_day, ~seen])
+
+        self.totals['pageviews'] += len(seconds)
+        self.totals['sessions'] += int(starts.sum())
+        self.totals['visitors'] += int((~seen).sum())
+        self.totals['returning'] += int(((prior_sessions < 2) & (prior_sessions + sessions >= 2)).sum())
+        self.totals['bounces'] += bounces
+        self.totals['duration'] += int((seconds - previous)[~starts].sum())
+        self.watermark = times.max()
+        return len(events)
+
+    def summary(self):
+        totals = self.totals
+        days = pd.date_range(pd.Timestamp(self.first_day or 0, unit='D'), periods=self.daily.shape[1], freq='D')
+        return {
+            **totals,
+            'new_visitors': totals['visitors'] - totals['returning'],
+            'new_share': round((totals['visitors'] - totals['returning']) / totals['visitors'] * 100, 1) if totals['visitors'] else 0,
+            'bounce_rate': round(totals['bounces'] / totals['sessions'] * 100, 1) if totals['sessions'] else 0,
+            'avg_session_seconds': round(totals['duration'] / totals['sessions']) if totals['sessions'] else 0,
+            'daily': {
+                'date': days.strftime('%Y-%m-%d').tolist(),
+                **{field: counts.tolist() for field, counts in zip(DAILY_FIELDS, self.daily)}
+            }
+        }
+
+    def save(self, path):
+        """Write the state to ``path`` (.npz), replacing any previous state atomically."""
+        meta = {
+            'totals': self.totals,
+            'first_day': self.first_day,
+            'watermark': self.watermark.isoformat() if self.watermark is not None else None
+        }
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, last_seen=self.last_seen, session_count=self.session_count,
+                 session_pages=self.session_pages, daily=self.daily, visitor_ids=self.visitors.ids,
+                 visitor_codes=self.visitors.codes, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore the state saved at ``path``, or start empty if there is none."""
+        stats = cls()
+        if not os.path.exists(path):
+            return stats
+        with np.load(path, allow_pickle=False) as state:
+            if 'visitor_ids' not in state.files:
+                # Saved before visitor ids were coded: rebuild from the log
+                return stats
+            meta = json.loads(str(state['meta']))
+            stats.visitors = IdCodes(state['visitor_ids'], state['visitor_codes'])
+            for field in ('last_seen', 'session_count', 'session_pages', 'daily'):
+                setattr(stats, field, state[field])
+        stats.totals.update(meta['totals'])
+        stats.first_day = meta['first_day']
+        if meta['watermark'] is not None:
+            stats.watermark = pd.Timestamp(meta['watermark'])
+        return stats
+
+
+def update_sessions(source):
+    """Apply new pageviews of ``source`` to its saved session state.
+
+    Returns the up-to-date ``SessionStats``, or None if the source has no
+    pageview log.
+    """
+    state_path = os.path.join(source.state_dir(), STATE_FILE)
+    stats = SessionStats.load(state_path)
+    chunks = source.iter_events(LOG, COLUMNS, 'viewed_at', stats.watermark)
+    if chunks is None:
+        return None
+
+    if sum(stats.update(chunk) for chunk in chunks):
+        os.makedirs(source.state_dir(), exist_ok=True)
+        stats.save(state_path)
+    return stats
+
+
+def apply_sessions(data, stats):
+    """Overwrite the website totals in ``data`` and add the session details as ``web_sessions``."""
+    summary = stats.summary()
+    data['traffic_data'].update({
+        'Visitors': summary['visitors'],
+        'Sessions': summary['sessions'],
+        'Pageviews': summary['pageviews'],
+        'Bounce Rate': summary['bounce_rate']
+    })
+    data['web_sessions'] = summary
+    return data